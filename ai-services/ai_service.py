@@ -1,33 +1,73 @@
 import os
+import tempfile
 import requests
-from transformers import pipeline
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify
 from flask_cors import CORS
-import cv2
-import numpy as np
-from PIL import Image
-import pytesseract
-import re
+from werkzeug.exceptions import RequestEntityTooLarge
 from datetime import datetime
 import json
+from document_cache import DocumentCache
+from document_pipeline import DOCUMENT_MAX_BYTES, UploadRequest, is_pdf, upload_buffer
+from lazy_loader import LazyResource
+from ocr_jobs import OcrJobQueue, QueueFull
+from preference_engine import KeywordTier, LocalModelTier, PreferenceEngine, load_local_models, preference_response
 
 app = Flask(__name__)
+app.request_class = UploadRequest
+app.config['MAX_CONTENT_LENGTH'] = DOCUMENT_MAX_BYTES
 CORS(app)
 
-# Initialize Hugging Face models
-sentiment_analyzer = pipeline(
-    "sentiment-analysis",
-    model="cardiffnlp/twitter-roberta-base-sentiment-latest"
+# Local model backend and batching, shared with the hybrid service's settings
+AI_MODEL_BACKEND = os.getenv('AI_MODEL_BACKEND', 'pytorch').lower()
+AI_MODEL_DIR = os.getenv('AI_MODEL_DIR') or None
+MODEL_BATCH_SIZE = int(os.getenv('MODEL_BATCH_SIZE', '16'))
+PIPELINE_CACHE_ENTRIES = int(os.getenv('PIPELINE_CACHE_ENTRIES', '2048'))
+
+# Hugging Face models (transformers is imported on load), loaded on first use or by the warmup thread
+models_resource = LazyResource(
+    "Preference models",
+    lambda: load_local_models(AI_MODEL_BACKEND, AI_MODEL_DIR, MODEL_BATCH_SIZE, PIPELINE_CACHE_ENTRIES)
 )
 
-text_classifier = pipeline(
-    "zero-shot-classification",
-    model="facebook/bart-large-mnli"
+# Documents are OCR'd on a process pool; /process-document waits this long before handing back a job to poll
+OCR_WAIT_SECONDS = float(os.getenv('OCR_WAIT_SECONDS', '60'))
+# Extracted data for documents seen before (same bytes and type), shared by all OCR paths
+document_cache = DocumentCache(
+    os.path.join(os.getenv('DOCUMENT_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'gtu-document-cache'), 'ocr'),
+    max_bytes=int(os.getenv('DOCUMENT_CACHE_MAX_MB', '256')) * 1024 * 1024
 )
+ocr_jobs = OcrJobQueue(cache=document_cache)
+
+# Keywords answer most requests; the models are only used for ambiguous input once loaded
+preference_engine = PreferenceEngine([
+    KeywordTier(),
+    LocalModelTier(lambda: models_resource.get() if models_resource.ready else None)
+])
 
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "message": "AI service is running"})
+    """Liveness: the process is up and serving; see /ready for model readiness"""
+    return jsonify({
+        "status": "healthy",
+        "message": "AI service is running",
+        "ready": models_resource.ready,
+        "preference_engine": preference_engine.stats(),
+        "ocr_jobs": ocr_jobs.stats(),
+        "document_cache": document_cache.stats()
+    })
+
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: 200 once the models are loaded, 503 while loading or failed"""
+    sentiment_analyzer, text_classifier = models_resource.get() if models_resource.ready else (None, None)
+    return jsonify({
+        "ready": models_resource.ready,
+        "models": models_resource.status(),
+        "inference_cache": {
+            "sentiment": sentiment_analyzer.cache_info() if sentiment_analyzer else None,
+            "text_classifier": text_classifier.cache_info() if text_classifier else None
+        }
+    }), 200 if models_resource.ready else 503
 
 @app.route('/process-preferences', methods=['POST'])
 def process_preferences():
@@ -38,88 +78,44 @@ def process_preferences():
         if not preferences_text:
             return jsonify({"error": "No preferences provided"}), 400
         
-        # Analyze sentiment for each preference
-        sentences = preferences_text.split('.')
-        analyzed_preferences = {
-            'liked_subjects': [],
-            'disliked_subjects': [],
-            'liked_times': [],
-            'disliked_times': [],
-            'general_sentiment': 'neutral'
-        }
-        
-        subject_keywords = [
-            'mathematics', 'math', 'physics', 'chemistry', 'biology', 
-            'computer science', 'programming', 'history', 'english',
-            'literature', 'economics', 'sociology', 'psychology'
-        ]
-        
-        time_keywords = [
-            'morning', 'afternoon', 'evening', 'early morning', 
-            'late evening', '8 am', '9 am', '10 am', 'monday', 'friday'
-        ]
-        
-        for sentence in sentences:
-            if sentence.strip():
-                # Sentiment analysis
-                sentiment_result = sentiment_analyzer(sentence)
-                sentiment_score = sentiment_result[0]
-                
-                # Subject classification
-                subject_classification = text_classifier(
-                    sentence, 
-                    subject_keywords,
-                    hypothesis_template="This text is about {}."
-                )
-                
-                # Time classification
-                time_classification = text_classifier(
-                    sentence,
-                    time_keywords,
-                    hypothesis_template="This text mentions {}."
-                )
-                
-                # Extract preferences based on sentiment
-                if sentiment_score['label'] == 'LABEL_2':  # Positive
-                    # Add to liked categories
-                    if subject_classification['scores'][0] > 0.5:
-                        analyzed_preferences['liked_subjects'].append(
-                            subject_classification['labels'][0]
-                        )
-                    if time_classification['scores'][0] > 0.5:
-                        analyzed_preferences['liked_times'].append(
-                            time_classification['labels'][0]
-                        )
-                        
-                elif sentiment_score['label'] == 'LABEL_0':  # Negative
-                    # Add to disliked categories
-                    if subject_classification['scores'][0] > 0.5:
-                        analyzed_preferences['disliked_subjects'].append(
-                            subject_classification['labels'][0]
-                        )
-                    if time_classification['scores'][0] > 0.5:
-                        analyzed_preferences['disliked_times'].append(
-                            time_classification['labels'][0]
-                        )
-        
-        # Remove duplicates
-        analyzed_preferences['liked_subjects'] = list(set(analyzed_preferences['liked_subjects']))
-        analyzed_preferences['disliked_subjects'] = list(set(analyzed_preferences['disliked_subjects']))
-        analyzed_preferences['liked_times'] = list(set(analyzed_preferences['liked_times']))
-        analyzed_preferences['disliked_times'] = list(set(analyzed_preferences['disliked_times']))
-        
-        return jsonify({
-            "success": True,
-            "analyzed_preferences": analyzed_preferences,
-            "original_text": preferences_text
-        })
+        return jsonify(preference_response(preference_engine, preferences_text))
         
     except Exception as e:
         print(f"Error processing preferences: {str(e)}")
         return jsonify({"error": f"Failed to process preferences: {str(e)}"}), 500
 
+def ocr_queue_full_response(error):
+    response = jsonify({"error": "OCR queue is full, retry later", "retry_after": error.retry_after})
+    response.headers['Retry-After'] = str(error.retry_after)
+    return response, 429
+
+def pending_job_response(job):
+    return {"job_id": job.id, "status": job.status, "filename": job.filename, "poll_url": f"/ocr-jobs/{job.id}"}
+
+def pdf_document_response(pages, doc_type):
+    """Page-parallel PDF results: streamed as NDJSON, one line per page and a final document line,
+    when ``stream=true`` is posted or ``application/x-ndjson`` accepted; otherwise one JSON body"""
+    if request.form.get('stream', 'false').lower() == 'true' or 'application/x-ndjson' in request.headers.get('Accept', ''):
+        return Response((json.dumps(item) + "\n" for item in pages), mimetype='application/x-ndjson')
+    
+    page_results = list(pages)
+    document = page_results.pop()
+    return jsonify({
+        "success": True,
+        "document_type": doc_type,
+        "extracted_data": document["extracted_data"],
+        "cached": document.get("cached", False),
+        "pages": document["pages"],
+        "text_layer_pages": document["text_layer_pages"],
+        "ocr_pages": document["ocr_pages"],
+        "page_results": [
+            {key: value for key, value in page.items() if key != "extracted_data"}
+            for page in sorted(page_results, key=lambda page: page["page"])
+        ]
+    })
+
 @app.route('/process-document', methods=['POST'])
-def process_document():
+def process_document_upload():
     try:
         if 'file' not in request.files:
             return jsonify({"error": "No file provided"}), 400
@@ -130,174 +126,79 @@ def process_document():
         if file.filename == '':
             return jsonify({"error": "No file selected"}), 400
         
-        # Save uploaded file temporarily
-        temp_path = f"temp_{file.filename}"
-        file.save(temp_path)
-        
-        try:
-            if doc_type == 'calendar':
-                result = process_calendar_document(temp_path)
+        # Read from the request's own buffer: nothing is written under the upload's name
+        with upload_buffer(file) as buffer:
+            if is_pdf(buffer):
+                pages = ocr_jobs.pdf_pages(buffer, doc_type)
             else:
-                result = process_timetable_document(temp_path)
-            
-            return jsonify({
-                "success": True,
-                "document_type": doc_type,
-                "extracted_data": result
-            })
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
-        
-    except Exception as e:
-        print(f"Error processing document: {str(e)}")
-        return jsonify({"error": f"Failed to process document: {str(e)}"}), 500
-
-def process_calendar_document(file_path):
-    """Extract calendar information from PDF/image"""
-    try:
-        # Convert PDF to image or load image
-        if file_path.lower().endswith('.pdf'):
-            # For PDF processing, you might need pdf2image
-            # For now, we'll assume it's converted to image
-            image = cv2.imread(file_path)
-        else:
-            image = cv2.imread(file_path)
+                pages = None
+                job = ocr_jobs.submit(bytes(buffer), doc_type, file.filename)
         
-        if image is None:
-            raise Exception("Could not load image")
+        if pages is not None:
+            return pdf_document_response(pages, doc_type)
         
-        # Preprocess image for better OCR
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        processed = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[1]
+        if not ocr_jobs.wait(job, OCR_WAIT_SECONDS):
+            return jsonify({"success": True, **pending_job_response(job)}), 202
+        if job.status == "failed":
+            raise Exception(job.error)
         
-        # Extract text using OCR
-        extracted_text = pytesseract.image_to_string(processed)
-        
-        # Parse calendar data
-        calendar_data = parse_calendar_text(extracted_text)
-        
-        return calendar_data
+        return jsonify({
+            "success": True,
+            "document_type": doc_type,
+            "extracted_data": job.result,
+            "cached": job.cached,
+            "timings": job.timings
+        })
         
+    except QueueFull as e:
+        return ocr_queue_full_response(e)
+    except RequestEntityTooLarge:
+        return jsonify({"error": f"File too large (limit {DOCUMENT_MAX_BYTES // (1024 * 1024)} MB)"}), 413
     except Exception as e:
-        print(f"Error processing calendar: {str(e)}")
-        raise
+        print(f"Error processing document: {str(e)}")
+        return jsonify({"error": f"Failed to process document: {str(e)}"}), 500
 
-def process_timetable_document(file_path):
-    """Extract timetable information from PDF/image"""
+@app.route('/ocr-jobs', methods=['POST'])
+def submit_ocr_jobs():
+    """Queue uploaded documents for OCR (repeat the ``file`` field for a batch); poll each job's URL"""
     try:
-        # Load and preprocess image
-        image = cv2.imread(file_path)
-        if image is None:
-            raise Exception("Could not load image")
+        files = [file for file in request.files.getlist('file') if file.filename]
+        doc_type = request.form.get('type', 'calendar')
         
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        processed = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[1]
-        
-        # Extract text
-        extracted_text = pytesseract.image_to_string(processed)
+        if not files:
+            return jsonify({"error": "No file provided"}), 400
         
-        # Parse timetable data
-        timetable_data = parse_timetable_text(extracted_text)
+        documents = []
+        for file in files:
+            with upload_buffer(file) as buffer:
+                documents.append((bytes(buffer), doc_type, file.filename))
+        jobs = ocr_jobs.submit_many(documents)
         
-        return timetable_data
+        return jsonify({
+            "success": True,
+            "document_type": doc_type,
+            "jobs": [pending_job_response(job) for job in jobs]
+        }), 202
         
+    except QueueFull as e:
+        return ocr_queue_full_response(e)
+    except RequestEntityTooLarge:
+        return jsonify({"error": f"Upload too large (limit {DOCUMENT_MAX_BYTES // (1024 * 1024)} MB)"}), 413
     except Exception as e:
-        print(f"Error processing timetable: {str(e)}")
-        raise
-
-def parse_calendar_text(text):
-    """Parse calendar text to extract working days, holidays, etc."""
-    calendar_data = {
-        'semester_start': None,
-        'semester_end': None,
-        'holidays': [],
-        'total_working_days': 0,
-        'exam_dates': []
-    }
-    
-    # Extract dates using regex
-    date_patterns = [
-        r'\b(\d{1,2})[/-](\d{1,2})[/-](\d{4})\b',  # DD/MM/YYYY or DD-MM-YYYY
-        r'\b(\d{4})[/-](\d{1,2})[/-](\d{1,2})\b',  # YYYY/MM/DD or YYYY-MM-DD
-    ]
-    
-    dates_found = []
-    for pattern in date_patterns:
-        matches = re.findall(pattern, text)
-        dates_found.extend(matches)
-    
-    # Extract holiday information
-    holiday_keywords = ['holiday', 'vacation', 'break', 'closed', 'festival']
-    lines = text.split('\n')
-    
-    for line in lines:
-        line_lower = line.lower()
-        if any(keyword in line_lower for keyword in holiday_keywords):
-            calendar_data['holidays'].append(line.strip())
-    
-    # Estimate working days (this is a simplified calculation)
-    if dates_found:
-        calendar_data['total_working_days'] = max(100, len(dates_found) * 5)  # Rough estimate
-    
-    return calendar_data
+        print(f"Error queueing OCR jobs: {str(e)}")
+        return jsonify({"error": f"Failed to queue documents: {str(e)}"}), 500
 
-def parse_timetable_text(text):
-    """Parse timetable text to extract subject schedules"""
-    timetable_data = {
-        'subjects': [],
-        'weekly_schedule': {},
-        'total_classes_per_week': 0
-    }
-    
-    # Common subject keywords
-    subject_keywords = [
-        'mathematics', 'math', 'physics', 'chemistry', 'biology',
-        'computer science', 'programming', 'history', 'english',
-        'literature', 'economics', 'lab', 'practical'
-    ]
-    
-    # Time patterns
-    time_pattern = r'\b(\d{1,2}):(\d{2})\s*(AM|PM|am|pm)?\b'
-    
-    lines = text.split('\n')
-    current_day = None
+@app.route('/ocr-jobs/<job_id>', methods=['GET'])
+def get_ocr_job(job_id):
+    """Job status, with the extracted data and stage timings once done; ``?wait=<seconds>`` long-polls"""
+    job = ocr_jobs.get(job_id)
+    if job is None:
+        return jsonify({"error": "Unknown or expired job"}), 404
     
-    days_of_week = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
-    
-    for line in lines:
-        line_clean = line.strip().lower()
-        
-        # Check if line contains a day of the week
-        for day in days_of_week:
-            if day in line_clean:
-                current_day = day
-                timetable_data['weekly_schedule'][day] = []
-                break
-        
-        # Extract subjects and times
-        if current_day:
-            times = re.findall(time_pattern, line)
-            for keyword in subject_keywords:
-                if keyword in line_clean:
-                    if keyword not in timetable_data['subjects']:
-                        timetable_data['subjects'].append(keyword)
-                    
-                    class_info = {
-                        'subject': keyword,
-                        'day': current_day,
-                        'times': times,
-                        'raw_text': line.strip()
-                    }
-                    timetable_data['weekly_schedule'][current_day].append(class_info)
-    
-    # Calculate total classes per week
-    total_classes = sum(len(day_schedule) for day_schedule in timetable_data['weekly_schedule'].values())
-    timetable_data['total_classes_per_week'] = total_classes
-    
-    return timetable_data
+    wait_seconds = min(request.args.get('wait', 0, type=float), OCR_WAIT_SECONDS)
+    if wait_seconds > 0:
+        ocr_jobs.wait(job, wait_seconds)
+    return jsonify(job.to_dict())
 
 @app.route('/generate-recommendations', methods=['POST'])
 def generate_recommendations():
@@ -369,14 +270,10 @@ def generate_recommendations():
 
 if __name__ == '__main__':
     print("Starting AI Service...")
-    print("Installing required models...")
+    print("Loading models in the background (see /ready)...")
     
-    # Pre-load models to avoid delays
-    try:
-        sentiment_analyzer("test")
-        text_classifier("test", ["test"])
-        print("Models loaded successfully!")
-    except Exception as e:
-        print(f"Warning: Could not pre-load models: {e}")
+    # Pre-load models without delaying startup
+    models_resource.warmup()
+    ocr_jobs.warmup()
     
     app.run(debug=True, port=5001, host='0.0.0.0')
\ No newline at end of file
@@ -1,20 +1,24 @@
 import os
+import hashlib
 import json
+import re
 import requests
 import schedule
 import time
+import tempfile
+import textwrap
 import threading
 from datetime import datetime, timedelta
-from flask import Flask, request, jsonify
+from flask import Flask, Response, request, jsonify, stream_with_context
 from flask_cors import CORS
-from PIL import Image
-import google.generativeai as genai
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.options import Options
 import base64
-import io
 from dotenv import load_dotenv
+from document_cache import DocumentCache
+from lazy_loader import LazyResource
+from model_providers import create_provider
+from response_cache import ResponseCache
+from single_flight import SingleFlight
+from preference_engine import GeminiTier, KeywordTier, LocalModelTier, PreferenceEngine, load_local_models, preference_response
 
 # Load environment variables
 load_dotenv()
@@ -24,36 +28,73 @@ CORS(app)
 
 # Initialize Gemini AI
 GEMINI_API_KEY = os.getenv('GEMINI_API_KEY', 'your-gemini-api-key-here')
-genai.configure(api_key=GEMINI_API_KEY)
-
-# Smart model selection with fallback
-def get_best_available_model():
-    """Try stable models with preference for faster, lighter versions"""
-    model_preferences = [
-        'gemini-1.5-flash',         # Fast and efficient - best for API limits
-        'gemini-1.5-flash-latest',  # Latest flash version
-        'gemini-1.5-pro',           # Stable fallback
-        'gemini-2.0-flash'          # Newer flash model
-    ]
-    
-    for model_name in model_preferences:
-        try:
-            test_model = genai.GenerativeModel(model_name)
-            # Quick test to verify the model works
-            return model_name, test_model
-        except Exception as e:
-            print(f"⚠️ Model {model_name} not available: {str(e)[:100]}")
-            continue
+
+# Model provider (Gemini, or the local fake with AI_MODEL_PROVIDER=fake), created on first use
+# or by the warmup thread so importing the service stays fast
+model_resource = LazyResource("Gemini model", lambda: create_provider(GEMINI_API_KEY))
+
+def get_model():
+    """Return the model provider, loading it if the warmup has not finished yet"""
+    return model_resource.get()
+
+# Cache of model responses for byte-identical prompts
+response_cache = ResponseCache(
+    max_entries=int(os.getenv('GEMINI_CACHE_MAX_ENTRIES', '512')),
+    ttl_seconds=float(os.getenv('GEMINI_CACHE_TTL_SECONDS', '3600')),
+    db_path=os.getenv('GEMINI_CACHE_DB') or None
+)
+
+# Concurrent identical model calls share one upstream request
+inflight_calls = SingleFlight()
+
+# Vision results for documents seen before (same bytes and type), kept on disk
+document_cache = DocumentCache(
+    os.path.join(os.getenv('DOCUMENT_CACHE_DIR') or os.path.join(tempfile.gettempdir(), 'gtu-document-cache'), 'gemini-vision'),
+    max_bytes=int(os.getenv('DOCUMENT_CACHE_MAX_MB', '256')) * 1024 * 1024
+)
+
+def is_json_text(text):
+    try:
+        json.loads(text)
+        return True
+    except json.JSONDecodeError:
+        return False
+
+def generate_text(prompt, generation_config=None, validate=None):
+    """Generate a model response, serving repeated identical prompts from the response cache
     
-    # Final fallback
-    return 'gemini-1.5-flash', genai.GenerativeModel('gemini-1.5-flash')
+    Identical prompts that arrive while a call is in flight wait for that call instead of
+    starting their own. With ``validate``, only responses it accepts are cached, so one bad
+    reply (e.g. not JSON) isn't served again for every retry.
+    """
+    model = get_model()
+    cache_key = ResponseCache.make_key(model.model_name, prompt, generation_config)
+    text = response_cache.get(cache_key)
+    if text is None:
+        def call_model():
+            text = model.generate_content(prompt, generation_config=generation_config).text
+            if validate is None or validate(text):
+                response_cache.set(cache_key, text)
+            return text
+        
+        text = inflight_calls.do(cache_key, call_model)
+    return text
 
-# Initialize Gemini models with smart selection
-model_name, model = get_best_available_model()
-vision_model = model  # Use the same model for vision tasks (all newer models support multimodal)
+# Optional local transformers tier between keywords and Gemini (PREFERENCE_LOCAL_MODELS=true)
+local_models_resource = None
+if os.getenv('PREFERENCE_LOCAL_MODELS', 'false').lower() == 'true':
+    local_models_resource = LazyResource("Preference models", lambda: load_local_models(
+        os.getenv('AI_MODEL_BACKEND', 'pytorch').lower(), os.getenv('AI_MODEL_DIR') or None,
+        int(os.getenv('MODEL_BATCH_SIZE', '16')), int(os.getenv('PIPELINE_CACHE_ENTRIES', '2048'))
+    ))
 
-print(f"🤖 Using Gemini model: {model_name}")
-print(f"✨ Features: Advanced reasoning, multimodal processing, enhanced context")
+preference_engine = PreferenceEngine([
+    KeywordTier(),
+    *([LocalModelTier(lambda: local_models_resource.get() if local_models_resource.ready else None)]
+      if local_models_resource else []),
+    # Only JSON analyses are cached; a malformed reply would be replayed at the fallback confidence
+    GeminiTier(lambda prompt, config: generate_text(prompt, config, validate=is_json_text))
+])
 
 # Global data store for dynamic updates
 attendance_data = {
@@ -71,6 +112,9 @@ dynamic_recommendations = []
 
 def setup_web_driver():
     """Setup headless Chrome driver for web automation"""
+    from selenium import webdriver
+    from selenium.webdriver.chrome.options import Options
+
     chrome_options = Options()
     chrome_options.add_argument("--headless")
     chrome_options.add_argument("--no-sandbox")
@@ -84,13 +128,28 @@ def setup_web_driver():
 
 @app.route('/health', methods=['GET'])
 def health_check():
+    """Liveness: the process is up and serving; see /ready for model readiness"""
+    model = get_model() if model_resource.ready else None
     return jsonify({
         "status": "healthy", 
         "message": "Gemini AI Service is running",
-        "model": model_name,  # Dynamic model name based on what's available
-        "features": ["advanced_reasoning", "multimodal_processing", "enhanced_context", "real_time_analysis"]
+        "model": model.model_name if model else "loading",  # Dynamic model name based on what's available
+        "ready": model_resource.ready,
+        "features": ["advanced_reasoning", "multimodal_processing", "enhanced_context", "real_time_analysis"],
+        "response_cache": response_cache.stats(),
+        "model_provider": model.stats() if model else None,
+        "single_flight": inflight_calls.stats(),
+        "preference_engine": preference_engine.stats(),
+        "chat_tokens": chat_token_usage.stats(),
+        "document_cache": document_cache.stats()
     })
 
+@app.route('/ready', methods=['GET'])
+def readiness_check():
+    """Readiness: 200 once the model provider is loaded, 503 while loading or failed"""
+    status = model_resource.status()
+    return jsonify({"ready": model_resource.ready, "model": status}), 200 if model_resource.ready else 503
+
 @app.route('/process-preferences', methods=['POST'])
 def process_preferences_with_gemini():
     try:
@@ -100,97 +159,14 @@ def process_preferences_with_gemini():
         if not preferences_text:
             return jsonify({"error": "No preferences provided"}), 400
 
-        # Use Gemini 2.5 Pro for advanced preference analysis with enhanced reasoning
-        prompt = f"""
-        You are an advanced AI educational advisor with deep understanding of student psychology and learning patterns. 
-        Analyze the following student preferences and provide comprehensive insights:
-        
-        Student Input: "{preferences_text}"
-        
-        Please provide a detailed JSON response with enhanced analysis:
-        {{
-            "liked_subjects": ["list of subjects the student enjoys with confidence scores"],
-            "disliked_subjects": ["list of subjects the student dislikes with reasoning"],
-            "preferred_times": ["optimal class times based on psychological patterns"],
-            "disliked_times": ["times to avoid with productivity impact analysis"],
-            "learning_style": {{
-                "primary_style": "visual/auditory/kinesthetic/reading",
-                "secondary_traits": ["detailed learning preferences"],
-                "optimal_environment": "description of ideal study conditions"
-            }},
-            "attendance_patterns": {{
-                "predicted_behavior": "detailed attendance prediction",
-                "risk_assessment": "low/medium/high with factors",
-                "seasonal_variations": "how attendance might vary by semester periods"
-            }},
-            "motivation_factors": {{
-                "intrinsic": ["internal motivators like interest, curiosity"],
-                "extrinsic": ["external motivators like grades, career goals"],
-                "social": ["peer influence, group dynamics"]
-            }},
-            "risk_factors": {{
-                "high_risk": ["major factors that could cause skipping"],
-                "medium_risk": ["moderate concerns to monitor"],
-                "mitigation_strategies": ["specific recommendations to address risks"]
-            }},
-            "personality_assessment": {{
-                "academic_persona": "detailed academic personality type",
-                "stress_response": "how they handle academic pressure",
-                "goal_orientation": "achievement vs. mastery focused",
-                "time_management_style": "procrastinator vs. planner"
-            }},
-            "personalized_recommendations": {{
-                "attendance_strategy": "specific tactics for maintaining attendance",
-                "study_optimization": "how to maximize learning efficiency",
-                "schedule_recommendations": "ideal weekly schedule structure",
-                "wellness_tips": "maintaining balance and preventing burnout"
-            }},
-            "behavioral_insights": {{
-                "decision_making_patterns": "how they make attendance decisions",
-                "energy_cycles": "daily and weekly energy patterns",
-                "social_influences": "impact of friends and environment"
-            }}
-        }}
-        
-        Use advanced reasoning to provide deep, actionable insights that go beyond surface-level analysis.
-        Be specific, practical, and psychologically informed. Return only valid JSON.
-        """
-        
-        # Enhanced generation configuration for Gemini 2.5 Pro
-        generation_config = {
-            "temperature": 0.7,  # Balanced creativity and consistency
-            "top_p": 0.8,        # Focused but diverse responses
-            "top_k": 40,         # Good balance of options
-            "max_output_tokens": 4096,  # Comprehensive responses
-            "response_mime_type": "application/json"  # Force JSON output
-        }
+        # Keywords first; Gemini is only called when the cheaper tiers are not confident
+        result = preference_response(preference_engine, preferences_text)
         
-        response = model.generate_content(prompt, generation_config=generation_config)
+        # Store preferences globally for dynamic updates
+        global user_preferences
+        user_preferences = result["analyzed_preferences"].get("details", result["analyzed_preferences"])
         
-        try:
-            # Parse Gemini's response as JSON
-            analysis = json.loads(response.text)
-            
-            # Store preferences globally for dynamic updates
-            global user_preferences
-            user_preferences = analysis
-            
-            return jsonify({
-                "success": True,
-                "analysis_method": "gemini-ai",
-                "analyzed_preferences": analysis,
-                "original_text": preferences_text,
-                "confidence_score": 0.95
-            })
-            
-        except json.JSONDecodeError:
-            # Fallback if Gemini doesn't return valid JSON
-            return jsonify({
-                "success": True,
-                "analysis_method": "gemini-text",
-                "raw_analysis": response.text,
-                "original_text": preferences_text
-            })
+        return jsonify(result)
         
     except Exception as e:
         print(f"Error processing preferences: {str(e)}")
@@ -208,9 +184,25 @@ def process_document_with_vision():
         if file.filename == '':
             return jsonify({"error": "No file selected"}), 400
 
-        # Convert uploaded file to image for Gemini Vision
         image_data = file.read()
-        image = Image.open(io.BytesIO(image_data))
+        
+        # The same calendar/timetable is uploaded by many students; answer repeats from disk
+        cache_key = document_cache.make_key(image_data, doc_type)
+        extracted_data = document_cache.get(cache_key)
+        if extracted_data is not None:
+            return jsonify({
+                "success": True,
+                "document_type": doc_type,
+                "analysis_method": "gemini-vision",
+                "extracted_data": extracted_data,
+                "cached": True,
+                "processing_time": datetime.now().isoformat()
+            })
+        
+        from vision_images import prepare_vision_image
+
+        # Upright, grayscale, cropped and downscaled: a fraction of a full-resolution phone photo
+        image = prepare_vision_image(image_data)
         
         # Prepare prompt based on document type
         if doc_type == 'calendar':
@@ -240,10 +232,11 @@ def process_document_with_vision():
             """
         
         # Use Gemini Vision API
-        response = vision_model.generate_content([prompt, image])
+        response = get_model().generate_content([prompt, image])
         
         try:
             extracted_data = json.loads(response.text)
+            document_cache.set(cache_key, extracted_data)
         except json.JSONDecodeError:
             extracted_data = {
                 "raw_analysis": response.text,
@@ -255,6 +248,7 @@ def process_document_with_vision():
             "document_type": doc_type,
             "analysis_method": "gemini-vision",
             "extracted_data": extracted_data,
+            "cached": False,
             "processing_time": datetime.now().isoformat()
         })
         
@@ -262,64 +256,68 @@ def process_document_with_vision():
         print(f"Error processing document: {str(e)}")
         return jsonify({"error": f"Failed to process document: {str(e)}"}), 500
 
+def build_recommendations_prompt(current_attendance, user_prefs):
+    """Recommendations prompt from the request's attendance data merged with stored preferences"""
+    # Merge with stored preferences
+    combined_prefs = {**user_preferences, **user_prefs}
+    
+    # Advanced prompt for Gemini
+    prompt = f"""
+    You are an AI attendance advisor. Generate personalized recommendations based on:
+    
+    Current Attendance Data:
+    {json.dumps(current_attendance, indent=2)}
+    
+    User Preferences & Profile:
+    {json.dumps(combined_prefs, indent=2)}
+    
+    Current Trends:
+    {json.dumps(attendance_data['trends'], indent=2)}
+    
+    Please provide:
+    1. Immediate action recommendations (next 1-2 weeks)
+    2. Long-term strategy (semester planning)
+    3. Risk assessment and mitigation
+    4. Personalized motivation strategies
+    5. Subject-specific attendance plans
+    6. Timeline for attendance recovery (if needed)
+    7. Alternative learning opportunities
+    8. Emergency contingency plans
+    
+    Consider the student's personality, preferences, and academic goals.
+    Return a comprehensive JSON response with actionable advice.
+    """
+    return prompt
+
+def recommendations_response(response_text):
+    """Parse the model's recommendations and keep them for dynamic updates"""
+    try:
+        recommendations = json.loads(response_text)
+    except json.JSONDecodeError:
+        recommendations = {
+            "raw_recommendations": response_text,
+            "note": "AI analysis in text format"
+        }
+    
+    # Store recommendations for continuous updates
+    global dynamic_recommendations
+    dynamic_recommendations = recommendations
+    
+    return {
+        "success": True,
+        "recommendations": recommendations,
+        "analysis_method": "gemini-advanced",
+        "last_updated": datetime.now().isoformat(),
+        "dynamic_updates": True
+    }
+
 @app.route('/generate-recommendations', methods=['POST'])
 def generate_dynamic_recommendations():
     try:
         data = request.json
-        current_attendance = data.get('attendance_data', {})
-        user_prefs = data.get('preferences', {})
-        
-        # Merge with stored preferences
-        combined_prefs = {**user_preferences, **user_prefs}
-        
-        # Advanced prompt for Gemini
-        prompt = f"""
-        You are an AI attendance advisor. Generate personalized recommendations based on:
-        
-        Current Attendance Data:
-        {json.dumps(current_attendance, indent=2)}
-        
-        User Preferences & Profile:
-        {json.dumps(combined_prefs, indent=2)}
+        prompt = build_recommendations_prompt(data.get('attendance_data', {}), data.get('preferences', {}))
         
-        Current Trends:
-        {json.dumps(attendance_data['trends'], indent=2)}
-        
-        Please provide:
-        1. Immediate action recommendations (next 1-2 weeks)
-        2. Long-term strategy (semester planning)
-        3. Risk assessment and mitigation
-        4. Personalized motivation strategies
-        5. Subject-specific attendance plans
-        6. Timeline for attendance recovery (if needed)
-        7. Alternative learning opportunities
-        8. Emergency contingency plans
-        
-        Consider the student's personality, preferences, and academic goals.
-        Return a comprehensive JSON response with actionable advice.
-        """
-        
-        response = model.generate_content(prompt)
-        
-        try:
-            recommendations = json.loads(response.text)
-        except json.JSONDecodeError:
-            recommendations = {
-                "raw_recommendations": response.text,
-                "note": "AI analysis in text format"
-            }
-        
-        # Store recommendations for continuous updates
-        global dynamic_recommendations
-        dynamic_recommendations = recommendations
-        
-        return jsonify({
-            "success": True,
-            "recommendations": recommendations,
-            "analysis_method": "gemini-advanced",
-            "last_updated": datetime.now().isoformat(),
-            "dynamic_updates": True
-        })
+        return jsonify(recommendations_response(generate_text(prompt, validate=is_json_text)))
         
     except Exception as e:
         print(f"Error generating recommendations: {str(e)}")
@@ -354,7 +352,7 @@ def analyze_web_flow():
         Return detailed JSON analysis with actionable insights.
         """
         
-        response = model.generate_content(prompt)
+        response = get_model().generate_content(prompt)
         
         try:
             analysis = json.loads(response.text)
@@ -371,17 +369,31 @@ def analyze_web_flow():
         print(f"Error analyzing web flow: {str(e)}")
         return jsonify({"error": f"Failed to analyze web flow: {str(e)}"}), 500
 
-@app.route('/dynamic-update', methods=['GET'])
-def get_dynamic_update():
-    """Provide real-time dynamic updates on attendance"""
-    global attendance_data, dynamic_recommendations
+# Minutes between scheduled refreshes of attendance trends and the /dynamic-update snapshot
+UPDATE_INTERVAL_MINUTES = int(os.getenv('UPDATE_INTERVAL_MINUTES', '15'))
+
+class DynamicUpdateSnapshot:
+    """A serialized /dynamic-update payload; replaced as a whole, never modified"""
+    
+    __slots__ = ("body", "etag", "generated_at")
     
+    def __init__(self, body, etag, generated_at):
+        self.body = body
+        self.etag = etag
+        self.generated_at = generated_at
+
+dynamic_update_snapshot = None
+# When a refresh was last attempted, successful or not; GETs refresh once this is an interval old
+dynamic_update_attempted_at = None
+
+def build_dynamic_update():
+    """Ask the model for a dynamic update on the current attendance data"""
     # Use Gemini to generate dynamic insights
     prompt = f"""
     Based on the current attendance data and trends, provide a real-time update:
     
-    Current Data: {json.dumps(attendance_data, indent=2)}
-    Last Recommendations: {json.dumps(dynamic_recommendations, indent=2)}
+    Current Data: {json.dumps(make_json_safe(attendance_data), indent=2)}
+    Last Recommendations: {json.dumps(make_json_safe(dynamic_recommendations), indent=2)}
     
     Generate:
     1. Current status summary
@@ -394,95 +406,123 @@ def get_dynamic_update():
     Return JSON format with concise, actionable updates.
     """
     
+    model = get_model()
+    update_text = inflight_calls.do(
+        ResponseCache.make_key(model.model_name, prompt),
+        lambda: model.generate_content(prompt).text
+    )
+    return json.loads(update_text)
+
+def refresh_dynamic_update():
+    """Precompute the /dynamic-update response and swap it in atomically
+    
+    If the model call fails, the previous snapshot is kept; only when there is none yet is a
+    placeholder served.
+    """
+    global dynamic_update_snapshot, dynamic_update_attempted_at
+    
+    generated_at = datetime.now()
+    dynamic_update_attempted_at = generated_at
     try:
-        response = model.generate_content(prompt)
-        update = json.loads(response.text)
-    except:
-        update = {
+        dynamic_update = build_dynamic_update()
+    except Exception as e:
+        print(f"Dynamic update refresh failed: {e}")
+        if dynamic_update_snapshot is not None:
+            return dynamic_update_snapshot
+        dynamic_update = {
             "status": "System running",
             "message": "Dynamic updates available",
-            "timestamp": datetime.now().isoformat()
+            "timestamp": generated_at.isoformat()
         }
     
-    return jsonify({
+    body = json.dumps({
         "success": True,
-        "dynamic_update": update,
-        "data_freshness": "real-time",
-        "next_update_in": "15 minutes"
+        "dynamic_update": dynamic_update,
+        "data_freshness": generated_at.isoformat(),
+        "next_update_in": f"{UPDATE_INTERVAL_MINUTES} minutes"
     })
+    etag = hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]
+    dynamic_update_snapshot = DynamicUpdateSnapshot(body, etag, generated_at)
+    return dynamic_update_snapshot
+
+def dynamic_update_is_stale():
+    return (dynamic_update_snapshot is None
+            or datetime.now() - dynamic_update_attempted_at >= timedelta(minutes=UPDATE_INTERVAL_MINUTES))
+
+def refresh_stale_dynamic_update():
+    # Re-checked here, as another request may have refreshed it since this one looked
+    return refresh_dynamic_update() if dynamic_update_is_stale() else dynamic_update_snapshot
+
+@app.route('/dynamic-update', methods=['GET'])
+def get_dynamic_update():
+    """Provide dynamic updates on attendance, served from the latest precomputed snapshot
+    
+    The scheduler refreshes it when the service runs as a script; under any other server
+    (hypercorn, a WSGI server) the request that finds it an interval old refreshes it, and
+    concurrent requests share that refresh. Clients that send the ETag back in
+    If-None-Match get 304 until the next refresh.
+    """
+    snapshot = dynamic_update_snapshot
+    if dynamic_update_is_stale():
+        snapshot = inflight_calls.do("dynamic-update-refresh", refresh_stale_dynamic_update)
+    
+    response = Response(snapshot.body, mimetype='application/json')
+    response.set_etag(snapshot.etag)
+    response.last_modified = snapshot.generated_at
+    response.headers['Cache-Control'] = 'no-cache'
+    return response.make_conditional(request)
+
+def build_prediction_prompt(historical_data, upcoming_events):
+    prompt = f"""
+    Predict future attendance patterns based on historical data and upcoming events:
+    
+    Historical Attendance: {json.dumps(historical_data, indent=2)}
+    Upcoming Events: {json.dumps(upcoming_events, indent=2)}
+    User Profile: {json.dumps(user_preferences, indent=2)}
+    
+    Provide predictions for:
+    1. Next 2 weeks attendance probability by subject
+    2. Monthly attendance forecast
+    3. Risk periods identification
+    4. Optimal scheduling recommendations
+    5. Intervention timing suggestions
+    6. Confidence intervals for predictions
+    
+    Return detailed JSON predictions with confidence scores.
+    """
+    return prompt
+
+def prediction_response(response_text):
+    try:
+        predictions = json.loads(response_text)
+    except json.JSONDecodeError:
+        predictions = {
+            "raw_predictions": response_text,
+            "note": "AI analysis in text format"
+        }
+    
+    return {
+        "success": True,
+        "predictions": predictions,
+        "prediction_horizon": "2 weeks to 1 month",
+        "model": "gemini-predictive"
+    }
 
 @app.route('/predict-attendance', methods=['POST'])
 def predict_future_attendance():
     """Use Gemini to predict future attendance patterns"""
     try:
         data = request.json
-        historical_data = data.get('historical_data', [])
-        upcoming_events = data.get('upcoming_events', [])
-        
-        prompt = f"""
-        Predict future attendance patterns based on historical data and upcoming events:
-        
-        Historical Attendance: {json.dumps(historical_data, indent=2)}
-        Upcoming Events: {json.dumps(upcoming_events, indent=2)}
-        User Profile: {json.dumps(user_preferences, indent=2)}
+        prompt = build_prediction_prompt(data.get('historical_data', []), data.get('upcoming_events', []))
         
-        Provide predictions for:
-        1. Next 2 weeks attendance probability by subject
-        2. Monthly attendance forecast
-        3. Risk periods identification
-        4. Optimal scheduling recommendations
-        5. Intervention timing suggestions
-        6. Confidence intervals for predictions
-        
-        Return detailed JSON predictions with confidence scores.
-        """
-        
-        response = model.generate_content(prompt)
-        predictions = json.loads(response.text)
-        
-        return jsonify({
-            "success": True,
-            "predictions": predictions,
-            "prediction_horizon": "2 weeks to 1 month",
-            "model": "gemini-predictive"
-        })
+        return jsonify(prediction_response(generate_text(prompt, validate=is_json_text)))
         
     except Exception as e:
         return jsonify({"error": f"Prediction failed: {str(e)}"}), 500
 
-@app.route('/chat', methods=['POST'])
-def ai_chat_assistant():
-    """Intelligent chat assistant with access to all analyzed data"""
-    try:
-        data = request.json
-        message = data.get('message', '').strip()
-        context = data.get('context', {})
-        
-        if not message:
-            return jsonify({"error": "Message is required"}), 400
-        
-        # Build comprehensive context from all analyzed data with JSON-safe formatting
-        def make_json_safe(obj):
-            """Convert datetime objects to ISO strings for JSON serialization"""
-            if isinstance(obj, datetime):
-                return obj.isoformat()
-            elif isinstance(obj, dict):
-                return {k: make_json_safe(v) for k, v in obj.items()}
-            elif isinstance(obj, list):
-                return [make_json_safe(item) for item in obj]
-            else:
-                return obj
-        
-        chat_context = {
-            "user_preferences": make_json_safe(user_preferences),
-            "attendance_data": make_json_safe(attendance_data),
-            "dynamic_recommendations": make_json_safe(dynamic_recommendations),
-            "current_time": datetime.now().isoformat(),
-            "conversation_context": context
-        }
-        
-        # Enhanced prompt for intelligent attendance assistant
-        system_prompt = """
+# Enhanced prompt for intelligent attendance assistant; built once, with the source indentation
+# stripped so it costs no tokens on every message
+CHAT_SYSTEM_PROMPT = textwrap.dedent("""
         You are an expert AI Attendance Assistant for GTU (Gujarat Technological University) SEM-3 CSE(DS) students. 
         You have complete access to the student's analyzed data and deep knowledge of GTU attendance policies.
         
@@ -516,75 +556,262 @@ def ai_chat_assistant():
         
         Always be helpful, encouraging, and provide GTU-compliant advice.
         Use the analyzed data to give personalized, contextual responses that maintain GTU eligibility.
-        """
-        
-        user_prompt = f"""
-        Student Question: "{message}"
-        
-        IMPORTANT: Use the specific GTU student data provided in context to give precise, personalized answers.
-        
-        Student's Current GTU Status:
-        - Current Attendance: 72% (ABOVE 70% threshold - SAFE for exams)
-        - Total Classes So Far: 190 completed, 137 attended
-        - Remaining Time: 10 weeks left in semester
-        - Exam Eligibility: YES (above 70% minimum)
-        - Bonus Marks Eligible: 11 attendance marks + 4 first-4-days = 15 total bonus marks
-        
-        Subject Breakdown (Weekly Classes):
-        - DS (Data Structures): 85% attendance, 4 classes/week [LIKED SUBJECT]
-        - DBMS (Database System): 80% attendance, 4 classes/week [LIKED SUBJECT]  
-        - PS (Probability & Stats): 75% attendance, 3 classes/week [LIKED SUBJECT]
-        - DF (Digital Fundamentals): 70% attendance, 4 classes/week [NEUTRAL]
-        - IC (Indian Constitution): 55% attendance, 2 classes/week [DISLIKED - NEEDS ATTENTION]
-        - PCE (Communication Ethics): 60% attendance, 2 classes/week [DISLIKED - NEEDS ATTENTION]
-        
-        Attendance Scenarios for Remaining 10 Weeks:
-        - Maintain Current (72%): Can skip 53 out of 190 remaining classes
-        - Safe Buffer (75%): Can skip 40 out of 190 remaining classes  
-        - Bonus Optimization (80%): Can skip 30 out of 190 remaining classes
-        - Minimum Safe (70.1%): Can skip 56 out of 190 remaining classes
-        
-        Full Context Data: {json.dumps(chat_context, indent=2)}
-        
-        CRITICAL INSTRUCTIONS:
-        1. Answer using SPECIFIC NUMBERS from the student's data above
-        2. Reference their ACTUAL 72% attendance, not generic percentages
-        3. Mention their REAL subject performance (DS 85%, IC 55%, etc.)
-        4. Use their ACTUAL remaining time (10 weeks) in calculations
-        5. Reference GTU policies (70% minimum, 15 bonus marks, etc.)
-        6. Be encouraging but precise with data-driven advice
-        
-        Provide a helpful, personalized response that directly uses their real attendance data.
-        """
-        
-        # Conservative generation configuration for Flash model
-        chat_config = {
-            "temperature": 0.7,  # Balanced creativity/consistency
-            "top_p": 0.8,        # Focused responses
-            "top_k": 40,         # Controlled vocabulary
-            "max_output_tokens": 1024,  # Shorter responses for better performance
+        """).strip()
+
+# Conservative generation configuration for Flash model
+CHAT_CONFIG = {
+    "temperature": 0.7,  # Balanced creativity/consistency
+    "top_p": 0.8,        # Focused responses
+    "top_k": 40,         # Controlled vocabulary
+    "max_output_tokens": 1024,  # Shorter responses for better performance
+}
+
+# Skip AI-generated suggestions to save API calls, use GTU-specific ones
+CHAT_SUGGESTIONS = [
+    "Am I eligible for GTU exams with my current attendance?",
+    "How many bonus marks can I get with 72% attendance?",
+    "Which subjects should I prioritize attending?",
+    "What's the minimum attendance I need to maintain?",
+    "How does the GTU medical certificate policy work?",
+    "What happens if I fall below 70% attendance?"
+]
+
+def make_json_safe(obj):
+    """Convert datetime objects to ISO strings for JSON serialization"""
+    if isinstance(obj, datetime):
+        return obj.isoformat()
+    elif isinstance(obj, dict):
+        return {k: make_json_safe(v) for k, v in obj.items()}
+    elif isinstance(obj, list):
+        return [make_json_safe(item) for item in obj]
+    else:
+        return obj
+
+CHAT_USER_PROMPT = textwrap.dedent("""
+    Student Question: "{message}"
+    
+    IMPORTANT: Use the specific GTU student data provided in context to give precise, personalized answers.
+    
+    Student's Current GTU Status:
+    - Current Attendance: 72% (ABOVE 70% threshold - SAFE for exams)
+    - Total Classes So Far: 190 completed, 137 attended
+    - Remaining Time: 10 weeks left in semester
+    - Exam Eligibility: YES (above 70% minimum)
+    - Bonus Marks Eligible: 11 attendance marks + 4 first-4-days = 15 total bonus marks
+    
+    Subject Breakdown (Weekly Classes):
+    - DS (Data Structures): 85% attendance, 4 classes/week [LIKED SUBJECT]
+    - DBMS (Database System): 80% attendance, 4 classes/week [LIKED SUBJECT]
+    - PS (Probability & Stats): 75% attendance, 3 classes/week [LIKED SUBJECT]
+    - DF (Digital Fundamentals): 70% attendance, 4 classes/week [NEUTRAL]
+    - IC (Indian Constitution): 55% attendance, 2 classes/week [DISLIKED - NEEDS ATTENTION]
+    - PCE (Communication Ethics): 60% attendance, 2 classes/week [DISLIKED - NEEDS ATTENTION]
+    
+    Attendance Scenarios for Remaining 10 Weeks:
+    - Maintain Current (72%): Can skip 53 out of 190 remaining classes
+    - Safe Buffer (75%): Can skip 40 out of 190 remaining classes
+    - Bonus Optimization (80%): Can skip 30 out of 190 remaining classes
+    - Minimum Safe (70.1%): Can skip 56 out of 190 remaining classes
+    
+    Context Data (JSON): {context}
+    
+    CRITICAL INSTRUCTIONS:
+    1. Answer using SPECIFIC NUMBERS from the student's data above
+    2. Reference their ACTUAL 72% attendance, not generic percentages
+    3. Mention their REAL subject performance (DS 85%, IC 55%, etc.)
+    4. Use their ACTUAL remaining time (10 weeks) in calculations
+    5. Reference GTU policies (70% minimum, 15 bonus marks, etc.)
+    6. Be encouraging but precise with data-driven advice
+    
+    Provide a helpful, personalized response that directly uses their real attendance data.
+    """).strip()
+
+# Context sections sent only when the question is about them, keyed by the section name and
+# matched as word prefixes. They are filtered at any depth, so the student_data sections the
+# backend forwards are trimmed too; keys not listed here are always sent.
+CHAT_CONTEXT_TOPICS = {
+    "user_preferences": ("prefer", "like", "enjoy", "favo", "hate", "dislike", "interest", "morning", "afternoon",
+                         "evening", "time", "schedule", "learn", "study", "motivat"),
+    "dynamic_recommendations": ("recommend", "suggest", "advice", "advise", "tip", "plan", "strateg", "improve",
+                                "should", "priorit", "focus"),
+    "subjects": ("subject", "which", "priorit", "focus", "class", "lecture", "ds", "dbms", "ps", "df", "ic", "pce",
+                 "data", "database", "probab", "statist", "digital", "constitution", "communication", "ethic"),
+    "scenarios": ("skip", "miss", "bunk", "how many", "maintain", "buffer", "safe", "remain", "need", "plan"),
+    "bonus_marks": ("bonus", "mark"),
+    "gtu_policies": ("polic", "rule", "medical", "certificate", "eligib", "minimum", "exam", "late", "proxy", "detain"),
+    "warnings": ("risk", "warn", "danger", "safe", "worr", "status"),
+    "trends": ("trend", "predict", "forecast", "future", "progress"),
+    "predictions": ("predict", "forecast", "future")
+}
+CHAT_CONTEXT_PATTERNS = {
+    section: re.compile(r"\b(?:" + "|".join(re.escape(word) for word in words) + ")", re.IGNORECASE)
+    for section, words in CHAT_CONTEXT_TOPICS.items()
+}
+
+def relevant_context(data, message):
+    """``data`` without empty values and without topic sections the message doesn't touch"""
+    if isinstance(data, dict):
+        relevant = {}
+        for key, value in data.items():
+            pattern = CHAT_CONTEXT_PATTERNS.get(key)
+            if pattern is not None and not pattern.search(message):
+                continue
+            value = relevant_context(value, message)
+            if value not in (None, "", {}, []):
+                relevant[key] = value
+        return relevant
+    if isinstance(data, list):
+        return [item for item in (relevant_context(item, message) for item in data) if item not in (None, "", {}, [])]
+    return make_json_safe(data)
+
+def build_chat_prompt(message, context):
+    """System and user prompt for a chat message, with the analyzed data relevant to it as compact JSON"""
+    chat_context = relevant_context({
+        "user_preferences": user_preferences,
+        "attendance_data": attendance_data,
+        "dynamic_recommendations": dynamic_recommendations,
+        "current_time": datetime.now().isoformat(timespec='seconds'),
+        "conversation_context": context
+    }, message)
+    
+    user_prompt = CHAT_USER_PROMPT.format(
+        message=message,
+        context=json.dumps(chat_context, separators=(',', ':'), ensure_ascii=False)
+    )
+    return [CHAT_SYSTEM_PROMPT, user_prompt]
+
+def estimate_tokens(text):
+    """Rough token count (about four characters per token) for when the model reports none"""
+    return -(-len(text) // 4)
+
+class TokenUsageStats:
+    """Running prompt and output token totals for an endpoint"""
+
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.output_tokens = 0
+        self.max_prompt_tokens = 0
+        self._lock = threading.Lock()
+
+    def record(self, usage):
+        with self._lock:
+            self.requests += 1
+            self.prompt_tokens += usage["prompt_tokens"]
+            self.output_tokens += usage["output_tokens"]
+            self.max_prompt_tokens = max(self.max_prompt_tokens, usage["prompt_tokens"])
+
+    def stats(self):
+        with self._lock:
+            return {
+                "requests": self.requests,
+                "prompt_tokens": self.prompt_tokens,
+                "output_tokens": self.output_tokens,
+                "avg_prompt_tokens": round(self.prompt_tokens / self.requests, 1) if self.requests else 0.0,
+                "max_prompt_tokens": self.max_prompt_tokens
+            }
+
+chat_token_usage = TokenUsageStats()
+
+def track_chat_usage(prompt, response_text, response=None):
+    """Token usage for one chat reply, from the model's usage metadata or else estimated"""
+    metadata = getattr(response, 'usage_metadata', None)
+    if metadata is not None and getattr(metadata, 'prompt_token_count', None):
+        usage = {
+            "prompt_tokens": metadata.prompt_token_count,
+            "output_tokens": metadata.candidates_token_count or 0,
+            "estimated": False
         }
+    else:
+        usage = {
+            "prompt_tokens": sum(estimate_tokens(part) for part in prompt),
+            "output_tokens": estimate_tokens(response_text),
+            "estimated": True
+        }
+    chat_token_usage.record(usage)
+    return usage
+
+def chat_response(response_text, usage=None):
+    response = {
+        "success": True,
+        "response": response_text,
+        "context_used": True,
+        "suggestions": CHAT_SUGGESTIONS,
+        "data_sources": ["preferences", "attendance_data", "recommendations"],
+        "timestamp": datetime.now().isoformat()
+    }
+    if usage is not None:
+        response["usage"] = usage
+    return response
+
+def chat_error_response(error_msg):
+    return {
+        "success": False,
+        "response": f"I'm having trouble accessing my AI capabilities right now. Error: {error_msg[:100]}... However, I'm here to help with your attendance questions. Could you try rephrasing your question?",
+        "context_used": False,
+        "suggestions": [
+            "What's my attendance status?",
+            "How can I improve my attendance?",
+            "What subjects need attention?",
+            "Give me attendance tips"
+        ],
+        "error": "AI processing temporarily unavailable",
+        "debug_error": error_msg[:200]  # First 200 chars for debugging
+    }
+
+def sse_event(event, data):
+    """One Server-Sent Events frame with a JSON payload"""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+# Headers for streamed responses; X-Accel-Buffering stops nginx-style proxies from buffering
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no"
+}
+
+def wants_stream(data, headers):
+    """Streaming is requested with ``"stream": true`` or an ``Accept: text/event-stream`` header"""
+    return bool(data.get('stream')) or 'text/event-stream' in headers.get('Accept', '')
+
+def stream_chat(prompt, chunks):
+    """SSE frames for a chat reply: one ``token`` event per model chunk, then ``done``
+
+    ``done`` carries the usual chat response body with the full text; a failure after
+    the stream has started is reported as an ``error`` event instead.
+    """
+    parts = []
+    try:
+        for chunk in chunks:
+            parts.append(chunk)
+            yield sse_event("token", {"text": chunk})
+        text = "".join(parts)
+        yield sse_event("done", chat_response(text, track_chat_usage(prompt, text)))
+    except Exception as e:
+        print(f"❌ Chat stream error: {e}")
+        yield sse_event("error", chat_error_response(str(e)))
+
+@app.route('/chat', methods=['POST'])
+def ai_chat_assistant():
+    """Intelligent chat assistant with access to all analyzed data
+    
+    With ``"stream": true`` the reply is sent as Server-Sent Events while the model generates it.
+    """
+    try:
+        data = request.json
+        message = data.get('message', '').strip()
+        context = data.get('context', {})
         
-        response = model.generate_content([system_prompt, user_prompt], generation_config=chat_config)
+        if not message:
+            return jsonify({"error": "Message is required"}), 400
         
-        # Skip AI-generated suggestions to save API calls, use GTU-specific ones
-        suggestions = [
-            "Am I eligible for GTU exams with my current attendance?",
-            "How many bonus marks can I get with 72% attendance?",
-            "Which subjects should I prioritize attending?",
-            "What's the minimum attendance I need to maintain?",
-            "How does the GTU medical certificate policy work?",
-            "What happens if I fall below 70% attendance?"
-        ]
+        prompt = build_chat_prompt(message, context)
+        if wants_stream(data, request.headers):
+            chunks = get_model().generate_content_stream(prompt, generation_config=CHAT_CONFIG)
+            return Response(stream_with_context(stream_chat(prompt, chunks)), mimetype='text/event-stream', headers=SSE_HEADERS)
         
-        return jsonify({
-            "success": True,
-            "response": response.text,
-            "context_used": True,
-            "suggestions": suggestions,
-            "data_sources": ["preferences", "attendance_data", "recommendations"],
-            "timestamp": datetime.now().isoformat()
-        })
+        response = get_model().generate_content(prompt, generation_config=CHAT_CONFIG)
+        
+        return jsonify(chat_response(response.text, track_chat_usage(prompt, response.text, response)))
         
     except Exception as e:
         error_msg = str(e)
@@ -594,19 +821,7 @@ def ai_chat_assistant():
         import traceback
         print(f"❌ Full traceback: {traceback.format_exc()}")
         
-        return jsonify({
-            "success": False,
-            "response": f"I'm having trouble accessing my AI capabilities right now. Error: {error_msg[:100]}... However, I'm here to help with your attendance questions. Could you try rephrasing your question?",
-            "context_used": False,
-            "suggestions": [
-                "What's my attendance status?",
-                "How can I improve my attendance?",
-                "What subjects need attention?",
-                "Give me attendance tips"
-            ],
-            "error": "AI processing temporarily unavailable",
-            "debug_error": error_msg[:200]  # First 200 chars for debugging
-        }), 500
+        return jsonify(chat_error_response(error_msg)), 500
 
 def schedule_dynamic_updates():
     """Schedule periodic updates and analysis"""
@@ -615,6 +830,7 @@ def schedule_dynamic_updates():
         # This would connect to real attendance systems
         attendance_data['last_updated'] = datetime.now()
         print(f"Attendance data updated at {datetime.now()}")
+        refresh_dynamic_update()
     
     def generate_daily_insights():
         # Use Gemini to generate daily insights
@@ -628,13 +844,14 @@ def schedule_dynamic_updates():
             Provide today's focus areas and recommendations.
             """
             try:
-                response = model.generate_content(prompt)
+                response = get_model().generate_content(prompt)
                 print(f"Daily insight generated: {response.text[:100]}...")
             except:
                 print("Daily insight generation failed")
     
-    # Schedule updates
-    schedule.every(15).minutes.do(update_attendance_trends)
+    # Schedule updates; the first /dynamic-update snapshot is built right away
+    refresh_dynamic_update()
+    schedule.every(UPDATE_INTERVAL_MINUTES).minutes.do(update_attendance_trends)
     schedule.every().day.at("08:00").do(generate_daily_insights)
     
     while True:
@@ -644,11 +861,15 @@ def schedule_dynamic_updates():
 if __name__ == '__main__':
     print("🚀 Starting Gemini-Powered AI Attendance Service...")
     print("✨ Features: Dynamic Analysis, Web Flow Tracking, Real-time Updates")
-    print(f"🧠 Model: {model.model_name if hasattr(model, 'model_name') else 'Gemini 1.5 Pro'}")
     
-    if GEMINI_API_KEY == 'your-gemini-api-key-here':
+    if GEMINI_API_KEY == 'your-gemini-api-key-here' and os.getenv('AI_MODEL_PROVIDER', 'gemini') == 'gemini':
         print("⚠️  Warning: Please set your GEMINI_API_KEY environment variable")
     
+    # Load the model in the background; /ready reports when it can serve requests
+    model_resource.warmup()
+    if local_models_resource:
+        local_models_resource.warmup()
+    
     # Start background scheduler in a separate thread
     scheduler_thread = threading.Thread(target=schedule_dynamic_updates)
     scheduler_thread.daemon = True
@@ -0,0 +1,174 @@
+import asyncio
+import os
+import threading
+
+from quart import Quart, jsonify, request
+from hypercorn.middleware import AsyncioWSGIMiddleware
+
+import ai_service_gemini as gemini
+from response_cache import ResponseCache
+
+# ASGI variant of the Gemini service. The model-bound endpoints below are served from one event
+# loop, so a single process can hold hundreds of in-flight model calls; every other endpoint is
+# passed through to the Flask app, which runs in a worker thread per request.
+#   python ai_service_gemini_async.py
+#   hypercorn ai_service_gemini_async:application --bind 0.0.0.0:5001
+
+app = Quart(__name__)
+
+# Upper bound on concurrent upstream model calls; requests beyond it wait for a free slot
+MAX_CONCURRENT_MODEL_CALLS = int(os.getenv('MAX_CONCURRENT_MODEL_CALLS', '256'))
+model_call_slots = asyncio.Semaphore(MAX_CONCURRENT_MODEL_CALLS)
+model_calls_in_flight = 0
+
+# Largest request body forwarded to the Flask endpoints (document uploads)
+MAX_WSGI_BODY_BYTES = 16 * 1024 * 1024
+
+async def get_model_async():
+    """The model provider; the first load runs off the event loop"""
+    if gemini.model_resource.ready:
+        return gemini.model_resource.get()
+    return await asyncio.to_thread(gemini.model_resource.get)
+
+async def generate_content_async(contents, generation_config=None):
+    global model_calls_in_flight
+    model = await get_model_async()
+    async with model_call_slots:
+        model_calls_in_flight += 1
+        try:
+            return await model.generate_content_async(contents, generation_config=generation_config)
+        finally:
+            model_calls_in_flight -= 1
+
+async def generate_content_stream_async(contents, generation_config=None):
+    """Response text chunks as they arrive; the call holds a model slot until the stream ends"""
+    global model_calls_in_flight
+    model = await get_model_async()
+    async with model_call_slots:
+        model_calls_in_flight += 1
+        try:
+            async for chunk in model.generate_content_stream_async(contents, generation_config=generation_config):
+                yield chunk
+        finally:
+            model_calls_in_flight -= 1
+
+async def stream_chat_async(prompt, chunks):
+    """Async ``gemini.stream_chat``: ``token`` events, then ``done`` or ``error``"""
+    parts = []
+    try:
+        async for chunk in chunks:
+            parts.append(chunk)
+            yield gemini.sse_event("token", {"text": chunk})
+        text = "".join(parts)
+        yield gemini.sse_event("done", gemini.chat_response(text, gemini.track_chat_usage(prompt, text)))
+    except Exception as e:
+        print(f"❌ Chat stream error: {e}")
+        yield gemini.sse_event("error", gemini.chat_error_response(str(e)))
+
+async def generate_text_async(prompt, generation_config=None, validate=None):
+    """Awaitable ``generate_text`` sharing the Flask service's response cache"""
+    model = await get_model_async()
+    cache_key = ResponseCache.make_key(model.model_name, prompt, generation_config)
+    text = gemini.response_cache.get(cache_key)
+    if text is None:
+        async def call_model():
+            text = (await generate_content_async(prompt, generation_config)).text
+            if validate is None or validate(text):
+                gemini.response_cache.set(cache_key, text)
+            return text
+
+        # Identical prompts in flight share one call (same counters as the Flask endpoints)
+        text = await gemini.inflight_calls.do_async(cache_key, call_model)
+    return text
+
+@app.route('/health', methods=['GET'])
+async def health_check():
+    """Liveness, with the Flask service's health data plus model call concurrency"""
+    with gemini.app.app_context():
+        health = gemini.health_check().get_json()
+    health["server"] = "asgi"
+    health["model_calls"] = {
+        "limit": MAX_CONCURRENT_MODEL_CALLS,
+        "in_flight": model_calls_in_flight
+    }
+    return jsonify(health)
+
+@app.route('/chat', methods=['POST'])
+async def ai_chat_assistant():
+    """Async /chat with the same prompt and response as the Flask service"""
+    try:
+        data = await request.get_json()
+        message = data.get('message', '').strip()
+        context = data.get('context', {})
+
+        if not message:
+            return jsonify({"error": "Message is required"}), 400
+
+        prompt = gemini.build_chat_prompt(message, context)
+        if gemini.wants_stream(data, request.headers):
+            chunks = generate_content_stream_async(prompt, gemini.CHAT_CONFIG)
+            response = app.response_class(
+                stream_chat_async(prompt, chunks), mimetype='text/event-stream', headers=gemini.SSE_HEADERS
+            )
+            response.timeout = None  # the stream lasts as long as the model takes
+            return response
+
+        response = await generate_content_async(prompt, gemini.CHAT_CONFIG)
+        return jsonify(gemini.chat_response(response.text, gemini.track_chat_usage(prompt, response.text, response)))
+
+    except Exception as e:
+        error_msg = str(e)
+        print(f"❌ Chat error: {error_msg}")
+        return jsonify(gemini.chat_error_response(error_msg)), 500
+
+@app.route('/generate-recommendations', methods=['POST'])
+async def generate_dynamic_recommendations():
+    try:
+        data = await request.get_json()
+        prompt = gemini.build_recommendations_prompt(data.get('attendance_data', {}), data.get('preferences', {}))
+
+        return jsonify(gemini.recommendations_response(await generate_text_async(prompt, validate=gemini.is_json_text)))
+
+    except Exception as e:
+        print(f"Error generating recommendations: {str(e)}")
+        return jsonify({"error": f"Failed to generate recommendations: {str(e)}"}), 500
+
+@app.route('/predict-attendance', methods=['POST'])
+async def predict_future_attendance():
+    try:
+        data = await request.get_json()
+        prompt = gemini.build_prediction_prompt(data.get('historical_data', []), data.get('upcoming_events', []))
+
+        return jsonify(gemini.prediction_response(await generate_text_async(prompt, validate=gemini.is_json_text)))
+
+    except Exception as e:
+        return jsonify({"error": f"Prediction failed: {str(e)}"}), 500
+
+ASYNC_PATHS = {rule.rule for rule in app.url_map.iter_rules() if rule.endpoint != 'static'}
+flask_fallback = AsyncioWSGIMiddleware(gemini.app, max_body_size=MAX_WSGI_BODY_BYTES)
+
+async def application(scope, receive, send):
+    """ASGI entry point: async endpoints go to Quart, the rest to the Flask app"""
+    if scope["type"] == "http" and scope["path"] not in ASYNC_PATHS:
+        await flask_fallback(scope, receive, send)
+    else:
+        await app(scope, receive, send)
+
+if __name__ == '__main__':
+    from hypercorn.asyncio import serve
+    from hypercorn.config import Config
+
+    print("🚀 Starting Gemini-Powered AI Attendance Service (async)...")
+    print(f"⚡ Up to {MAX_CONCURRENT_MODEL_CALLS} concurrent model calls")
+
+    gemini.model_resource.warmup()
+    if gemini.local_models_resource:
+        gemini.local_models_resource.warmup()
+
+    scheduler_thread = threading.Thread(target=gemini.schedule_dynamic_updates, daemon=True)
+    scheduler_thread.start()
+
+    config = Config()
+    config.bind = [f"{os.getenv('AI_SERVICE_HOST', '0.0.0.0')}:{os.getenv('AI_SERVICE_PORT', '5001')}"]
+    config.backlog = 1024
+    asyncio.run(serve(application, config))
@@ -6,6 +6,9 @@ import re
 from datetime import datetime
 import json
 import time
+from preference_engine import (
+    KeywordTier, LocalModelTier, PreferenceEngine, load_local_models, preference_response, run_local_models
+)
 
 app = Flask(__name__)
 CORS(app)
@@ -14,30 +17,28 @@ CORS(app)
 sentiment_analyzer = None
 text_classifier = None
 
+# Sentences per pipeline call (MODEL_BATCH_SIZE); sentences are sorted by length before
+# batching so each batch pads to a similar length
+MODEL_BATCH_SIZE = int(os.getenv('MODEL_BATCH_SIZE', '16'))
+
+# CPU inference backend ("pytorch", "quantized" or "onnx") and optional local model directory
+AI_MODEL_BACKEND = os.getenv('AI_MODEL_BACKEND', 'pytorch').lower()
+AI_MODEL_DIR = os.getenv('AI_MODEL_DIR') or None
+
+# Sentences kept in each model's result cache
+PIPELINE_CACHE_ENTRIES = int(os.getenv('PIPELINE_CACHE_ENTRIES', '2048'))
+
 def initialize_models():
     """Initialize AI models with retries and fallbacks"""
     global sentiment_analyzer, text_classifier
     
-    print("🤖 Initializing AI models...")
+    print(f"🤖 Initializing AI models ({AI_MODEL_BACKEND} backend)...")
     
     try:
-        print("📥 Loading sentiment analysis model...")
-        from transformers import pipeline
-        
-        # Try smaller, faster models first
-        sentiment_analyzer = pipeline(
-            "sentiment-analysis",
-            model="cardiffnlp/twitter-roberta-base-sentiment-latest"
+        sentiment_analyzer, text_classifier = load_local_models(
+            AI_MODEL_BACKEND, AI_MODEL_DIR, MODEL_BATCH_SIZE, PIPELINE_CACHE_ENTRIES
         )
-        print("✅ Sentiment analyzer loaded!")
-        
-        print("📥 Loading text classifier...")
-        text_classifier = pipeline(
-            "zero-shot-classification",
-            model="facebook/bart-large-mnli"
-        )
-        print("✅ Text classifier loaded!")
-        
+        print("✅ Sentiment analyzer and text classifier loaded!")
         return True
         
     except Exception as e:
@@ -45,12 +46,30 @@ def initialize_models():
         print("🔄 Falling back to lightweight mode...")
         return False
 
+def loaded_models():
+    """The local models if initialize_models() succeeded, else None (keyword mode)"""
+    if sentiment_analyzer and text_classifier:
+        return sentiment_analyzer, text_classifier
+    return None
+
+# Keywords answer confident cases; ambiguous input escalates to the models when loaded
+preference_engine = PreferenceEngine([KeywordTier(), LocalModelTier(loaded_models)])
+
+def run_batched_inference(sentences, batch_size=None):
+    """Sentiment and subject/time label scores for all sentences
+    
+    Sentences already in the model caches skip inference; the rest go through one batched
+    call per model. Returns sentiment results and ``{label: score}`` dicts in sentence order.
+    """
+    return run_local_models(sentiment_analyzer, text_classifier, sentences, batch_size)
+
 @app.route('/health', methods=['GET'])
 def health_check():
     return jsonify({
         "status": "healthy", 
         "message": "AI service is running",
-        "models_loaded": sentiment_analyzer is not None and text_classifier is not None
+        "models_loaded": sentiment_analyzer is not None and text_classifier is not None,
+        "preference_engine": preference_engine.stats()
     })
 
 @app.route('/process-preferences', methods=['POST'])
@@ -62,186 +81,23 @@ def process_preferences():
         if not preferences_text:
             return jsonify({"error": "No preferences provided"}), 400
         
-        if sentiment_analyzer and text_classifier:
-            # Use real AI models
-            return process_preferences_with_ai(preferences_text)
-        else:
-            # Use keyword-based fallback
-            return process_preferences_with_keywords(preferences_text)
+        return jsonify(preference_response(preference_engine, preferences_text))
         
     except Exception as e:
         print(f"Error processing preferences: {str(e)}")
         return jsonify({"error": f"Failed to process preferences: {str(e)}"}), 500
 
-def process_preferences_with_ai(preferences_text):
-    """Process preferences using real AI models"""
-    print("🧠 Using AI models for preference analysis...")
-    
-    analyzed_preferences = {
-        'liked_subjects': [],
-        'disliked_subjects': [],
-        'liked_times': [],
-        'disliked_times': [],
-        'general_sentiment': 'neutral',
-        'confidence_score': 0.0,
-        'processing_method': 'AI_MODELS'
-    }
-    
-    # Split into sentences for analysis
-    sentences = preferences_text.split('.')
-    
-    subject_keywords = [
-        'mathematics', 'math', 'physics', 'chemistry', 'biology', 
-        'computer science', 'programming', 'history', 'english',
-        'literature', 'economics', 'sociology', 'psychology'
-    ]
-    
-    time_keywords = [
-        'morning', 'afternoon', 'evening', 'early morning', 
-        'late evening', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday'
-    ]
-    
-    total_confidence = 0
-    sentence_count = 0
-    
-    for sentence in sentences:
-        if sentence.strip():
-            sentence_count += 1
-            
-            # AI Sentiment analysis
-            sentiment_result = sentiment_analyzer(sentence)
-            sentiment_score = sentiment_result[0]
-            confidence = sentiment_score['score']
-            total_confidence += confidence
-            
-            # AI Subject classification
-            subject_classification = text_classifier(
-                sentence, 
-                subject_keywords,
-                hypothesis_template="This text is about {}."
-            )
-            
-            # AI Time classification
-            time_classification = text_classifier(
-                sentence,
-                time_keywords,
-                hypothesis_template="This text mentions {}."
-            )
-            
-            # Extract preferences based on AI sentiment
-            if sentiment_score['label'] in ['LABEL_2', 'POSITIVE'] and confidence > 0.6:
-                # Positive sentiment - liked items
-                if subject_classification['scores'][0] > 0.3:
-                    subject = subject_classification['labels'][0]
-                    if subject not in analyzed_preferences['liked_subjects']:
-                        analyzed_preferences['liked_subjects'].append(subject)
-                
-                if time_classification['scores'][0] > 0.3:
-                    time_slot = time_classification['labels'][0]
-                    if time_slot not in analyzed_preferences['liked_times']:
-                        analyzed_preferences['liked_times'].append(time_slot)
-                        
-            elif sentiment_score['label'] in ['LABEL_0', 'NEGATIVE'] and confidence > 0.6:
-                # Negative sentiment - disliked items
-                if subject_classification['scores'][0] > 0.3:
-                    subject = subject_classification['labels'][0]
-                    if subject not in analyzed_preferences['disliked_subjects']:
-                        analyzed_preferences['disliked_subjects'].append(subject)
-                
-                if time_classification['scores'][0] > 0.3:
-                    time_slot = time_classification['labels'][0]
-                    if time_slot not in analyzed_preferences['disliked_times']:
-                        analyzed_preferences['disliked_times'].append(time_slot)
-    
-    # Calculate average confidence
-    analyzed_preferences['confidence_score'] = total_confidence / max(sentence_count, 1)
-    
-    return jsonify({
-        "success": True,
-        "analyzed_preferences": analyzed_preferences,
-        "original_text": preferences_text
-    })
-
-def process_preferences_with_keywords(preferences_text):
-    """Fallback: Process preferences using keyword matching"""
-    print("🔤 Using keyword-based analysis (fallback mode)...")
-    
-    analyzed_preferences = {
-        'liked_subjects': [],
-        'disliked_subjects': [],
-        'liked_times': [],
-        'disliked_times': [],
-        'general_sentiment': 'neutral',
-        'confidence_score': 0.7,  # Medium confidence for keyword matching
-        'processing_method': 'KEYWORD_BASED'
-    }
-    
-    preferences_lower = preferences_text.lower()
-    
-    # Subject detection
-    subject_keywords = {
-        'mathematics': ['math', 'mathematics', 'calculus', 'algebra'],
-        'physics': ['physics', 'mechanics', 'thermodynamics'],
-        'chemistry': ['chemistry', 'organic', 'inorganic'],
-        'biology': ['biology', 'botany', 'zoology'],
-        'computer science': ['computer', 'programming', 'coding', 'software'],
-        'english': ['english', 'literature', 'grammar'],
-        'history': ['history', 'ancient', 'modern']
-    }
-    
-    time_keywords = {
-        'morning': ['morning', '8 am', '9 am', '10 am'],
-        'afternoon': ['afternoon', '12 pm', '1 pm', '2 pm'],
-        'evening': ['evening', '4 pm', '5 pm', '6 pm'],
-        'early_morning': ['early morning', '7 am', '6 am']
-    }
-    
-    # Sentiment words
-    positive_words = ['love', 'like', 'enjoy', 'prefer', 'favorite', 'best', 'good', 'great', 'excellent']
-    negative_words = ['hate', 'dislike', 'boring', 'worst', 'bad', 'terrible', 'awful', 'avoid']
-    
-    sentences = preferences_text.split('.')
-    
-    for sentence in sentences:
-        sentence_lower = sentence.lower().strip()
-        if not sentence_lower:
-            continue
-            
-        has_positive = any(word in sentence_lower for word in positive_words)
-        has_negative = any(word in sentence_lower for word in negative_words)
-        
-        # Check subjects
-        for subject, keywords in subject_keywords.items():
-            if any(keyword in sentence_lower for keyword in keywords):
-                if has_positive and not has_negative:
-                    if subject not in analyzed_preferences['liked_subjects']:
-                        analyzed_preferences['liked_subjects'].append(subject)
-                elif has_negative and not has_positive:
-                    if subject not in analyzed_preferences['disliked_subjects']:
-                        analyzed_preferences['disliked_subjects'].append(subject)
-        
-        # Check times
-        for time_period, keywords in time_keywords.items():
-            if any(keyword in sentence_lower for keyword in keywords):
-                if has_positive and not has_negative:
-                    if time_period not in analyzed_preferences['liked_times']:
-                        analyzed_preferences['liked_times'].append(time_period)
-                elif has_negative and not has_positive:
-                    if time_period not in analyzed_preferences['disliked_times']:
-                        analyzed_preferences['disliked_times'].append(time_period)
-    
-    return jsonify({
-        "success": True,
-        "analyzed_preferences": analyzed_preferences,
-        "original_text": preferences_text
-    })
-
 @app.route('/model-status', methods=['GET'])
 def model_status():
     """Check which AI models are loaded"""
     return jsonify({
         "sentiment_analyzer": sentiment_analyzer is not None,
         "text_classifier": text_classifier is not None,
+        "inference_cache": {
+            "sentiment": sentiment_analyzer.cache_info() if sentiment_analyzer else None,
+            "text_classifier": text_classifier.cache_info() if text_classifier else None
+        },
+        "backend": AI_MODEL_BACKEND,
         "mode": "AI_MODELS" if (sentiment_analyzer and text_classifier) else "KEYWORD_BASED"
     })
 
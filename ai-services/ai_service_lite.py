@@ -9,6 +9,7 @@ import pytesseract
 import re
 from datetime import datetime
 import json
+from preference_engine import KeywordTier, PreferenceEngine, preference_response
 
 app = Flask(__name__)
 CORS(app)
@@ -24,9 +25,15 @@ CORS(app)
 #     model="facebook/bart-large-mnli"
 # )
 
+preference_engine = PreferenceEngine([KeywordTier()])
+
 @app.route('/health', methods=['GET'])
 def health_check():
-    return jsonify({"status": "healthy", "message": "AI service is running"})
+    return jsonify({
+        "status": "healthy",
+        "message": "AI service is running",
+        "preference_engine": preference_engine.stats()
+    })
 
 @app.route('/process-preferences', methods=['POST'])
 def process_preferences():
@@ -37,77 +44,8 @@ def process_preferences():
         if not preferences_text:
             return jsonify({"error": "No preferences provided"}), 400
         
-        # Simplified preference analysis without ML models
-        analyzed_preferences = {
-            'liked_subjects': [],
-            'disliked_subjects': [],
-            'liked_times': [],
-            'disliked_times': [],
-            'general_sentiment': 'neutral'
-        }
-        
-        # Simple keyword-based analysis
-        preferences_lower = preferences_text.lower()
-        
-        # Subject detection
-        subject_keywords = {
-            'mathematics': ['math', 'mathematics', 'calculus', 'algebra'],
-            'physics': ['physics', 'mechanics', 'thermodynamics'],
-            'chemistry': ['chemistry', 'organic', 'inorganic'],
-            'biology': ['biology', 'botany', 'zoology'],
-            'computer science': ['computer', 'programming', 'coding', 'software'],
-            'english': ['english', 'literature', 'grammar'],
-            'history': ['history', 'ancient', 'modern']
-        }
-        
-        # Time detection
-        time_keywords = {
-            'morning': ['morning', '8 am', '9 am', '10 am'],
-            'afternoon': ['afternoon', '12 pm', '1 pm', '2 pm'],
-            'evening': ['evening', '4 pm', '5 pm', '6 pm'],
-            'early_morning': ['early morning', '7 am', '6 am']
-        }
-        
-        # Positive/negative sentiment words
-        positive_words = ['love', 'like', 'enjoy', 'prefer', 'favorite', 'best', 'good', 'great', 'excellent']
-        negative_words = ['hate', 'dislike', 'boring', 'worst', 'bad', 'terrible', 'awful', 'avoid']
-        
-        sentences = preferences_text.split('.')
-        
-        for sentence in sentences:
-            sentence_lower = sentence.lower().strip()
-            if not sentence_lower:
-                continue
-                
-            # Determine sentiment
-            has_positive = any(word in sentence_lower for word in positive_words)
-            has_negative = any(word in sentence_lower for word in negative_words)
-            
-            # Check subjects
-            for subject, keywords in subject_keywords.items():
-                if any(keyword in sentence_lower for keyword in keywords):
-                    if has_positive and not has_negative:
-                        if subject not in analyzed_preferences['liked_subjects']:
-                            analyzed_preferences['liked_subjects'].append(subject)
-                    elif has_negative and not has_positive:
-                        if subject not in analyzed_preferences['disliked_subjects']:
-                            analyzed_preferences['disliked_subjects'].append(subject)
-            
-            # Check times
-            for time_period, keywords in time_keywords.items():
-                if any(keyword in sentence_lower for keyword in keywords):
-                    if has_positive and not has_negative:
-                        if time_period not in analyzed_preferences['liked_times']:
-                            analyzed_preferences['liked_times'].append(time_period)
-                    elif has_negative and not has_positive:
-                        if time_period not in analyzed_preferences['disliked_times']:
-                            analyzed_preferences['disliked_times'].append(time_period)
-        
-        return jsonify({
-            "success": True,
-            "analyzed_preferences": analyzed_preferences,
-            "original_text": preferences_text
-        })
+        # Keyword tier only: this variant runs without ML models
+        return jsonify(preference_response(preference_engine, preferences_text))
         
     except Exception as e:
         print(f"Error processing preferences: {str(e)}")
@@ -125,32 +63,23 @@ def process_document():
         if file.filename == '':
             return jsonify({"error": "No file selected"}), 400
         
-        # Save uploaded file temporarily
-        temp_path = f"temp_{file.filename}"
-        file.save(temp_path)
+        # The simplified extractors don't read the upload, so it is never written to disk
+        if doc_type == 'calendar':
+            result = process_calendar_document(file)
+        else:
+            result = process_timetable_document(file)
         
-        try:
-            if doc_type == 'calendar':
-                result = process_calendar_document(temp_path)
-            else:
-                result = process_timetable_document(temp_path)
-            
-            return jsonify({
-                "success": True,
-                "document_type": doc_type,
-                "extracted_data": result
-            })
-            
-        finally:
-            # Clean up temporary file
-            if os.path.exists(temp_path):
-                os.remove(temp_path)
+        return jsonify({
+            "success": True,
+            "document_type": doc_type,
+            "extracted_data": result
+        })
         
     except Exception as e:
         print(f"Error processing document: {str(e)}")
         return jsonify({"error": f"Failed to process document: {str(e)}"}), 500
 
-def process_calendar_document(file_path):
+def process_calendar_document(file):
     """Extract calendar information from PDF/image"""
     try:
         # Simplified processing - in real version would use OCR
@@ -168,7 +97,7 @@ def process_calendar_document(file_path):
         print(f"Error processing calendar: {str(e)}")
         raise
 
-def process_timetable_document(file_path):
+def process_timetable_document(file):
     """Extract timetable information from PDF/image"""
     try:
         # Simplified processing - in real version would use OCR
@@ -0,0 +1,473 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SERVICE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+def benchmark_import_time(modules=("ai_service_gemini", "ai_service"), runs=5, budget_seconds=1.0):
+    """Time a cold import of each service module in a fresh interpreter
+
+    Importing must not load models or heavy SDKs, so a service can bind its port quickly.
+    Returns False if any module's median import time exceeds ``budget_seconds``.
+    """
+    print("⏱️  SERVICE IMPORT TIME")
+    print("-" * 50)
+
+    env = {**os.environ, "AI_MODEL_PROVIDER": os.getenv("AI_MODEL_PROVIDER", "fake")}
+    within_budget = True
+
+    for module in modules:
+        timings = []
+        for _ in range(runs):
+            start = time.perf_counter()
+            result = subprocess.run(
+                [sys.executable, "-c", f"import {module}"],
+                cwd=SERVICE_DIR, env=env, capture_output=True, text=True
+            )
+            timings.append(time.perf_counter() - start)
+            if result.returncode != 0:
+                print(f"   {module}: import failed ({result.stderr.strip().splitlines()[-1]})")
+                break
+        else:
+            median = statistics.median(timings)
+            status = "✅" if median <= budget_seconds else "❌"
+            within_budget = within_budget and median <= budget_seconds
+            print(f"   {status} {module}: {median * 1000:.0f} ms median over {runs} runs (budget {budget_seconds * 1000:.0f} ms)")
+
+    return within_budget
+
+def benchmark_keyword_matching(essay_sizes_kb=(1, 4, 16, 64), runs=20):
+    """Compiled keyword matcher versus the per-sentence nested substring scan it replaced"""
+    print("\n🔤 KEYWORD PREFERENCE MATCHING")
+    print("-" * 50)
+
+    from keyword_matcher import match_preferences
+
+    sentences = [
+        "I really love mathematics and calculus in the morning",
+        "History and ancient literature classes at 4 pm are boring",
+        "Programming labs are my favorite part of the week",
+        "I dislike late evening lectures because I am always tired after travelling home",
+        "Chemistry is okay but organic reactions are terrible",
+        "We usually have physics at 9 am on monday"
+    ]
+
+    for size_kb in essay_sizes_kb:
+        essay = ""
+        while len(essay) < size_kb * 1024:
+            essay += sentences[len(essay) % len(sentences)] + ". "
+
+        assert _nested_keyword_scan(essay) == match_preferences(essay)
+        timings = {}
+        for name, analyze in (("nested", _nested_keyword_scan), ("compiled", match_preferences)):
+            start = time.perf_counter()
+            for _ in range(runs):
+                analyze(essay)
+            timings[name] = (time.perf_counter() - start) / runs
+        print(f"   {size_kb:>3} KB essay: nested {timings['nested'] * 1000:7.2f} ms   "
+              f"compiled {timings['compiled'] * 1000:7.2f} ms   ({timings['nested'] / timings['compiled']:.1f}x)")
+
+def _nested_keyword_scan(text):
+    """The original per-sentence any(keyword in sentence) loops, kept as a baseline"""
+    from keyword_matcher import SENTIMENT_KEYWORDS, SUBJECT_KEYWORDS, TIME_KEYWORDS
+
+    preferences = {'liked_subjects': [], 'disliked_subjects': [], 'liked_times': [], 'disliked_times': []}
+    for sentence in text.split('.'):
+        sentence_lower = sentence.lower().strip()
+        if not sentence_lower:
+            continue
+        has_positive = any(word in sentence_lower for word in SENTIMENT_KEYWORDS['positive'])
+        has_negative = any(word in sentence_lower for word in SENTIMENT_KEYWORDS['negative'])
+        if has_positive == has_negative:
+            continue
+        prefix = 'liked' if has_positive else 'disliked'
+        for table, suffix in ((SUBJECT_KEYWORDS, 'subjects'), (TIME_KEYWORDS, 'times')):
+            for label, keywords in table.items():
+                if any(keyword in sentence_lower for keyword in keywords) and label not in preferences[f'{prefix}_{suffix}']:
+                    preferences[f'{prefix}_{suffix}'].append(label)
+    return preferences
+
+def benchmark_preference_batching(sentence_counts=(1, 5, 10, 20, 40), batch_sizes=(1, 16)):
+    """Per-request latency of the hybrid service's model path versus sentence count
+
+    Batch size 1 approximates the old one-sentence-at-a-time behaviour; caches are cleared
+    before each timed run, then cold and warm cache runs are compared on repeated phrases.
+    Needs the transformers models to be available locally or downloadable.
+    """
+    print("\n🧠 PREFERENCE INFERENCE LATENCY (CPU)")
+    print("-" * 50)
+
+    import ai_service_hybrid
+
+    if not ai_service_hybrid.initialize_models():
+        print("   Skipped: models could not be loaded")
+        return
+
+    phrases = [
+        "I really love mathematics in the morning",
+        "History classes on friday afternoon are boring and I hate them",
+        "Programming labs are my favorite part of the week",
+        "I dislike late evening lectures because I am always tired after travelling home",
+        "Physics is fine"
+    ]
+
+    for batch_size in batch_sizes:
+        for count in sentence_counts:
+            sentences = [phrases[i % len(phrases)] + f" {i}" for i in range(count)]
+            ai_service_hybrid.run_batched_inference(sentences[:1], batch_size)  # warm up kernels
+            clear_inference_caches(ai_service_hybrid)
+            start = time.perf_counter()
+            ai_service_hybrid.run_batched_inference(sentences, batch_size)
+            elapsed = time.perf_counter() - start
+            print(f"   batch={batch_size:<3} sentences={count:<3} {elapsed * 1000:8.1f} ms  ({elapsed * 1000 / count:.1f} ms/sentence)")
+
+    # Repeated phrases are answered from the per-sentence caches
+    sentences = [phrases[i % len(phrases)] for i in range(max(sentence_counts))]
+    clear_inference_caches(ai_service_hybrid)
+    for label in ("cold cache", "warm cache"):
+        start = time.perf_counter()
+        ai_service_hybrid.run_batched_inference(sentences)
+        elapsed = time.perf_counter() - start
+        print(f"   {label}: {len(sentences)} sentences ({len(phrases)} distinct) in {elapsed * 1000:.1f} ms")
+    print(f"   classifier cache: {ai_service_hybrid.text_classifier.cache_info()}")
+
+def benchmark_model_backends(backends=("pytorch", "quantized", "onnx"), model_dir=None, sentences=40):
+    """Load time, peak RSS and per-sentence latency of the hybrid models on each CPU backend
+
+    Each backend is measured in a fresh interpreter so load time and memory aren't shared.
+    """
+    print("\n⚙️  MODEL BACKENDS (CPU)")
+    print("-" * 50)
+
+    for backend in backends:
+        env = {**os.environ, "AI_MODEL_BACKEND": backend}
+        if model_dir:
+            env["AI_MODEL_DIR"] = model_dir
+        result = subprocess.run(
+            [sys.executable, "-c", f"import benchmark_ai_services as b; b._measure_backend({sentences})"],
+            cwd=SERVICE_DIR, env=env, capture_output=True, text=True
+        )
+        lines = result.stdout.strip().splitlines()
+        if result.returncode != 0 or not lines:
+            error = (result.stderr.strip().splitlines() or ["no output"])[-1]
+            print(f"   {backend:<10} failed ({error})")
+            continue
+        stats = json.loads(lines[-1])
+        print(f"   {backend:<10} load {stats['load_seconds']:6.1f} s   peak RSS {stats['peak_rss_mb']:7.0f} MB   "
+              f"{stats['ms_per_sentence']:6.1f} ms/sentence")
+
+def _measure_backend(sentence_count):
+    """Child process for benchmark_model_backends: prints one JSON line of stats"""
+    import resource
+
+    import ai_service_hybrid
+
+    start = time.perf_counter()
+    if not ai_service_hybrid.initialize_models():
+        sys.exit(1)
+    load_seconds = time.perf_counter() - start
+
+    sentences = [f"I really love mathematics in the morning but history on friday is boring {i}" for i in range(sentence_count)]
+    ai_service_hybrid.run_batched_inference(sentences[:1])
+    start = time.perf_counter()
+    ai_service_hybrid.run_batched_inference(sentences[1:])
+    elapsed = time.perf_counter() - start
+
+    print(json.dumps({
+        "load_seconds": load_seconds,
+        "peak_rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        "ms_per_sentence": elapsed * 1000 / max(sentence_count - 1, 1)
+    }))
+
+def benchmark_document_pipeline(corpus_dir=None, image_count=24, runs=3):
+    """Upload-to-binarized-image throughput: the old temp-file round trip versus in-memory decoding
+
+    Uses the PNG/JPEG timetables in ``corpus_dir``, or renders a synthetic corpus. OCR is
+    timed separately (when tesseract is installed) since neither path changes it.
+    """
+    print("\n📄 DOCUMENT PIPELINE THROUGHPUT")
+    print("-" * 50)
+
+    import io
+    import shutil
+    import tempfile
+
+    import cv2
+    from werkzeug.datastructures import FileStorage
+
+    from document_pipeline import decode_image, extract_text, preprocess_for_ocr, upload_buffer
+
+    if corpus_dir:
+        names = sorted(name for name in os.listdir(corpus_dir) if name.lower().endswith(('.png', '.jpg', '.jpeg')))
+        corpus = []
+        for name in names:
+            with open(os.path.join(corpus_dir, name), 'rb') as f:
+                corpus.append((name, f.read()))
+    else:
+        corpus = _synthetic_timetables(image_count)
+    if not corpus:
+        print("   Skipped: no images in corpus")
+        return
+    total_mb = sum(len(data) for _, data in corpus) / 1024 / 1024
+    print(f"   corpus: {len(corpus)} images, {total_mb:.1f} MB")
+
+    def temp_file_path(name, data):
+        # The previous /process-document flow: save under the upload name, imread, convert, delete
+        upload = FileStorage(io.BytesIO(data), filename=name)
+        temp_path = f"temp_{upload.filename}"
+        upload.save(temp_path)
+        try:
+            image = cv2.imread(temp_path)
+            return preprocess_for_ocr(cv2.cvtColor(image, cv2.COLOR_BGR2GRAY))
+        finally:
+            os.remove(temp_path)
+
+    def in_memory(name, data):
+        upload = FileStorage(io.BytesIO(data), filename=name)
+        with upload_buffer(upload) as buffer:
+            return preprocess_for_ocr(decode_image(buffer))
+
+    def spooled(name, data):
+        # Uploads past DOCUMENT_MEMORY_LIMIT_BYTES: anonymous temp file, memory-mapped
+        with tempfile.TemporaryFile("rb+") as stream:
+            stream.write(data)
+            with upload_buffer(FileStorage(stream, filename=name)) as buffer:
+                return preprocess_for_ocr(decode_image(buffer))
+
+    with tempfile.TemporaryDirectory() as work_dir:
+        cwd = os.getcwd()
+        os.chdir(work_dir)
+        try:
+            results = {}
+            for label, process in (("temp file + imread", temp_file_path), ("in-memory imdecode", in_memory), ("spooled + mmap", spooled)):
+                timings = []
+                for _ in range(runs):
+                    start = time.perf_counter()
+                    results[label] = [int(process(name, data).sum()) for name, data in corpus]
+                    timings.append(time.perf_counter() - start)
+                best = min(timings)
+                print(f"   {label:<20} {len(corpus) / best:7.1f} images/s   {best * 1000 / len(corpus):6.2f} ms/image")
+        finally:
+            os.chdir(cwd)
+
+    outputs = list(results.values())
+    print(f"   identical binarized output: {all(output == outputs[0] for output in outputs)}")
+
+    benchmark_pdf_pages(corpus[:8])
+
+    if not shutil.which("tesseract"):
+        print("   OCR not timed: tesseract is not installed")
+        return
+
+    name, data = corpus[0]
+    start = time.perf_counter()
+    extract_text(in_memory(name, data))
+    print(f"   OCR (tesseract): {(time.perf_counter() - start) * 1000:.0f} ms/image")
+    benchmark_ocr_pool(corpus)
+
+def benchmark_pdf_pages(corpus):
+    """Per-page cost of reading a PDF's text layer versus rendering the page for OCR"""
+    try:
+        import pymupdf
+    except ImportError:
+        print("   PDF pages not timed: PyMuPDF is not installed")
+        return
+
+    from document_pipeline import open_pdf, pdf_text_layer, preprocess_for_ocr, render_pdf_page
+
+    # The same timetables as a digital PDF (text layer) and a scanned one (page images only)
+    digital, scanned = pymupdf.open(), pymupdf.open()
+    for index, (_, data) in enumerate(corpus):
+        page = digital.new_page()
+        page.insert_text((72, 72), f"Class Timetable - Division {index + 1}\nMonday 9:00 AM Mathematics\nTuesday 10:00 AM Physics lab")
+        scanned.new_page().insert_image(pymupdf.Rect(0, 0, 842, 595), stream=data)
+    digital_pdf, scanned_pdf = digital.tobytes(), scanned.tobytes()
+
+    for label, pdf, read_page in (
+        ("text layer", digital_pdf, pdf_text_layer),
+        ("render + binarize", scanned_pdf, lambda page: preprocess_for_ocr(render_pdf_page(page)))
+    ):
+        start = time.perf_counter()
+        with open_pdf(pdf) as document:
+            for page in document:
+                read_page(page)
+        elapsed = time.perf_counter() - start
+        print(f"   PDF {label:<17} {elapsed * 1000 / len(corpus):7.2f} ms/page (before any OCR)")
+
+def benchmark_ocr_pool(corpus, worker_counts=None):
+    """End-to-end OCR job throughput on the process pool for each worker count"""
+    from ocr_jobs import OcrJobQueue
+
+    print(f"   OCR job pool ({os.cpu_count()} CPUs):")
+    for workers in worker_counts or sorted({1, os.cpu_count() or 1}):
+        queue = OcrJobQueue(workers=workers, queue_size=len(corpus))
+        queue.warmup()
+        try:
+            start = time.perf_counter()
+            jobs = queue.submit_many([(data, 'timetable', name) for name, data in corpus])
+            for job in jobs:
+                queue.wait(job)
+            elapsed = time.perf_counter() - start
+        finally:
+            queue.shutdown()
+        stages = queue.stats()["avg_stage_ms"]
+        breakdown = "  ".join(f"{stage} {ms:.1f}" for stage, ms in stages.items())
+        print(f"     workers={workers:<3} {len(corpus) / elapsed:6.1f} documents/s   avg ms: {breakdown}")
+
+def benchmark_vision_preprocessing(corpus_dir=None, image_count=6, max_dimensions=(1024, 1600, 2400)):
+    """Payload size and preprocessing cost of the Gemini Vision image stage, per max dimension
+
+    Uses the photos in ``corpus_dir``, or synthetic 12-megapixel phone photos of timetables
+    (on a desk, stored sideways with an EXIF orientation). With GEMINI_API_KEY set, each photo
+    is also sent to Gemini at full resolution and preprocessed, and request latency and
+    extraction accuracy are compared: the share of expected days and subjects named in the
+    reply (for ``corpus_dir`` photos, those named in the full-resolution reply).
+    """
+    print("\n🖼️  GEMINI VISION PREPROCESSING")
+    print("-" * 50)
+
+    import io
+
+    from PIL import Image
+
+    from vision_images import prepare_vision_image
+
+    if corpus_dir:
+        names = sorted(name for name in os.listdir(corpus_dir) if name.lower().endswith(('.png', '.jpg', '.jpeg')))
+        corpus = []
+        for name in names:
+            with open(os.path.join(corpus_dir, name), 'rb') as f:
+                corpus.append((name, f.read()))
+    else:
+        corpus = _synthetic_photos(image_count)
+    if not corpus:
+        print("   Skipped: no images in corpus")
+        return
+    original_kb = statistics.mean(len(data) for _, data in corpus) / 1024
+    print(f"   corpus: {len(corpus)} photos, {original_kb:.0f} KB average")
+
+    for max_dimension in max_dimensions:
+        start = time.perf_counter()
+        blobs = [prepare_vision_image(data, max_dimension) for _, data in corpus]
+        elapsed = time.perf_counter() - start
+        sent_kb = statistics.mean(len(blob["data"]) for blob in blobs) / 1024
+        size = Image.open(io.BytesIO(blobs[0]["data"])).size
+        print(f"   max {max_dimension:<5} {sent_kb:7.0f} KB average ({sent_kb / original_kb:6.1%})   "
+              f"{elapsed * 1000 / len(corpus):6.1f} ms/photo   first photo sent as {size[0]}x{size[1]}")
+
+    if not os.getenv("GEMINI_API_KEY"):
+        print("   Latency and accuracy not measured: GEMINI_API_KEY is not set")
+        return
+
+    from document_pipeline import parse_timetable_text
+    from model_providers import GeminiProvider
+
+    model = GeminiProvider(os.environ["GEMINI_API_KEY"])
+    prompt = "Transcribe this class timetable: every day with its subjects and class timings."
+    keywords = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday',
+                'mathematics', 'physics', 'programming', 'history', 'english', 'chemistry', 'lab']
+
+    def found(text):
+        text = text.lower()
+        return {keyword for keyword in keywords if keyword in text}
+
+    results = {"full resolution": [], "preprocessed": []}
+    for _, data in corpus:
+        expected = None if corpus_dir else set(keywords)
+        for label, image in (("full resolution", Image.open(io.BytesIO(data))), ("preprocessed", prepare_vision_image(data))):
+            start = time.perf_counter()
+            text = model.generate_content([prompt, image]).text
+            latency = time.perf_counter() - start
+            if expected is None:
+                # No ground truth for real photos: agreement with the full-resolution reply
+                expected = found(text)
+            recall = len(found(text) & expected) / len(expected) if expected else 1.0
+            results[label].append((latency, recall))
+
+    for label, measurements in results.items():
+        latencies = [latency for latency, _ in measurements]
+        print(f"   {label:<16} median {statistics.median(latencies) * 1000:6.0f} ms   "
+              f"accuracy {statistics.mean(recall for _, recall in measurements):6.1%}")
+
+def _synthetic_photos(count, width=4032, height=3024):
+    """12-megapixel phone photos of the synthetic timetables: on a desk, stored rotated with EXIF orientation 6"""
+    import io
+
+    import cv2
+    import numpy as np
+    from PIL import Image
+
+    rng = np.random.default_rng(0)
+    photos = []
+    for name, data in _synthetic_timetables(count, width=3300, height=2340):
+        timetable = cv2.imdecode(np.frombuffer(data, dtype=np.uint8), cv2.IMREAD_COLOR)
+        photo = np.empty((height, width, 3), dtype=np.uint8)
+        photo[:] = (60, 90, 120)
+        photo = cv2.add(photo, rng.integers(0, 12, photo.shape, dtype=np.uint8))
+        top, left = (height - timetable.shape[0]) // 2, (width - timetable.shape[1]) // 2
+        photo[top:top + timetable.shape[0], left:left + timetable.shape[1]] = timetable
+
+        # Stored sideways, as phone cameras do; orientation 6 says to rotate it back for display
+        image = Image.fromarray(cv2.cvtColor(photo, cv2.COLOR_BGR2RGB)).transpose(Image.Transpose.ROTATE_90)
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        output = io.BytesIO()
+        image.save(output, format="JPEG", quality=92, exif=exif)
+        photos.append((name.rsplit('.', 1)[0] + '_photo.jpg', output.getvalue()))
+    return photos
+
+def _synthetic_timetables(count, width=1654, height=1169):
+    """Rendered weekly timetables (A4 landscape at 150 dpi), alternating PNG and JPEG"""
+    import cv2
+    import numpy as np
+
+    days = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday']
+    subjects = ['Mathematics', 'Physics', 'Programming', 'History', 'English', 'Chemistry', 'Lab']
+    corpus = []
+    for index in range(count):
+        image = np.full((height, width, 3), 255, dtype=np.uint8)
+        cv2.putText(image, f"Class Timetable - Division {index % 12 + 1}", (60, 80), cv2.FONT_HERSHEY_SIMPLEX, 1.6, (0, 0, 0), 3)
+        row_height = (height - 160) // len(days)
+        for row, day in enumerate(days):
+            top = 140 + row * row_height
+            cv2.line(image, (40, top), (width - 40, top), (0, 0, 0), 2)
+            cv2.putText(image, day, (60, top + row_height // 2), cv2.FONT_HERSHEY_SIMPLEX, 1.0, (0, 0, 0), 2)
+            for slot in range(5):
+                subject = subjects[(index + row + slot) % len(subjects)]
+                left = 330 + slot * 260
+                cv2.putText(image, f"{9 + slot}:00 AM", (left, top + row_height // 2 - 20), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (40, 40, 40), 2)
+                cv2.putText(image, subject, (left, top + row_height // 2 + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 0, 0), 2)
+        extension = '.png' if index % 2 == 0 else '.jpg'
+        corpus.append((f"timetable_{index}{extension}", cv2.imencode(extension, image)[1].tobytes()))
+    return corpus
+
+def clear_inference_caches(service):
+    service.sentiment_analyzer.cache_clear()
+    service.text_classifier.cache_clear()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="AI service benchmarks")
+    parser.add_argument("--import-budget", type=float, default=1.0, help="Max median import time in seconds")
+    parser.add_argument("--models", action="store_true", help="Also run benchmarks that load the transformers models")
+    parser.add_argument("--backends", nargs="*", help="Compare these model backends (pytorch, quantized, onnx)")
+    parser.add_argument("--model-dir", help="Local model directory for the backend comparison")
+    parser.add_argument("--documents", nargs="?", const="", help="Benchmark the document pipeline, on a directory of timetable images if given")
+    parser.add_argument("--vision", nargs="?", const="", help="Benchmark Gemini Vision preprocessing, on a directory of document photos if given")
+    args = parser.parse_args()
+
+    print("🚀 AI SERVICE BENCHMARKS\n")
+    ok = benchmark_import_time(budget_seconds=args.import_budget)
+    benchmark_keyword_matching()
+    if args.models:
+        benchmark_preference_batching()
+    if args.backends is not None:
+        benchmark_model_backends(args.backends or ("pytorch", "quantized", "onnx"), args.model_dir)
+    if args.documents is not None:
+        benchmark_document_pipeline(args.documents or None)
+    if args.vision is not None:
+        benchmark_vision_preprocessing(args.vision or None)
+    sys.exit(0 if ok else 1)
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from collections import OrderedDict
+
+class DocumentCache:
+    """
+    On-disk cache of extracted document data, keyed on the SHA-256 of the uploaded bytes plus
+    the document type, so the same calendar or timetable uploaded by many students is only
+    processed once. Each entry is one JSON file in ``directory``; entries are evicted
+    least-recently-used once their total size exceeds ``max_bytes``. Recency is kept in the
+    files' modification times, so it survives restarts.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> size in bytes, least recently used first
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(directory, exist_ok=True)
+        files = []
+        for name in os.listdir(directory):
+            if name.endswith(".json"):
+                stat = os.stat(os.path.join(directory, name))
+                files.append((stat.st_mtime, name[:-len(".json")], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total_bytes += size
+        with self._lock:
+            self._evict()
+
+    @staticmethod
+    def make_key(data, doc_type):
+        """SHA-256 of the file bytes (any buffer, hashed without copying) plus the document type"""
+        return f"{hashlib.sha256(data).hexdigest()}-{re.sub(r'[^a-z0-9_]', '_', doc_type.lower())[:32]}"
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key):
+        """Return the cached data for ``key``, or None on a miss"""
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return None
+            try:
+                with open(self._path(key), encoding="utf-8") as f:
+                    data = json.load(f)
+                os.utime(self._path(key))
+            except (OSError, ValueError):
+                # Removed or corrupted outside the cache (another process evicted it, disk full)
+                self._remove(key)
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def set(self, key, data):
+        payload = json.dumps(data, separators=(",", ":")).encode("utf-8")
+        # Written under a temporary name and renamed, so readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(payload)
+        os.replace(temp_path, self._path(key))
+
+        with self._lock:
+            self._total_bytes += len(payload) - self._entries.pop(key, 0)
+            self._entries[key] = len(payload)
+            self._evict()
+
+    def _evict(self):
+        while self._total_bytes > self.max_bytes and self._entries:
+            self._remove(next(iter(self._entries)))
+            self.evictions += 1
+
+    def _remove(self, key):
+        self._total_bytes -= self._entries.pop(key, 0)
+        try:
+            os.remove(self._path(key))
+        except FileNotFoundError:
+            pass
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0
+            }
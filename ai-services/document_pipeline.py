@@ -0,0 +1,231 @@
+import io
+import mmap
+import os
+import re
+import tempfile
+import time
+from contextlib import contextmanager
+
+import cv2
+import numpy as np
+from flask import Request
+
+# Uploads up to this size are parsed into memory and decoded in place; larger ones are spooled
+# to an anonymous temporary file (no name on disk, nothing to clean up) and memory-mapped
+DOCUMENT_MEMORY_LIMIT_BYTES = int(os.getenv('DOCUMENT_MEMORY_LIMIT_BYTES', str(8 * 1024 * 1024)))
+
+# Requests larger than this are rejected with 413 before they are read
+DOCUMENT_MAX_BYTES = int(os.getenv('DOCUMENT_MAX_BYTES', str(16 * 1024 * 1024)))
+
+class UploadRequest(Request):
+    """Request whose file uploads land in a BytesIO, or a TemporaryFile past the memory limit"""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        if total_content_length is not None and total_content_length <= DOCUMENT_MEMORY_LIMIT_BYTES:
+            return io.BytesIO()
+        return tempfile.TemporaryFile("rb+")
+
+@contextmanager
+def upload_buffer(file):
+    """Zero-copy view of an uploaded file's bytes, valid inside the ``with`` block
+
+    In-memory uploads are exposed through ``getbuffer()``, spooled ones through a read-only
+    mmap; any other stream is read into bytes.
+    """
+    stream = file.stream
+    if isinstance(stream, io.BytesIO):
+        with stream.getbuffer() as buffer:
+            yield buffer
+        return
+
+    try:
+        fileno = stream.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        stream.seek(0)
+        yield stream.read()
+        return
+
+    if os.fstat(fileno).st_size == 0:
+        yield b""
+        return
+    with mmap.mmap(fileno, 0, access=mmap.ACCESS_READ) as buffer:
+        yield buffer
+
+def decode_image(buffer):
+    """Decode image bytes straight to grayscale, the only form the OCR path uses"""
+    image = cv2.imdecode(np.frombuffer(buffer, dtype=np.uint8), cv2.IMREAD_GRAYSCALE) if len(buffer) else None
+    if image is None:
+        raise ValueError("Could not load image")
+    return image
+
+def preprocess_for_ocr(gray):
+    """Otsu binarization for better OCR"""
+    return cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY | cv2.THRESH_OTSU)[1]
+
+def extract_text(image):
+    import pytesseract
+    return pytesseract.image_to_string(image)
+
+# PDF pages without a usable text layer are rendered at this resolution for OCR
+PDF_RENDER_DPI = int(os.getenv('PDF_RENDER_DPI', '200'))
+
+# A page whose text layer has at least this many non-blank characters is read as-is, without OCR
+PDF_TEXT_LAYER_MIN_CHARS = 32
+
+def is_pdf(buffer):
+    return bytes(buffer[:5]) == b'%PDF-'
+
+def open_pdf(data):
+    import pymupdf
+    return pymupdf.open(stream=bytes(data), filetype="pdf")
+
+def extract_pdf_page(document, page_number):
+    """One page of an open PDF as a single-page PDF's bytes"""
+    import pymupdf
+    with pymupdf.open() as page_document:
+        page_document.insert_pdf(document, from_page=page_number, to_page=page_number)
+        return page_document.tobytes()
+
+def pdf_text_layer(page):
+    """The page's embedded text, or None when it has too little to skip OCR (scanned pages)"""
+    text = page.get_text()
+    return text if len(text.strip()) >= PDF_TEXT_LAYER_MIN_CHARS else None
+
+def render_pdf_page(page, dpi=PDF_RENDER_DPI):
+    """Rasterize one page straight to a grayscale image"""
+    import pymupdf
+    pixmap = page.get_pixmap(dpi=dpi, colorspace=pymupdf.csGRAY, alpha=False)
+    return np.frombuffer(pixmap.samples, dtype=np.uint8).reshape(pixmap.height, pixmap.stride)[:, :pixmap.width]
+
+def ocr_pdf_page(data, page_number, timings=None):
+    """Render and OCR one page of a PDF; opens the document itself so it can run in a worker process"""
+    with open_pdf(data) as document:
+        page = document[page_number]
+        return _run_stages(page, (("render", render_pdf_page), ("preprocess", preprocess_for_ocr), ("ocr", extract_text)), timings)
+
+def pdf_text(data, timings=None):
+    """Text of every page in order: the text layer where there is one, OCR of the rendered page otherwise"""
+    page_texts = []
+    with open_pdf(data) as document:
+        for page in document:
+            text = _run_stages(page, (("text_layer", pdf_text_layer),), timings)
+            if text is None:
+                text = _run_stages(page, (("render", render_pdf_page), ("preprocess", preprocess_for_ocr), ("ocr", extract_text)), timings)
+            page_texts.append(text)
+    return "\n".join(page_texts)
+
+def parse_document_text(text, doc_type):
+    return parse_calendar_text(text) if doc_type == 'calendar' else parse_timetable_text(text)
+
+def process_document(buffer, doc_type, timings=None):
+    """Extract and parse an uploaded calendar or timetable, from an image or a PDF
+
+    If ``timings`` is given, each stage's duration in milliseconds is stored in it (summed over
+    pages for PDFs): ``decode``, ``preprocess``, ``ocr`` and ``parse`` for images, plus
+    ``text_layer`` and ``render`` for PDFs.
+    """
+    if is_pdf(buffer):
+        text = pdf_text(buffer, timings)
+    else:
+        text = _run_stages(buffer, (("decode", decode_image), ("preprocess", preprocess_for_ocr), ("ocr", extract_text)), timings)
+    return _run_stages(text, (("parse", lambda text: parse_document_text(text, doc_type)),), timings)
+
+def _run_stages(value, stages, timings):
+    """Apply ``(name, step)`` stages in order, adding each one's milliseconds to ``timings``"""
+    for stage, step in stages:
+        start = time.perf_counter()
+        value = step(value)
+        if timings is not None:
+            timings[stage] = round(timings.get(stage, 0.0) + (time.perf_counter() - start) * 1000, 2)
+    return value
+
+def parse_calendar_text(text):
+    """Parse calendar text to extract working days, holidays, etc."""
+    calendar_data = {
+        'semester_start': None,
+        'semester_end': None,
+        'holidays': [],
+        'total_working_days': 0,
+        'exam_dates': []
+    }
+
+    # Extract dates using regex
+    date_patterns = [
+        r'\b(\d{1,2})[/-](\d{1,2})[/-](\d{4})\b',  # DD/MM/YYYY or DD-MM-YYYY
+        r'\b(\d{4})[/-](\d{1,2})[/-](\d{1,2})\b',  # YYYY/MM/DD or YYYY-MM-DD
+    ]
+
+    dates_found = []
+    for pattern in date_patterns:
+        matches = re.findall(pattern, text)
+        dates_found.extend(matches)
+
+    # Extract holiday information
+    holiday_keywords = ['holiday', 'vacation', 'break', 'closed', 'festival']
+    lines = text.split('\n')
+
+    for line in lines:
+        line_lower = line.lower()
+        if any(keyword in line_lower for keyword in holiday_keywords):
+            calendar_data['holidays'].append(line.strip())
+
+    # Estimate working days (this is a simplified calculation)
+    if dates_found:
+        calendar_data['total_working_days'] = max(100, len(dates_found) * 5)  # Rough estimate
+
+    return calendar_data
+
+def parse_timetable_text(text):
+    """Parse timetable text to extract subject schedules"""
+    timetable_data = {
+        'subjects': [],
+        'weekly_schedule': {},
+        'total_classes_per_week': 0
+    }
+
+    # Common subject keywords
+    subject_keywords = [
+        'mathematics', 'math', 'physics', 'chemistry', 'biology',
+        'computer science', 'programming', 'history', 'english',
+        'literature', 'economics', 'lab', 'practical'
+    ]
+
+    # Time patterns
+    time_pattern = r'\b(\d{1,2}):(\d{2})\s*(AM|PM|am|pm)?\b'
+
+    lines = text.split('\n')
+    current_day = None
+
+    days_of_week = ['monday', 'tuesday', 'wednesday', 'thursday', 'friday', 'saturday']
+
+    for line in lines:
+        line_clean = line.strip().lower()
+
+        # Check if line contains a day of the week
+        for day in days_of_week:
+            if day in line_clean:
+                current_day = day
+                timetable_data['weekly_schedule'][day] = []
+                break
+
+        # Extract subjects and times
+        if current_day:
+            times = re.findall(time_pattern, line)
+            for keyword in subject_keywords:
+                if keyword in line_clean:
+                    if keyword not in timetable_data['subjects']:
+                        timetable_data['subjects'].append(keyword)
+
+                    class_info = {
+                        'subject': keyword,
+                        'day': current_day,
+                        'times': times,
+                        'raw_text': line.strip()
+                    }
+                    timetable_data['weekly_schedule'][current_day].append(class_info)
+
+    # Calculate total classes per week
+    total_classes = sum(len(day_schedule) for day_schedule in timetable_data['weekly_schedule'].values())
+    timetable_data['total_classes_per_week'] = total_classes
+
+    return timetable_data
@@ -0,0 +1,196 @@
+import re
+
+# Keyword tables for the rule-based preference analysis
+SUBJECT_KEYWORDS = {
+    'mathematics': ['math', 'mathematics', 'calculus', 'algebra'],
+    'physics': ['physics', 'mechanics', 'thermodynamics'],
+    'chemistry': ['chemistry', 'organic', 'inorganic'],
+    'biology': ['biology', 'botany', 'zoology'],
+    'computer science': ['computer', 'programming', 'coding', 'software'],
+    'english': ['english', 'literature', 'grammar'],
+    'history': ['history', 'ancient', 'modern']
+}
+
+TIME_KEYWORDS = {
+    'morning': ['morning', '8 am', '9 am', '10 am'],
+    'afternoon': ['afternoon', '12 pm', '1 pm', '2 pm'],
+    'evening': ['evening', '4 pm', '5 pm', '6 pm'],
+    'early_morning': ['early morning', '7 am', '6 am']
+}
+
+SENTIMENT_KEYWORDS = {
+    'positive': ['love', 'like', 'enjoy', 'prefer', 'favorite', 'best', 'good', 'great', 'excellent'],
+    'negative': ['hate', 'dislike', 'boring', 'worst', 'bad', 'terrible', 'awful', 'avoid']
+}
+
+def _build_trie(words):
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = {}
+    return trie
+
+def _trie_pattern(node):
+    """Regex for a character trie; longer continuations are tried before stopping at a keyword end"""
+    branches = [re.escape(char) + _trie_pattern(child) for char, child in sorted(node.items()) if char]
+    if not branches:
+        return ''
+
+    pattern = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+    if '' in node:
+        pattern = '(?:' + pattern + ')?'
+    return pattern
+
+class KeywordMatcher:
+    """
+    Finds every keyword hit in a text with compiled regexes built once.
+    ``groups`` maps a group name to ``{label: [keywords]}``. Keywords match as case-insensitive
+    substrings, as with ``keyword in sentence.lower()``, including hits inside other words such
+    as "like" inside "dislike".
+
+    The keywords are compiled into one trie-shaped pattern that reports the longest keyword at
+    each match; every keyword contained in it is implied, except in the groups a scan asks to
+    match exactly. A non-overlapping scan can only miss
+    a hit that starts inside another keyword and runs past its end ("8 amorning"), so texts
+    containing such a pair are rescanned at every position with a lookahead pattern.
+    """
+
+    def __init__(self, groups, separator='.', max_cached_combinations=4096):
+        self.groups = groups
+        self.separator = separator
+        self.max_cached_combinations = max_cached_combinations
+        self._label_rank = {}
+        labels_by_keyword = {}
+
+        for group, labels in groups.items():
+            for rank, (label, keywords) in enumerate(labels.items()):
+                self._label_rank[(group, label)] = rank
+                for keyword in keywords:
+                    keyword = keyword.lower()
+                    if not keyword or separator in keyword:
+                        raise ValueError(f"Invalid keyword {keyword!r} for {group}/{label}")
+                    labels_by_keyword.setdefault(keyword, set()).add((group, label))
+
+        self._exact_hits = {keyword: frozenset(hits) for keyword, hits in labels_by_keyword.items()}
+        self._hits = {
+            keyword: frozenset(hit for other, hits in labels_by_keyword.items() if other in keyword for hit in hits)
+            for keyword in labels_by_keyword
+        }
+
+        # Strings where one keyword starts inside another and runs past its end
+        crossings = {
+            keyword[:offset] + other
+            for keyword in labels_by_keyword
+            for offset in range(1, len(keyword))
+            for other in labels_by_keyword
+            if other.startswith(keyword[offset:]) and len(other) > len(keyword) - offset
+        }
+
+        trie = _trie_pattern(_build_trie(labels_by_keyword))
+        self._pattern = re.compile(trie)
+        self._overlapping_pattern = re.compile('(?=(' + trie + '))')
+        self._crossing_pattern = re.compile(_trie_pattern(_build_trie(crossings))) if crossings else None
+        self._combinations = {}
+
+    def scan(self, text, exact_groups=frozenset()):
+        """Hits per sentence: a list with one ``{group: [labels]}`` dict per sentence that has any
+
+        Sentences are split on ``separator``; labels are listed in table order. Groups in
+        ``exact_groups`` only get the labels of keywords matched in their own right, not of
+        keywords inside a longer match ("dislike" is not also "like"). The dicts are shared
+        between calls and must not be modified.
+        """
+        text = text.lower()
+        pattern = self._pattern
+        if self._crossing_pattern is not None and self._crossing_pattern.search(text):
+            pattern = self._overlapping_pattern
+
+        results = []
+        for sentence in text.split(self.separator):
+            if exact_groups and pattern is self._overlapping_pattern:
+                keywords = self._outermost(sentence)
+            else:
+                keywords = pattern.findall(sentence)
+            if keywords:
+                results.append(self._labels_for(frozenset(keywords), exact_groups))
+        return results
+
+    def _outermost(self, sentence):
+        """Keywords of an overlapping scan that are not inside another match"""
+        keywords = []
+        furthest = 0
+        for match in self._overlapping_pattern.finditer(sentence):
+            end = match.start() + len(match.group(1))
+            if end > furthest:
+                keywords.append(match.group(1))
+                furthest = end
+        return keywords
+
+    def _labels_for(self, keywords, exact_groups=frozenset()):
+        """``{group: [labels]}`` for a set of matched keywords, memoized per combination"""
+        labels = self._combinations.get((keywords, exact_groups))
+        if labels is None:
+            hits = {hit for keyword in keywords for hit in self._hits[keyword] if hit[0] not in exact_groups}
+            hits.update(hit for keyword in keywords for hit in self._exact_hits[keyword] if hit[0] in exact_groups)
+            labels = {group: [] for group in self.groups}
+            for group, label in sorted(hits, key=lambda hit: self._label_rank[hit]):
+                labels[group].append(label)
+
+            if len(self._combinations) >= self.max_cached_combinations:
+                self._combinations.clear()
+            self._combinations[(keywords, exact_groups)] = labels
+        return labels
+
+PREFERENCE_MATCHER = KeywordMatcher({
+    'subject': SUBJECT_KEYWORDS,
+    'time': TIME_KEYWORDS,
+    'sentiment': SENTIMENT_KEYWORDS
+})
+
+def match_preferences(text, matcher=PREFERENCE_MATCHER):
+    """Liked/disliked subjects and times from keyword hits
+
+    A sentence counts as positive or negative only when it has sentiment words of one kind.
+    """
+    return analyze_keywords(text, matcher)[0]
+
+# Contrasting clauses ("I love math but dislike history") carry opposite sentiment
+CLAUSE_BREAKS = re.compile(r'\s*(?:;|\bbut\b|\bwhereas\b|\bhowever\b|\bthough\b)\s*', re.IGNORECASE)
+
+def analyze_keywords(text, matcher=PREFERENCE_MATCHER, clauses=False):
+    """Preferences plus how many keyword sentences were decided and how many were ambiguous
+
+    A sentence is decided when it has one-sided sentiment and a subject or time; sentences
+    with mixed or missing sentiment, or sentiment about nothing recognized, are ambiguous.
+    With ``clauses``, sentences are also split at contrast words and sentiment keywords count
+    only where matched in their own right, so "dislike" is negative rather than mixed.
+    """
+    preferences = {
+        'liked_subjects': [],
+        'disliked_subjects': [],
+        'liked_times': [],
+        'disliked_times': []
+    }
+    decided = ambiguous = 0
+
+    if clauses:
+        hits_per_sentence = matcher.scan(CLAUSE_BREAKS.sub(matcher.separator, text), frozenset({'sentiment'}))
+    else:
+        hits_per_sentence = matcher.scan(text)
+    for hits in hits_per_sentence:
+        has_positive = 'positive' in hits['sentiment']
+        has_negative = 'negative' in hits['sentiment']
+        if has_positive == has_negative or not (hits['subject'] or hits['time']):
+            ambiguous += 1
+            continue
+
+        decided += 1
+        prefix = 'liked' if has_positive else 'disliked'
+        for key, labels in ((f'{prefix}_subjects', hits['subject']), (f'{prefix}_times', hits['time'])):
+            for label in labels:
+                if label not in preferences[key]:
+                    preferences[key].append(label)
+
+    return preferences, decided, ambiguous
@@ -0,0 +1,62 @@
+import threading
+import time
+
+class LazyResource:
+    """
+    An expensive object (model client, ML pipeline) built on first use.
+    ``warmup()`` starts building it in a background thread so the service can bind its
+    port immediately; ``status()`` reports readiness without triggering a load.
+    """
+
+    def __init__(self, name, factory):
+        self.name = name
+        self._factory = factory
+        self._value = None
+        self._state = "pending"
+        self._error = None
+        self._load_seconds = None
+        self._lock = threading.Lock()
+
+    @property
+    def ready(self):
+        return self._state == "ready"
+
+    def get(self):
+        """Return the resource, building it on the first call (other callers wait)"""
+        if self._state == "ready":
+            return self._value
+
+        with self._lock:
+            if self._state != "ready":
+                self._state = "loading"
+                start = time.perf_counter()
+                try:
+                    self._value = self._factory()
+                except Exception as e:
+                    self._state = "failed"
+                    self._error = str(e)
+                    raise
+                self._load_seconds = time.perf_counter() - start
+                self._error = None
+                self._state = "ready"
+        return self._value
+
+    def warmup(self):
+        """Build the resource in a daemon thread; failures are recorded in status()"""
+        def load():
+            try:
+                self.get()
+                print(f"✅ {self.name} ready in {self._load_seconds:.2f}s")
+            except Exception as e:
+                print(f"❌ {self.name} failed to load: {e}")
+
+        thread = threading.Thread(target=load, name=f"warmup-{self.name}", daemon=True)
+        thread.start()
+        return thread
+
+    def status(self):
+        return {
+            "state": self._state,
+            "load_seconds": round(self._load_seconds, 3) if self._load_seconds is not None else None,
+            "error": self._error
+        }
@@ -0,0 +1,111 @@
+import argparse
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+# Run the service against the local fake model for repeatable numbers, e.g.
+#   AI_MODEL_PROVIDER=fake FAKE_MODEL_LATENCY_MS=200 python ai_service_gemini.py
+#   python load_test.py --endpoint /chat --concurrency 50 --requests 500
+# The async variant is exercised the same way:
+#   AI_MODEL_PROVIDER=fake FAKE_MODEL_LATENCY_MS=200 python ai_service_gemini_async.py
+#   python load_test.py --endpoint /chat --concurrency 200 --requests 2000
+# Time to first byte of a streamed /chat against the buffered reply:
+#   python load_test.py --endpoint /chat --stream
+
+def build_request(endpoint, index, stream=False):
+    """Method and JSON body for one request; bodies vary so response caches don't hide model calls"""
+    if endpoint == '/chat':
+        return 'POST', {"message": f"How many classes can I skip this week? (load test #{index})", "stream": stream}
+    if endpoint == '/process-preferences':
+        return 'POST', {"preferences": f"I love mathematics in the morning but dislike evening history classes. #{index}"}
+    if endpoint == '/generate-recommendations':
+        return 'POST', {"attendance_data": {"current_percentage": 70 + index % 20}, "preferences": {}}
+    if endpoint == '/predict-attendance':
+        return 'POST', {"historical_data": [70 + index % 20], "upcoming_events": []}
+    return 'GET', None
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+def run_load_test(base_url, endpoint, concurrency, total_requests, timeout=60, stream=False):
+    """Fire ``total_requests`` at ``endpoint`` from ``concurrency`` threads and summarize latency
+
+    Time to first byte is measured alongside the full latency; with ``stream`` the
+    endpoint is asked for its streamed response.
+    """
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=concurrency, pool_maxsize=concurrency)
+    session.mount('http://', adapter)
+
+    def fetch_provider_stats():
+        try:
+            return session.get(f"{base_url}/health", timeout=timeout).json().get('model_provider') or {}
+        except Exception:
+            return {}
+
+    def send(index):
+        method, body = build_request(endpoint, index, stream)
+        start = time.perf_counter()
+        first_byte = None
+        try:
+            with session.request(method, f"{base_url}{endpoint}", json=body, timeout=timeout, stream=True) as response:
+                for chunk in response.iter_content(chunk_size=None):
+                    if first_byte is None and chunk:
+                        first_byte = time.perf_counter() - start
+                ok = response.status_code < 400
+        except requests.exceptions.RequestException:
+            ok = False
+        elapsed = time.perf_counter() - start
+        return elapsed, elapsed if first_byte is None else first_byte, ok
+
+    provider_before = fetch_provider_stats()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(send, range(total_requests)))
+    elapsed = time.perf_counter() - start
+    provider_after = fetch_provider_stats()
+
+    latencies = [latency for latency, _, _ in results]
+    first_bytes = [first_byte for _, first_byte, _ in results]
+    summary = {
+        "requests": total_requests,
+        "concurrency": concurrency,
+        "errors": sum(1 for _, _, ok in results if not ok),
+        "seconds": elapsed,
+        "throughput_rps": total_requests / elapsed,
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p95_ms": percentile(latencies, 0.95) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "mean_ms": statistics.mean(latencies) * 1000,
+        "p50_ttfb_ms": percentile(first_bytes, 0.50) * 1000,
+        "p95_ttfb_ms": percentile(first_bytes, 0.95) * 1000
+    }
+
+    # Split mean latency into time spent in the model and our own overhead
+    model_calls = provider_after.get('calls', 0) - provider_before.get('calls', 0)
+    if model_calls > 0:
+        model_seconds = provider_after.get('model_seconds', 0.0) - provider_before.get('model_seconds', 0.0)
+        summary["model_calls"] = model_calls
+        summary["mean_model_ms"] = model_seconds * 1000 / model_calls
+        summary["mean_overhead_ms"] = summary["mean_ms"] - summary["mean_model_ms"]
+
+    return summary
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description="Load test the AI service endpoints")
+    parser.add_argument('--url', default='http://localhost:5001', help="Service base URL")
+    parser.add_argument('--endpoint', default='/chat', help="Endpoint to exercise")
+    parser.add_argument('--concurrency', type=int, default=20, help="Concurrent clients")
+    parser.add_argument('--requests', type=int, default=200, help="Total requests")
+    parser.add_argument('--stream', action='store_true', help="Request streamed responses (/chat)")
+    args = parser.parse_args()
+
+    mode = "streamed" if args.stream else "buffered"
+    print(f"🔥 Load testing {args.url}{args.endpoint} ({args.requests} {mode} requests, {args.concurrency} concurrent)")
+    summary = run_load_test(args.url, args.endpoint, args.concurrency, args.requests, stream=args.stream)
+    print("=" * 50)
+    for key, value in summary.items():
+        print(f"   {key}: {value:.2f}" if isinstance(value, float) else f"   {key}: {value}")
@@ -0,0 +1,81 @@
+import argparse
+import os
+
+# Inference backends for the transformers pipelines (AI_MODEL_BACKEND):
+#   pytorch    full-precision PyTorch weights (default)
+#   quantized  PyTorch with int8 dynamic quantization of the Linear layers
+#   onnx       ONNX Runtime via optimum, using model_quantized.onnx when it has been exported
+BACKENDS = ("pytorch", "quantized", "onnx")
+
+QUANTIZED_ONNX_FILE = "model_quantized.onnx"
+
+def resolve_model_source(model_id, model_dir=None):
+    """Local copy of ``model_id`` under ``model_dir`` if present, else the hub id
+
+    ``model_dir`` holds one folder per model, named after the last part of the id
+    (e.g. ``models/bart-large-mnli``).
+    """
+    if model_dir:
+        local_path = os.path.join(model_dir, model_id.split("/")[-1])
+        if os.path.isdir(local_path):
+            return local_path
+    return model_id
+
+def load_pipeline(task, model_id, backend="pytorch", model_dir=None):
+    """Build a transformers pipeline for ``task`` on the selected CPU backend"""
+    from transformers import AutoTokenizer, pipeline
+
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown AI_MODEL_BACKEND: {backend}")
+
+    source = resolve_model_source(model_id, model_dir)
+    if backend == "pytorch":
+        return pipeline(task, model=source)
+
+    tokenizer = AutoTokenizer.from_pretrained(source)
+
+    if backend == "quantized":
+        import torch
+        from transformers import AutoModelForSequenceClassification
+
+        model = AutoModelForSequenceClassification.from_pretrained(source)
+        model = torch.quantization.quantize_dynamic(model, {torch.nn.Linear}, dtype=torch.qint8)
+        return pipeline(task, model=model, tokenizer=tokenizer)
+
+    from optimum.onnxruntime import ORTModelForSequenceClassification
+
+    if os.path.isfile(os.path.join(source, QUANTIZED_ONNX_FILE)):
+        model = ORTModelForSequenceClassification.from_pretrained(source, file_name=QUANTIZED_ONNX_FILE)
+    else:
+        # Not exported yet: convert the PyTorch weights in memory (slow, full precision)
+        model = ORTModelForSequenceClassification.from_pretrained(source, export=True)
+    return pipeline(task, model=model, tokenizer=tokenizer)
+
+def export_onnx(model_id, model_dir):
+    """Export ``model_id`` to ONNX under ``model_dir`` and add an int8 dynamic-quantized copy"""
+    from optimum.onnxruntime import ORTModelForSequenceClassification, ORTQuantizer
+    from optimum.onnxruntime.configuration import AutoQuantizationConfig
+    from transformers import AutoTokenizer
+
+    output_dir = os.path.join(model_dir, model_id.split("/")[-1])
+    model = ORTModelForSequenceClassification.from_pretrained(model_id, export=True)
+    model.save_pretrained(output_dir)
+    AutoTokenizer.from_pretrained(model_id).save_pretrained(output_dir)
+
+    quantizer = ORTQuantizer.from_pretrained(output_dir)
+    quantization_config = AutoQuantizationConfig.avx2(is_static=False, per_channel=False)
+    quantizer.quantize(save_dir=output_dir, quantization_config=quantization_config)
+    return output_dir
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Export the service models to quantized ONNX")
+    parser.add_argument("--model-dir", default=os.getenv("AI_MODEL_DIR", "models"), help="Directory to write models to")
+    parser.add_argument("models", nargs="*", default=[
+        "cardiffnlp/twitter-roberta-base-sentiment-latest",
+        "facebook/bart-large-mnli"
+    ])
+    args = parser.parse_args()
+
+    for model_id in args.models:
+        print(f"📦 Exporting {model_id}...")
+        print(f"✅ Saved to {export_onnx(model_id, args.model_dir)}")
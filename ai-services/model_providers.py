@@ -0,0 +1,253 @@
+import asyncio
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+
+class ModelResponse:
+    """Minimal response object: the service only reads ``.text``"""
+
+    def __init__(self, text):
+        self.text = text
+
+class ModelProvider:
+    """
+    Base class for the model backends used by the AI service.
+    Providers expose the ``generate_content(contents, generation_config=None)`` interface of
+    ``genai.GenerativeModel`` and track how much time is spent inside the model itself, so
+    service overhead can be measured separately from model latency.
+    """
+
+    model_name = "unknown"
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.model_seconds = 0.0
+        self._stats_lock = threading.Lock()
+
+    def generate_content(self, contents, generation_config=None, **kwargs):
+        start = time.perf_counter()
+        try:
+            return self._generate(contents, generation_config, **kwargs)
+        except Exception:
+            with self._stats_lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._stats_lock:
+                self.calls += 1
+                self.model_seconds += time.perf_counter() - start
+
+    async def generate_content_async(self, contents, generation_config=None, **kwargs):
+        """Awaitable ``generate_content``; stats are shared with the blocking calls"""
+        start = time.perf_counter()
+        try:
+            return await self._generate_async(contents, generation_config, **kwargs)
+        except Exception:
+            with self._stats_lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._stats_lock:
+                self.calls += 1
+                self.model_seconds += time.perf_counter() - start
+
+    def generate_content_stream(self, contents, generation_config=None, **kwargs):
+        """Yield the response text in chunks as the model produces them"""
+        start = time.perf_counter()
+        try:
+            yield from self._generate_stream(contents, generation_config, **kwargs)
+        except Exception:
+            with self._stats_lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._stats_lock:
+                self.calls += 1
+                self.model_seconds += time.perf_counter() - start
+
+    async def generate_content_stream_async(self, contents, generation_config=None, **kwargs):
+        """Async iterator over the response text chunks"""
+        start = time.perf_counter()
+        try:
+            async for chunk in self._generate_stream_async(contents, generation_config, **kwargs):
+                yield chunk
+        except Exception:
+            with self._stats_lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._stats_lock:
+                self.calls += 1
+                self.model_seconds += time.perf_counter() - start
+
+    def _generate(self, contents, generation_config=None, **kwargs):
+        raise NotImplementedError
+
+    async def _generate_async(self, contents, generation_config=None, **kwargs):
+        # Providers without a native async client block a worker thread instead of the event loop
+        return await asyncio.to_thread(self._generate, contents, generation_config, **kwargs)
+
+    def _generate_stream(self, contents, generation_config=None, **kwargs):
+        # Providers without streaming deliver the whole response as one chunk
+        yield self._generate(contents, generation_config, **kwargs).text
+
+    async def _generate_stream_async(self, contents, generation_config=None, **kwargs):
+        yield (await self._generate_async(contents, generation_config, **kwargs)).text
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "provider": type(self).__name__,
+                "model": self.model_name,
+                "calls": self.calls,
+                "errors": self.errors,
+                "model_seconds": round(self.model_seconds, 4),
+                "avg_model_ms": round(self.model_seconds * 1000 / self.calls, 2) if self.calls else 0.0
+            }
+
+class GeminiProvider(ModelProvider):
+    """Google Gemini via google.generativeai, picking the first available preferred model"""
+
+    MODEL_PREFERENCES = [
+        'gemini-1.5-flash',         # Fast and efficient - best for API limits
+        'gemini-1.5-flash-latest',  # Latest flash version
+        'gemini-1.5-pro',           # Stable fallback
+        'gemini-2.0-flash'          # Newer flash model
+    ]
+
+    def __init__(self, api_key):
+        super().__init__()
+        import google.generativeai as genai
+
+        genai.configure(api_key=api_key)
+        self.model_name, self.model = self._select_model(genai)
+
+    def _select_model(self, genai):
+        """Try stable models with preference for faster, lighter versions"""
+        for model_name in self.MODEL_PREFERENCES:
+            try:
+                return model_name, genai.GenerativeModel(model_name)
+            except Exception as e:
+                print(f"⚠️ Model {model_name} not available: {str(e)[:100]}")
+
+        # Final fallback
+        return 'gemini-1.5-flash', genai.GenerativeModel('gemini-1.5-flash')
+
+    def _generate(self, contents, generation_config=None, **kwargs):
+        return self.model.generate_content(contents, generation_config=generation_config, **kwargs)
+
+    async def _generate_async(self, contents, generation_config=None, **kwargs):
+        return await self.model.generate_content_async(contents, generation_config=generation_config, **kwargs)
+
+    def _generate_stream(self, contents, generation_config=None, **kwargs):
+        response = self.model.generate_content(contents, generation_config=generation_config, stream=True, **kwargs)
+        for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+    async def _generate_stream_async(self, contents, generation_config=None, **kwargs):
+        response = await self.model.generate_content_async(
+            contents, generation_config=generation_config, stream=True, **kwargs
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+class FakeModelProvider(ModelProvider):
+    """
+    Deterministic local stand-in for Gemini, for offline runs and load tests.
+    The response text is a JSON document derived from a hash of the prompt; latency,
+    jitter and error rate are configurable and drawn from a seeded generator.
+    Streamed responses arrive in ``stream_chunks`` pieces with the latency spread evenly
+    between them.
+    """
+
+    model_name = "fake-model"
+    stream_chunks = 8
+
+    def __init__(self, latency_ms=0.0, jitter_ms=0.0, error_rate=0.0, seed=0):
+        super().__init__()
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._random_lock = threading.Lock()
+
+    @staticmethod
+    def prompt_digest(contents):
+        """Hash the text parts of a prompt; non-text parts (images) contribute their type"""
+        parts = contents if isinstance(contents, (list, tuple)) else [contents]
+        digest = hashlib.sha256()
+        for part in parts:
+            digest.update(part.encode("utf-8") if isinstance(part, str) else type(part).__name__.encode("utf-8"))
+        return digest.hexdigest()
+
+    def _draw(self):
+        with self._random_lock:
+            delay_ms = self.latency_ms + self._random.uniform(0, self.jitter_ms)
+            fail = self._random.random() < self.error_rate
+        return delay_ms, fail
+
+    def _respond(self, contents, fail):
+        if fail:
+            raise RuntimeError("Injected error from fake model provider")
+
+        digest = self.prompt_digest(contents)
+        return ModelResponse(json.dumps({
+            "fake_response": True,
+            "prompt_digest": digest[:16],
+            "message": "Deterministic response from the local fake model",
+            "score": int(digest[:4], 16) / 0xFFFF
+        }))
+
+    def _generate(self, contents, generation_config=None, **kwargs):
+        delay_ms, fail = self._draw()
+        if delay_ms > 0:
+            time.sleep(delay_ms / 1000)
+        return self._respond(contents, fail)
+
+    async def _generate_async(self, contents, generation_config=None, **kwargs):
+        delay_ms, fail = self._draw()
+        if delay_ms > 0:
+            await asyncio.sleep(delay_ms / 1000)
+        return self._respond(contents, fail)
+
+    def _stream_chunks(self, text):
+        size = -(-len(text) // self.stream_chunks)
+        return [text[i:i + size] for i in range(0, len(text), size)]
+
+    def _generate_stream(self, contents, generation_config=None, **kwargs):
+        delay_ms, fail = self._draw()
+        chunks = self._stream_chunks(self._respond(contents, fail).text)
+        for chunk in chunks:
+            if delay_ms > 0:
+                time.sleep(delay_ms / len(chunks) / 1000)
+            yield chunk
+
+    async def _generate_stream_async(self, contents, generation_config=None, **kwargs):
+        delay_ms, fail = self._draw()
+        chunks = self._stream_chunks(self._respond(contents, fail).text)
+        for chunk in chunks:
+            if delay_ms > 0:
+                await asyncio.sleep(delay_ms / len(chunks) / 1000)
+            yield chunk
+
+def create_provider(api_key=None):
+    """Build the provider selected by AI_MODEL_PROVIDER ('gemini' or 'fake')"""
+    provider_name = os.getenv('AI_MODEL_PROVIDER', 'gemini').lower()
+
+    if provider_name == 'fake':
+        return FakeModelProvider(
+            latency_ms=float(os.getenv('FAKE_MODEL_LATENCY_MS', '0')),
+            jitter_ms=float(os.getenv('FAKE_MODEL_JITTER_MS', '0')),
+            error_rate=float(os.getenv('FAKE_MODEL_ERROR_RATE', '0')),
+            seed=int(os.getenv('FAKE_MODEL_SEED', '0'))
+        )
+    if provider_name == 'gemini':
+        return GeminiProvider(api_key)
+
+    raise ValueError(f"Unknown AI_MODEL_PROVIDER: {provider_name}")
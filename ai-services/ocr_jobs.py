@@ -0,0 +1,407 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict, deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures.process import BrokenProcessPool
+
+from document_pipeline import extract_pdf_page, ocr_pdf_page, open_pdf, parse_document_text, pdf_text_layer, process_document
+
+# Worker processes for OCR jobs, and how many jobs may wait for one before submissions are refused
+OCR_WORKERS = int(os.getenv('OCR_WORKERS') or os.cpu_count() or 1)
+OCR_QUEUE_SIZE = int(os.getenv('OCR_QUEUE_SIZE', '64'))
+
+class QueueFull(Exception):
+    """Raised when a submission would exceed the queue bound; retry after ``retry_after`` seconds"""
+
+    def __init__(self, retry_after):
+        super().__init__("OCR queue is full")
+        self.retry_after = retry_after
+
+def _run_job(data, doc_type):
+    """Worker process entry point: the parsed document, stage timings and the start time"""
+    started_at = time.time()
+    timings = {}
+    try:
+        result = process_document(data, doc_type, timings)
+    except Exception as e:
+        raise _portable_error(e) from None
+    return result, timings, started_at
+
+def _run_pdf_page(page_data):
+    """Worker process entry point for one PDF page without a text layer, as a single-page PDF"""
+    started_at = time.time()
+    timings = {}
+    try:
+        text = ocr_pdf_page(page_data, 0, timings)
+    except Exception as e:
+        raise _portable_error(e) from None
+    return text, timings, started_at
+
+def _portable_error(e):
+    # Exceptions are pickled back to the service; one that can't be unpickled (pytesseract's
+    # TesseractNotFoundError) breaks the whole pool and fails every other job with it
+    return RuntimeError(f"{type(e).__name__}: {e}")
+
+class OcrJob:
+    __slots__ = ("id", "doc_type", "filename", "status", "result", "error", "timings",
+                 "submitted_at", "finished_at", "done", "cache_key", "cached")
+
+    def __init__(self, doc_type, filename, cache_key=None):
+        self.id = uuid.uuid4().hex
+        self.doc_type = doc_type
+        self.filename = filename
+        self.status = "pending"
+        self.result = None
+        self.error = None
+        self.timings = {}
+        self.submitted_at = time.time()
+        self.finished_at = None
+        self.done = threading.Event()
+        self.cache_key = cache_key
+        self.cached = False
+
+    def to_dict(self):
+        job = {
+            "job_id": self.id,
+            "status": self.status,
+            "document_type": self.doc_type,
+            "filename": self.filename,
+            "timings": self.timings
+        }
+        if self.status == "done":
+            job["extracted_data"] = self.result
+            job["cached"] = self.cached
+        elif self.status == "failed":
+            job["error"] = self.error
+        return job
+
+class _PdfPageRun:
+    """
+    The OCR'd pages of one PDF, kept on the pool ``window`` at a time: each finished page hands
+    its queue slot to the next one, and the last pages give theirs back. Outcomes arrive on
+    ``results`` as ``(page_number, future, submitted_at)``. Once ``abandon`` is called no more
+    pages are started.
+    """
+
+    def __init__(self, jobs, page_data, window):
+        self.jobs = jobs
+        self.page_data = page_data
+        self.remaining = deque(sorted(page_data))
+        self.results = queue.Queue()
+        self.in_flight = set()
+        self.abandoned = False
+        self._lock = threading.Lock()
+        for _ in range(window):
+            self._submit_next()
+
+    def _submit_next(self):
+        with self._lock:
+            number = self.remaining.popleft() if self.remaining and not self.abandoned else None
+        if number is None:
+            self.jobs._release()
+            return
+
+        submitted_at = time.time()
+        try:
+            future = self.jobs._submit_to_pool(_run_pdf_page, self.page_data.pop(number))
+        except Exception as e:
+            # The pool is shut down or broken; report the page and hand the slot on
+            self.results.put((number, e, submitted_at))
+            self._submit_next()
+            return
+        with self._lock:
+            self.in_flight.add(future)
+        future.add_done_callback(lambda future: self._page_done(number, future, submitted_at))
+
+    def _page_done(self, number, future, submitted_at):
+        with self._lock:
+            self.in_flight.discard(future)
+        self.results.put((number, future, submitted_at))
+        self._submit_next()
+
+    def abandon(self):
+        """Start no more pages and drop those still queued on the pool"""
+        with self._lock:
+            self.abandoned = True
+            in_flight = list(self.in_flight)
+        for future in in_flight:
+            future.cancel()
+
+class OcrJobQueue:
+    """
+    OCR jobs run on a process pool, so documents are decoded and recognized on every core
+    without holding request threads or the GIL. At most ``queue_size`` jobs may be unfinished;
+    beyond that ``submit`` raises QueueFull. The newest ``max_finished`` finished jobs are
+    kept for polling. The pool is started on the first submission.
+    With a ``cache`` (DocumentCache), documents seen before are answered from it without
+    queueing, and new results are stored in it.
+    """
+
+    def __init__(self, workers=OCR_WORKERS, queue_size=OCR_QUEUE_SIZE, max_finished=1024, cache=None):
+        self.workers = workers
+        self.cache = cache
+        self.queue_size = queue_size
+        self.max_finished = max_finished
+        self._executor = None
+        self._jobs = OrderedDict()
+        self._pending = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._pdf_pages = {"text_layer": 0, "ocr": 0}
+        self._stage_totals = {}
+        self._lock = threading.Lock()
+
+    def _pool(self):
+        with self._lock:
+            if self._executor is None:
+                # Spawned workers don't inherit the service's threads or locks
+                self._executor = ProcessPoolExecutor(self.workers, mp_context=multiprocessing.get_context("spawn"))
+            return self._executor
+
+    def warmup(self):
+        """Start the worker processes now rather than on the first document"""
+        executor = self._pool()
+        for _ in range(self.workers):
+            executor.submit(os.getpid)
+
+    def submit(self, data, doc_type, filename=None):
+        """Queue one document and return its job"""
+        return self.submit_many([(data, doc_type, filename)])[0]
+
+    def submit_many(self, documents):
+        """Queue ``(data, doc_type, filename)`` documents together: all are accepted or none are
+
+        Cached documents come back as finished jobs and don't count against the queue bound.
+        """
+        jobs = []
+        queued = []
+        for data, doc_type, filename in documents:
+            job = OcrJob(doc_type, filename, self.cache.make_key(data, doc_type) if self.cache else None)
+            jobs.append(job)
+            if job.cache_key is None or not self._finish_from_cache(job):
+                queued.append((job, data))
+
+        self._reserve(len(queued))
+        with self._lock:
+            for job in jobs:
+                self._jobs[job.id] = job
+
+        for index, (job, data) in enumerate(queued):
+            try:
+                future = self._submit_to_pool(_run_job, data, job.doc_type)
+            except Exception as e:
+                # The pool is shut down or broken: this job and the rest never run, so they
+                # fail now and give their slots back
+                for job, _ in queued[index:]:
+                    job.error = str(e)
+                    job.status = "failed"
+                    self._record_finished(job)
+                break
+            future.add_done_callback(lambda future, job=job: self._finish(job, future))
+        return jobs
+
+    def _finish_from_cache(self, job):
+        start = time.perf_counter()
+        result = self.cache.get(job.cache_key)
+        if result is None:
+            return False
+        job.result = result
+        job.timings = {"cache": round((time.perf_counter() - start) * 1000, 2)}
+        job.cached = True
+        job.status = "done"
+        job.finished_at = time.time()
+        job.done.set()
+        return True
+
+    def pdf_pages(self, data, doc_type):
+        """Process a PDF page-parallel; returns an iterator of results as they become available
+
+        Pages with a text layer are read directly; the others are rasterized and OCR'd on the
+        pool, one task per page, as many at a time as the queue bound has free slots (QueueFull
+        is raised here, before anything is yielded, only if none are free). Page results come first, in completion order, each with
+        its 1-based ``page`` number; the last item is the whole document parsed in page order.
+        """
+        cache_key = self.cache.make_key(data, doc_type) if self.cache else None
+        if cache_key is not None:
+            document = self.cache.get(cache_key)
+            if document is not None:
+                return iter([{**document, "cached": True}])
+
+        texts = {}
+        text_layer_ms = {}
+        with open_pdf(data) as document:
+            page_count = document.page_count
+            for page in document:
+                start = time.perf_counter()
+                text = pdf_text_layer(page)
+                if text is not None:
+                    texts[page.number] = text
+                    text_layer_ms[page.number] = round((time.perf_counter() - start) * 1000, 2)
+
+            # Each worker gets only its page, not the whole file
+            page_data = {number: extract_pdf_page(document, number) for number in range(page_count) if number not in texts}
+
+        ocr_pages = sorted(page_data)
+        window = self._reserve_up_to(len(ocr_pages))
+
+        with self._lock:
+            self._pdf_pages["text_layer"] += len(texts)
+            self._pdf_pages["ocr"] += len(ocr_pages)
+        run = _PdfPageRun(self, page_data, window)
+        return self._pdf_results(doc_type, page_count, texts, text_layer_ms, run, len(ocr_pages), cache_key)
+
+    def _pdf_results(self, doc_type, page_count, texts, text_layer_ms, run, ocr_count, cache_key):
+        try:
+            for number, text in sorted(texts.items()):
+                yield {
+                    "page": number + 1,
+                    "method": "text_layer",
+                    "extracted_data": parse_document_text(text, doc_type),
+                    "timings": {"text_layer": text_layer_ms[number]}
+                }
+
+            failed = False
+            for _ in range(ocr_count):
+                number, future, submitted_at = run.results.get()
+                try:
+                    if isinstance(future, Exception):
+                        raise future
+                    text, timings, started_at = future.result()
+                except Exception as e:
+                    failed = True
+                    yield {"page": number + 1, "method": "ocr", "error": str(e)}
+                    continue
+                texts[number] = text
+                yield {
+                    "page": number + 1,
+                    "method": "ocr",
+                    "extracted_data": parse_document_text(text, doc_type),
+                    "timings": {"queue": round((started_at - submitted_at) * 1000, 2), **timings}
+                }
+
+            document = {
+                "document": True,
+                "pages": page_count,
+                "text_layer_pages": len(text_layer_ms),
+                "ocr_pages": ocr_count,
+                "extracted_data": parse_document_text("\n".join(texts[number] for number in sorted(texts)), doc_type)
+            }
+            if cache_key is not None and not failed:
+                self._store(cache_key, document)
+            yield document
+        finally:
+            # The client went away or the stream was abandoned: drop pages not yet started
+            run.abandon()
+
+    def _reserve(self, count):
+        with self._lock:
+            if self._pending + count > self.queue_size:
+                self._rejected += count
+                raise QueueFull(self._retry_after())
+            self._pending += count
+
+    def _reserve_up_to(self, count):
+        """Reserve as many of ``count`` slots as are free; QueueFull only if none are"""
+        with self._lock:
+            granted = min(count, self.queue_size - self._pending)
+            if count and granted <= 0:
+                self._rejected += count
+                raise QueueFull(self._retry_after())
+            self._pending += granted
+            return granted
+
+    def _release(self):
+        with self._lock:
+            self._pending -= 1
+
+    def _submit_to_pool(self, fn, *args):
+        executor = self._pool()
+        try:
+            return executor.submit(fn, *args)
+        except BrokenProcessPool:
+            # A worker died (e.g. killed for memory); replace the pool once
+            with self._lock:
+                if self._executor is executor:
+                    self._executor = None
+            return self._pool().submit(fn, *args)
+
+    def _finish(self, job, future):
+        try:
+            result, timings, started_at = future.result()
+            job.result = result
+            job.timings = {"queue": round((started_at - job.submitted_at) * 1000, 2), **timings}
+            job.status = "done"
+        except Exception as e:
+            job.error = str(e)
+            job.status = "failed"
+        if job.status == "done" and job.cache_key is not None:
+            self._store(job.cache_key, job.result)
+        self._record_finished(job)
+
+    def _record_finished(self, job):
+        """Count a finished or failed job, free its queue slot and wake its waiters"""
+        job.finished_at = time.time()
+        with self._lock:
+            self._pending -= 1
+            if job.status == "done":
+                self._completed += 1
+                for stage, ms in job.timings.items():
+                    self._stage_totals[stage] = self._stage_totals.get(stage, 0.0) + ms
+            else:
+                self._failed += 1
+            self._evict_finished()
+        job.done.set()
+
+    def _store(self, cache_key, result):
+        try:
+            self.cache.set(cache_key, result)
+        except OSError as e:
+            print(f"⚠️ Could not cache document result: {e}")
+
+    def _evict_finished(self):
+        finished = len(self._jobs) - self._pending
+        for job_id in list(self._jobs):
+            if finished <= self.max_finished:
+                break
+            if self._jobs[job_id].finished_at is not None:
+                del self._jobs[job_id]
+                finished -= 1
+
+    def _retry_after(self):
+        """Rough seconds until a slot frees up, from the average job time so far"""
+        if not self._completed:
+            return 1
+        work_ms = sum(total for stage, total in self._stage_totals.items() if stage != "queue")
+        average_seconds = work_ms / self._completed / 1000
+        return max(1, round(average_seconds * self._pending / self.workers))
+
+    def get(self, job_id):
+        return self._jobs.get(job_id)
+
+    def wait(self, job, timeout=None):
+        """Block until ``job`` finishes or ``timeout`` seconds pass; True if it finished"""
+        return job.done.wait(timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "pending": self._pending,
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "pdf_pages": dict(self._pdf_pages),
+                "avg_stage_ms": {
+                    stage: round(total / self._completed, 2) for stage, total in self._stage_totals.items()
+                } if self._completed else {}
+            }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,116 @@
+import threading
+from collections import OrderedDict
+
+def normalize_text(text):
+    """Cache key for a sentence: case-folded with whitespace collapsed"""
+    return " ".join(text.casefold().split())
+
+class CachedTextPipeline:
+    """
+    Per-sentence LRU cache in front of a Hugging Face text pipeline.
+    Sentences are keyed in normalized form, so repeated or common preference phrases are
+    answered without inference; a miss runs the model on the first original text seen for
+    its key, since models such as the cased RoBERTa sentiment model are case-sensitive. Misses from one call
+    are deduplicated and run through the pipeline together, shortest first, so each
+    batch pads to a similar length.
+    """
+
+    def __init__(self, pipeline, max_entries=2048, batch_size=16, **call_kwargs):
+        self.pipeline = pipeline
+        self.max_entries = max_entries
+        self.batch_size = batch_size
+        self.call_kwargs = call_kwargs
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()  # normalized text -> pipeline result
+        self._lock = threading.Lock()
+
+    def __call__(self, texts, batch_size=None):
+        """Results for ``texts`` in order; a single string returns a single result"""
+        if isinstance(texts, str):
+            return self([texts], batch_size)[0]
+
+        keys = [normalize_text(text) for text in texts]
+        results = {}
+        with self._lock:
+            for key in keys:
+                if key in results:
+                    continue
+                result = self._entries.get(key)
+                if result is not None:
+                    self._entries.move_to_end(key)
+                    results[key] = result
+                    self.hits += 1
+
+        originals = {}
+        for key, text in zip(keys, texts):
+            if key not in results:
+                originals.setdefault(key, text)
+        pending = sorted(originals, key=lambda key: len(originals[key]))
+        if pending:
+            computed = self._run([originals[key] for key in pending], batch_size or self.batch_size)
+            with self._lock:
+                self.misses += len(pending)
+                for key, result in zip(pending, computed):
+                    self._entries[key] = result
+                    self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+            results.update(zip(pending, computed))
+
+        return [results[key] for key in keys]
+
+    def _run(self, texts, batch_size):
+        outputs = self.pipeline(texts, batch_size=batch_size, **self.call_kwargs)
+        if isinstance(outputs, dict):  # some versions unwrap single-item batches
+            outputs = [outputs]
+        return [output[0] if isinstance(output, list) else output for output in outputs]
+
+    def cache_info(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "misses": self.misses
+            }
+
+    def cache_clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = 0
+            self.misses = 0
+
+class CachedZeroShotClassifier(CachedTextPipeline):
+    """
+    Zero-shot classifier bound to a fixed label set.
+    The label side (candidate labels, hypothesis template and the templated hypotheses)
+    is fixed at construction, and a sentence's ``{"labels", "scores"}`` result is cached
+    for that label set. NLI models such as bart-large-mnli encode each premise/hypothesis
+    pair jointly, so the hypotheses cannot be encoded once and reused across sentences;
+    skipping repeated sentences is where the saving comes from.
+    """
+
+    def __init__(self, pipeline, candidate_labels, hypothesis_template="This example is {}.",
+                 multi_label=False, max_entries=2048, batch_size=16):
+        super().__init__(pipeline, max_entries=max_entries, batch_size=batch_size)
+        self.candidate_labels = list(candidate_labels)
+        self.hypothesis_template = hypothesis_template
+        self.multi_label = multi_label
+        self.hypotheses = [hypothesis_template.format(label) for label in self.candidate_labels]
+
+    def _run(self, texts, batch_size):
+        outputs = self.pipeline(
+            texts,
+            self.candidate_labels,
+            hypothesis_template=self.hypothesis_template,
+            multi_label=self.multi_label,
+            batch_size=batch_size
+        )
+        if isinstance(outputs, dict):
+            outputs = [outputs]
+        return [{"labels": output["labels"], "scores": output["scores"]} for output in outputs]
+
+    def label_scores(self, texts, batch_size=None):
+        """Per-sentence ``{label: score}`` dicts in candidate label order"""
+        return [dict(zip(result["labels"], result["scores"])) for result in self(texts, batch_size)]
@@ -0,0 +1,323 @@
+import json
+import os
+import threading
+import time
+
+from keyword_matcher import analyze_keywords
+
+# Shared by every service variant: answer from the cheapest tier whose confidence reaches the
+# threshold, escalating keywords -> local transformers models -> Gemini only on low confidence
+CONFIDENCE_THRESHOLD = float(os.getenv('PREFERENCE_CONFIDENCE_THRESHOLD', '0.7'))
+
+# Keyword hits are never treated as fully certain
+KEYWORD_MAX_CONFIDENCE = 0.9
+
+# Minimum sentiment score and label entailment probability used by the local models tier
+SENTIMENT_THRESHOLD = 0.6
+LABEL_THRESHOLD = 0.5
+
+SUBJECT_LABELS = [
+    'mathematics', 'math', 'physics', 'chemistry', 'biology',
+    'computer science', 'programming', 'history', 'english',
+    'literature', 'economics', 'sociology', 'psychology'
+]
+
+TIME_LABELS = [
+    'morning', 'afternoon', 'evening', 'early morning',
+    'late evening', 'monday', 'tuesday', 'wednesday', 'thursday', 'friday'
+]
+
+GEMINI_PREFERENCE_PROMPT = """
+        You are an advanced AI educational advisor with deep understanding of student psychology and learning patterns.
+        Analyze the following student preferences and provide comprehensive insights:
+
+        Student Input: "{preferences_text}"
+
+        Please provide a detailed JSON response with enhanced analysis:
+        {{
+            "liked_subjects": ["list of subjects the student enjoys with confidence scores"],
+            "disliked_subjects": ["list of subjects the student dislikes with reasoning"],
+            "preferred_times": ["optimal class times based on psychological patterns"],
+            "disliked_times": ["times to avoid with productivity impact analysis"],
+            "learning_style": {{
+                "primary_style": "visual/auditory/kinesthetic/reading",
+                "secondary_traits": ["detailed learning preferences"],
+                "optimal_environment": "description of ideal study conditions"
+            }},
+            "attendance_patterns": {{
+                "predicted_behavior": "detailed attendance prediction",
+                "risk_assessment": "low/medium/high with factors",
+                "seasonal_variations": "how attendance might vary by semester periods"
+            }},
+            "motivation_factors": {{
+                "intrinsic": ["internal motivators like interest, curiosity"],
+                "extrinsic": ["external motivators like grades, career goals"],
+                "social": ["peer influence, group dynamics"]
+            }},
+            "risk_factors": {{
+                "high_risk": ["major factors that could cause skipping"],
+                "medium_risk": ["moderate concerns to monitor"],
+                "mitigation_strategies": ["specific recommendations to address risks"]
+            }},
+            "personality_assessment": {{
+                "academic_persona": "detailed academic personality type",
+                "stress_response": "how they handle academic pressure",
+                "goal_orientation": "achievement vs. mastery focused",
+                "time_management_style": "procrastinator vs. planner"
+            }},
+            "personalized_recommendations": {{
+                "attendance_strategy": "specific tactics for maintaining attendance",
+                "study_optimization": "how to maximize learning efficiency",
+                "schedule_recommendations": "ideal weekly schedule structure",
+                "wellness_tips": "maintaining balance and preventing burnout"
+            }},
+            "behavioral_insights": {{
+                "decision_making_patterns": "how they make attendance decisions",
+                "energy_cycles": "daily and weekly energy patterns",
+                "social_influences": "impact of friends and environment"
+            }}
+        }}
+
+        Use advanced reasoning to provide deep, actionable insights that go beyond surface-level analysis.
+        Be specific, practical, and psychologically informed. Return only valid JSON.
+        """
+
+GEMINI_PREFERENCE_CONFIG = {
+    "temperature": 0.7,  # Balanced creativity and consistency
+    "top_p": 0.8,        # Focused but diverse responses
+    "top_k": 40,         # Good balance of options
+    "max_output_tokens": 4096,  # Comprehensive responses
+    "response_mime_type": "application/json"  # Force JSON output
+}
+
+def empty_preferences():
+    return {
+        'liked_subjects': [],
+        'disliked_subjects': [],
+        'liked_times': [],
+        'disliked_times': [],
+        'general_sentiment': 'neutral',
+        'confidence_score': 0.0
+    }
+
+def _general_sentiment(preferences):
+    liked = len(preferences['liked_subjects']) + len(preferences['liked_times'])
+    disliked = len(preferences['disliked_subjects']) + len(preferences['disliked_times'])
+    if liked > disliked:
+        return 'positive'
+    if disliked > liked:
+        return 'negative'
+    return 'neutral'
+
+def load_local_models(backend='pytorch', model_dir=None, batch_size=16, cache_entries=2048):
+    """Cached sentiment pipeline and multi-label subject/time classifier for the local models tier"""
+    from model_backends import load_pipeline
+    from pipeline_cache import CachedTextPipeline, CachedZeroShotClassifier
+
+    sentiment_analyzer = CachedTextPipeline(
+        load_pipeline(
+            "sentiment-analysis", "cardiffnlp/twitter-roberta-base-sentiment-latest",
+            backend=backend, model_dir=model_dir
+        ),
+        max_entries=cache_entries,
+        batch_size=batch_size
+    )
+    # Subject and time labels are scored together in one multi-label pass
+    text_classifier = CachedZeroShotClassifier(
+        load_pipeline(
+            "zero-shot-classification", "facebook/bart-large-mnli",
+            backend=backend, model_dir=model_dir
+        ),
+        SUBJECT_LABELS + TIME_LABELS,
+        hypothesis_template="This text mentions {}.",
+        multi_label=True,
+        max_entries=cache_entries,
+        batch_size=batch_size
+    )
+    return sentiment_analyzer, text_classifier
+
+class KeywordTier:
+    """Compiled keyword matching; confidence is the share of keyword sentences it could decide"""
+
+    name = "keywords"
+
+    def available(self):
+        return True
+
+    def analyze(self, text):
+        matched, decided, ambiguous = analyze_keywords(text, clauses=True)
+        preferences = empty_preferences()
+        preferences.update(matched)
+        if decided + ambiguous:
+            preferences['confidence_score'] = KEYWORD_MAX_CONFIDENCE * decided / (decided + ambiguous)
+        return preferences
+
+class LocalModelTier:
+    """
+    Transformers sentiment plus zero-shot subject/time labels, per sentence.
+    ``get_models`` returns ``(sentiment_analyzer, text_classifier)`` as built by
+    ``load_local_models``, or None while the models are unavailable (the tier is skipped).
+    Confidence is the mean sentiment score over the sentences.
+    """
+
+    name = "local_model"
+
+    def __init__(self, get_models):
+        self.get_models = get_models
+
+    def available(self):
+        return self.get_models() is not None
+
+    def analyze(self, text):
+        sentiment_analyzer, text_classifier = self.get_models()
+        sentences = [sentence for sentence in text.split('.') if sentence.strip()]
+        sentiments, label_scores = run_local_models(sentiment_analyzer, text_classifier, sentences)
+
+        preferences = empty_preferences()
+        total_confidence = 0.0
+        for sentiment, scores in zip(sentiments, label_scores):
+            confidence = sentiment['score']
+            total_confidence += confidence
+            label = sentiment['label'].lower()
+            if confidence <= SENTIMENT_THRESHOLD or label not in ('label_2', 'positive', 'label_0', 'negative'):
+                continue
+
+            prefix = 'liked' if label in ('label_2', 'positive') else 'disliked'
+            for labels, key in ((SUBJECT_LABELS, f'{prefix}_subjects'), (TIME_LABELS, f'{prefix}_times')):
+                best, score = max(((candidate, scores[candidate]) for candidate in labels), key=lambda item: item[1])
+                if score > LABEL_THRESHOLD and best not in preferences[key]:
+                    preferences[key].append(best)
+
+        preferences['confidence_score'] = total_confidence / max(len(sentences), 1)
+        return preferences
+
+def run_local_models(sentiment_analyzer, text_classifier, sentences, batch_size=None):
+    """Sentiment results and ``{label: score}`` dicts for each sentence, in sentence order"""
+    if not sentences:
+        return [], []
+    return sentiment_analyzer(sentences, batch_size), text_classifier.label_scores(sentences, batch_size)
+
+class GeminiTier:
+    """
+    Full Gemini analysis. ``generate_text(prompt, generation_config)`` returns the response text;
+    the complete analysis is kept under ``details``.
+    """
+
+    name = "gemini"
+
+    def __init__(self, generate_text):
+        self.generate_text = generate_text
+
+    def available(self):
+        return True
+
+    def analyze(self, text):
+        response_text = self.generate_text(
+            GEMINI_PREFERENCE_PROMPT.format(preferences_text=text), GEMINI_PREFERENCE_CONFIG
+        )
+        preferences = empty_preferences()
+        try:
+            analysis = json.loads(response_text)
+        except json.JSONDecodeError:
+            # Fallback if Gemini doesn't return valid JSON
+            preferences['details'] = {"raw_analysis": response_text}
+            preferences['confidence_score'] = 0.5
+            return preferences
+
+        if not isinstance(analysis, dict):
+            analysis = {"analysis": analysis}
+        preferences['liked_subjects'] = analysis.get('liked_subjects', [])
+        preferences['disliked_subjects'] = analysis.get('disliked_subjects', [])
+        preferences['liked_times'] = analysis.get('preferred_times', [])
+        preferences['disliked_times'] = analysis.get('disliked_times', [])
+        preferences['details'] = analysis
+        preferences['confidence_score'] = 0.95
+        return preferences
+
+class PreferenceEngine:
+    """
+    Runs the tiers cheapest first and returns the first result whose confidence reaches
+    ``confidence_threshold``. Unavailable or failing tiers are passed over; if no tier is
+    confident enough the most confident result is returned. Counts and latencies are kept
+    per tier for ``stats()``.
+    """
+
+    def __init__(self, tiers, confidence_threshold=CONFIDENCE_THRESHOLD):
+        self.tiers = tiers
+        self.confidence_threshold = confidence_threshold
+        self._stats = {
+            tier.name: {"calls": 0, "answered": 0, "low_confidence": 0, "errors": 0, "skipped": 0,
+                        "total_seconds": 0.0, "max_seconds": 0.0}
+            for tier in tiers
+        }
+        self._lock = threading.Lock()
+
+    def analyze(self, text):
+        """Unified preferences dict with ``processing_method`` and ``tiers_tried``"""
+        best = None
+        tried = []
+
+        for tier in self.tiers:
+            if not tier.available():
+                self._record(tier.name, "skipped")
+                continue
+
+            tried.append(tier.name)
+            start = time.perf_counter()
+            try:
+                preferences = tier.analyze(text)
+            except Exception as e:
+                print(f"⚠️ Preference tier {tier.name} failed: {e}")
+                self._record(tier.name, "errors", time.perf_counter() - start)
+                continue
+            elapsed = time.perf_counter() - start
+
+            preferences['processing_method'] = tier.name
+            if best is None or preferences['confidence_score'] > best['confidence_score']:
+                best = preferences
+            if preferences['confidence_score'] >= self.confidence_threshold:
+                self._record(tier.name, "answered", elapsed)
+                break
+            self._record(tier.name, "low_confidence", elapsed)
+
+        if best is None:
+            raise RuntimeError("No preference analysis tier is available")
+
+        best['general_sentiment'] = _general_sentiment(best)
+        best['tiers_tried'] = tried
+        return best
+
+    def _record(self, tier_name, outcome, seconds=None):
+        with self._lock:
+            stats = self._stats[tier_name]
+            stats[outcome] += 1
+            if seconds is not None:
+                stats["calls"] += 1
+                stats["total_seconds"] += seconds
+                stats["max_seconds"] = max(stats["max_seconds"], seconds)
+
+    def stats(self):
+        with self._lock:
+            return {
+                name: {
+                    "calls": stats["calls"],
+                    "answered": stats["answered"],
+                    "low_confidence": stats["low_confidence"],
+                    "errors": stats["errors"],
+                    "skipped": stats["skipped"],
+                    "avg_ms": round(stats["total_seconds"] * 1000 / stats["calls"], 2) if stats["calls"] else 0.0,
+                    "max_ms": round(stats["max_seconds"] * 1000, 2)
+                }
+                for name, stats in self._stats.items()
+            }
+
+def preference_response(engine, preferences_text):
+    """JSON body shared by the services' /process-preferences endpoints"""
+    analyzed_preferences = engine.analyze(preferences_text)
+    return {
+        "success": True,
+        "analysis_method": analyzed_preferences['processing_method'],
+        "analyzed_preferences": analyzed_preferences,
+        "confidence_score": analyzed_preferences['confidence_score'],
+        "original_text": preferences_text
+    }
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+class ResponseCache:
+    """
+    Content-addressed cache for model responses.
+    Entries are keyed on a hash of model name + prompt + generation config, expire after a TTL,
+    are evicted least-recently-used beyond ``max_entries`` and can be persisted to SQLite so
+    they survive restarts.
+    """
+
+    def __init__(self, max_entries=512, ttl_seconds=3600, db_path=None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._entries = OrderedDict()  # key -> (created_at, text)
+        self._lock = threading.Lock()
+        self._db = None
+
+        if db_path:
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("CREATE TABLE IF NOT EXISTS responses (key TEXT PRIMARY KEY, created_at REAL, text TEXT)")
+            self._db.execute("DELETE FROM responses WHERE created_at < ?", (time.time() - ttl_seconds,))
+            rows = self._db.execute(
+                "SELECT key, created_at, text FROM responses ORDER BY created_at DESC LIMIT ?", (max_entries,)
+            ).fetchall()
+            for key, created_at, text in reversed(rows):
+                self._entries[key] = (created_at, text)
+            self._db.commit()
+
+    @staticmethod
+    def make_key(model_name, prompt, generation_config=None):
+        """Hash the exact request so only byte-identical calls share an entry"""
+        payload = json.dumps(
+            {"model": model_name, "prompt": prompt, "generation_config": generation_config},
+            sort_keys=True, default=str
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """Return the cached text for ``key``, or None on a miss or expired entry"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and time.time() - entry[0] > self.ttl_seconds:
+                self._remove(key)
+                if self._db is not None:
+                    self._db.commit()
+                entry = None
+
+            if entry is None:
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def set(self, key, text):
+        with self._lock:
+            created_at = time.time()
+            self._entries[key] = (created_at, text)
+            self._entries.move_to_end(key)
+            if self._db is not None:
+                self._db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?)", (key, created_at, text))
+
+            while len(self._entries) > self.max_entries:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self.evictions += 1
+
+            if self._db is not None:
+                self._db.commit()
+
+    def _remove(self, key):
+        self._entries.pop(key, None)
+        if self._db is not None:
+            self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl_seconds,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "persistent": self._db is not None
+            }
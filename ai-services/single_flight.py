@@ -0,0 +1,84 @@
+import asyncio
+import threading
+
+class _Call:
+    __slots__ = ("done", "result", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share a key: the first caller runs the function and
+    everyone who arrives while it is in flight waits for, and shares, its result or
+    exception. Nothing is kept once the call finishes; pair with ResponseCache for that.
+    """
+
+    def __init__(self):
+        self.executions = 0
+        self.coalesced = 0
+        self._calls = {}
+        self._async_calls = {}
+        self._lock = threading.Lock()
+
+    def do(self, key, fn):
+        """Return ``fn()``, sharing one execution among concurrent callers with ``key``"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+                self.executions += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = fn()
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
+
+    async def do_async(self, key, coroutine_fn):
+        """Awaitable ``do``: ``await coroutine_fn()`` runs once per key among concurrent awaiters
+
+        The call runs in its own task rather than the first caller's, and every caller awaits
+        it shielded, so a caller being cancelled (its client disconnected) doesn't cancel it
+        for the others.
+        """
+        with self._lock:
+            task = self._async_calls.get(key)
+            if task is None:
+                task = self._async_calls[key] = asyncio.ensure_future(coroutine_fn())
+                task.add_done_callback(lambda task: self._forget_async(key, task))
+                self.executions += 1
+            else:
+                self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def _forget_async(self, key, task):
+        with self._lock:
+            if self._async_calls.get(key) is task:
+                del self._async_calls[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here, so a failure every caller abandoned isn't logged as unhandled
+
+    def stats(self):
+        with self._lock:
+            return {
+                "executions": self.executions,
+                "coalesced": self.coalesced,
+                "in_flight": len(self._calls) + len(self._async_calls)
+            }
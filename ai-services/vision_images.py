@@ -0,0 +1,51 @@
+import io
+import os
+import statistics
+
+from PIL import Image, ImageChops, ImageOps
+
+# Longest side of the image sent to Gemini Vision; timetable text stays legible well below
+# phone-camera resolution, and every extra pixel is upload and inference time
+VISION_MAX_DIMENSION = int(os.getenv('VISION_MAX_DIMENSION', '1600'))
+VISION_JPEG_QUALITY = int(os.getenv('VISION_JPEG_QUALITY', '85'))
+
+# Content is whatever differs from the border colour by more than this (0-255), found on a
+# copy at most this many pixels across so sensor noise and paper texture average out
+CROP_THRESHOLD = 40
+CROP_DETECT_SIZE = 512
+CROP_MARGIN = 0.02
+
+def crop_to_content(gray):
+    """Crop a grayscale image to the region that differs from its border (desk, margins)"""
+    factor = max(1, max(gray.size) // CROP_DETECT_SIZE)
+    small = gray.reduce(factor)
+    width, height = small.size
+    border = (list(small.crop((0, 0, width, 1)).getdata()) + list(small.crop((0, height - 1, width, height)).getdata())
+              + list(small.crop((0, 0, 1, height)).getdata()) + list(small.crop((width - 1, 0, width, height)).getdata()))
+    background = Image.new("L", small.size, int(statistics.median(border)))
+    box = ImageChops.difference(small, background).point(lambda value: 255 if value > CROP_THRESHOLD else 0).getbbox()
+    if box is None:
+        return gray
+
+    margin = int(max(gray.size) * CROP_MARGIN)
+    left, top, right, bottom = (coordinate * factor for coordinate in box)
+    return gray.crop((max(0, left - margin), max(0, top - margin),
+                      min(gray.width, right + margin), min(gray.height, bottom + margin)))
+
+def prepare_vision_image(data, max_dimension=VISION_MAX_DIMENSION, quality=VISION_JPEG_QUALITY):
+    """Shrink an uploaded document photo into the blob sent to Gemini Vision
+
+    The image is turned upright from its EXIF orientation, converted to grayscale, cropped to
+    the document, downscaled so its longest side is at most ``max_dimension`` and re-encoded
+    as JPEG. Returns a ``{"mime_type", "data"}`` blob accepted by ``generate_content``.
+    """
+    image = Image.open(io.BytesIO(data))
+    # JPEGs are decoded straight to grayscale by libjpeg
+    image.draft("L", image.size)
+    image = ImageOps.exif_transpose(image).convert("L")
+    image = crop_to_content(image)
+    image.thumbnail((max_dimension, max_dimension), Image.LANCZOS)
+
+    output = io.BytesIO()
+    image.save(output, format="JPEG", quality=quality, optimize=True)
+    return {"mime_type": "image/jpeg", "data": output.getvalue()}
@@ -1,7 +1,13 @@
+import argparse
+import csv
+import itertools
 import json
 import requests
+import sys
 from datetime import datetime, timedelta
 
+import numpy as np
+
 # Your current realistic attendance scenario
 CURRENT_ATTENDANCE = {
     # Current semester progress (6 weeks completed, 10 weeks remaining)
@@ -93,150 +99,256 @@ CURRENT_ATTENDANCE = {
     }
 }
 
+# Target minimum attendance (overall floor)
+TARGET_PERCENTAGE = 70.5
+
+# Per-subject attendance floors (%) by subject type: liked subjects are attended in full,
+# neutral ones kept at 75% and disliked ones at the 70.5% safety margin
+SUBJECT_TYPE_FLOORS = {"liked": 100.0, "neutral": 75.0, "disliked": 70.5}
+
+# Preference weights by subject type: when the overall floor needs classes beyond the
+# per-subject floors, higher-weight subjects are attended first
+PREFERENCE_WEIGHTS = {"liked": 1.0, "neutral": 0.5, "disliked": 0.0}
+
+def _ceil_div(numerator, denominator):
+    """Integer ceiling division that works elementwise on NumPy arrays"""
+    return -((-numerator) // denominator)
+
+def solve_skip_plans(totals, attended, remaining, floors, weights, overall_floor=TARGET_PERCENTAGE):
+    """Maximum-skip attendance plans for many students at once
+    
+    Per-subject arguments are (students, subjects) arrays; students with fewer subjects are
+    padded with zero totals and remaining classes. Percentages are resolved to 0.01% and all
+    class arithmetic is exact integer math.
+    
+    Optimality: a plan attends x_i of the r_i remaining classes with L_i <= x_i <= r_i (the
+    per-subject floor) and sum(x_i) >= K (the overall floor). Every feasible plan attends at
+    least max(K, sum(L_i)) classes, and the plan built here attends exactly that many, so no
+    plan skips more. The extra classes above the subject floors each count once toward the
+    single overall constraint, so by an exchange argument filling them in descending weight
+    order also maximizes the total preference weight among the max-skip plans.
+    """
+    
+    totals = np.atleast_2d(np.asarray(totals, dtype=np.int64))
+    attended = np.atleast_2d(np.asarray(attended, dtype=np.int64))
+    remaining = np.atleast_2d(np.asarray(remaining, dtype=np.int64))
+    floors_bp = np.rint(np.broadcast_to(floors, totals.shape) * 100).astype(np.int64)
+    weights = np.broadcast_to(np.asarray(weights, dtype=np.float64), totals.shape)
+    overall_bp = np.rint(np.broadcast_to(np.asarray(overall_floor, dtype=np.float64), totals.shape[:1]) * 100).astype(np.int64)
+    
+    semester = totals + remaining
+    
+    # Minimum classes per subject to reach its floor (capped at what is left to attend)
+    min_attend = np.clip(_ceil_div(floors_bp * semester - 10000 * attended, 10000), 0, remaining)
+    
+    # Minimum classes overall to reach the overall floor
+    overall_needed = np.maximum(0, _ceil_div(overall_bp * semester.sum(axis=1) - 10000 * attended.sum(axis=1), 10000))
+    extra_needed = np.maximum(0, overall_needed - min_attend.sum(axis=1))
+    
+    # Fill the extra classes greedily, highest preference weight first
+    order = np.argsort(-weights, axis=1, kind="stable")
+    capacity = np.take_along_axis(remaining - min_attend, order, axis=1)
+    filled_before = np.cumsum(capacity, axis=1) - capacity
+    extra_sorted = np.clip(extra_needed[:, None] - filled_before, 0, capacity)
+    extra = np.empty_like(extra_sorted)
+    np.put_along_axis(extra, order, extra_sorted, axis=1)
+    
+    attend = min_attend + extra
+    final_attended = attended + attend
+    total_final_attended = final_attended.sum(axis=1)
+    total_semester = semester.sum(axis=1)
+    
+    return {
+        "attend": attend,
+        "skip": remaining - attend,
+        "final_percentage": np.divide(final_attended * 100.0, semester, out=np.zeros(semester.shape), where=semester > 0),
+        "meets_floor": 10000 * final_attended >= floors_bp * semester,
+        "total_attend": attend.sum(axis=1),
+        "total_skip": (remaining - attend).sum(axis=1),
+        "overall_percentage": np.divide(total_final_attended * 100.0, total_semester, out=np.zeros(total_semester.shape), where=total_semester > 0),
+        "target_met": 10000 * total_final_attended >= overall_bp * total_semester
+    }
+
+def optimize_student_plans(students, overall_floor=TARGET_PERCENTAGE, type_floors=None, type_weights=None):
+    """Max-skip plans for a list of students, each a {subject: data} dict shaped like
+    CURRENT_ATTENDANCE["subject_attendance"]. A subject may override its type defaults
+    with explicit "floor" and "weight" entries."""
+    
+    type_floors = {**SUBJECT_TYPE_FLOORS, **(type_floors or {})}
+    type_weights = {**PREFERENCE_WEIGHTS, **(type_weights or {})}
+    
+    num_subjects = max((len(subjects) for subjects in students), default=0)
+    shape = (len(students), num_subjects)
+    totals = np.zeros(shape, dtype=np.int64)
+    attended = np.zeros(shape, dtype=np.int64)
+    remaining = np.zeros(shape, dtype=np.int64)
+    floors = np.zeros(shape)
+    weights = np.zeros(shape)
+    
+    for row, subjects in enumerate(students):
+        for col, data in enumerate(subjects.values()):
+            subject_type = data.get("type", "neutral")
+            totals[row, col] = data["total"]
+            attended[row, col] = data["attended"]
+            remaining[row, col] = data["remaining_in_semester"]
+            floors[row, col] = data.get("floor", type_floors.get(subject_type, overall_floor))
+            weights[row, col] = data.get("weight", type_weights.get(subject_type, 0.5))
+    
+    result = solve_skip_plans(totals, attended, remaining, floors, weights, overall_floor)
+    
+    plans = []
+    for row, subjects in enumerate(students):
+        plans.append({
+            "subjects": {
+                subject_name: {
+                    "attend": int(result["attend"][row, col]),
+                    "skip": int(result["skip"][row, col]),
+                    "final_percentage": float(result["final_percentage"][row, col]),
+                    "meets_floor": bool(result["meets_floor"][row, col])
+                }
+                for col, subject_name in enumerate(subjects)
+            },
+            "total_attend": int(result["total_attend"][row]),
+            "total_skip": int(result["total_skip"][row]),
+            "final_percentage": float(result["overall_percentage"][row]),
+            "target_met": bool(result["target_met"][row])
+        })
+    
+    return plans
+
+def optimize_student_plan(subjects, overall_floor=TARGET_PERCENTAGE, type_floors=None, type_weights=None):
+    """Max-skip plan for a single student's {subject: data} dict"""
+    return optimize_student_plans([subjects], overall_floor, type_floors, type_weights)[0]
+
+def read_subject_records(source, file_format=None):
+    """Stream per-student, per-subject records from a CSV or JSON-lines file
+    
+    ``source`` is a path or an open text stream (e.g. ``sys.stdin``). Each record carries
+    student_id, subject, total, attended, remaining_in_semester and type, plus optional
+    floor and weight overrides. The format is taken from the file suffix unless given.
+    """
+    
+    if isinstance(source, str):
+        if file_format is None:
+            file_format = "jsonl" if source.lower().endswith((".jsonl", ".ndjson")) else "csv"
+        with open(source, newline="", encoding="utf-8") as stream:
+            yield from read_subject_records(stream, file_format)
+        return
+    
+    if file_format == "jsonl":
+        for line in source:
+            if line.strip():
+                yield json.loads(line)
+    else:
+        yield from csv.DictReader(source)
+
+def _subject_from_record(record):
+    """Build an optimizer subject dict from a (possibly string-valued) record"""
+    
+    subject = {
+        "total": int(record["total"]),
+        "attended": int(record["attended"]),
+        "remaining_in_semester": int(record["remaining_in_semester"]),
+        "type": record.get("type") or "neutral"
+    }
+    for key in ("floor", "weight"):
+        if record.get(key) not in (None, ""):
+            subject[key] = float(record[key])
+    return subject
+
+def stream_student_plans(source, file_format=None, batch_size=256, overall_floor=TARGET_PERCENTAGE, type_floors=None, type_weights=None):
+    """Yield (student_id, plan) for every student in a streamed records file
+    
+    Records must be grouped by student_id, as a per-student semester export is. Students
+    are solved in vectorized batches of ``batch_size``, so memory stays bounded by one
+    batch regardless of how many rows the file holds.
+    """
+    
+    records = read_subject_records(source, file_format)
+    batch_ids = []
+    batch_subjects = []
+    
+    for student_id, rows in itertools.groupby(records, key=lambda record: str(record["student_id"])):
+        batch_ids.append(student_id)
+        batch_subjects.append({row["subject"]: _subject_from_record(row) for row in rows})
+        
+        if len(batch_ids) >= batch_size:
+            yield from zip(batch_ids, optimize_student_plans(batch_subjects, overall_floor, type_floors, type_weights))
+            batch_ids = []
+            batch_subjects = []
+    
+    if batch_ids:
+        yield from zip(batch_ids, optimize_student_plans(batch_subjects, overall_floor, type_floors, type_weights))
+
 def calculate_optimal_attendance_strategy():
     """Calculate optimal attendance strategy based on preferences"""
     
-    print("🎯 OPTIMAL ATTENDANCE STRATEGY FOR 70.5% MINIMUM")
+    print(f"🎯 OPTIMAL ATTENDANCE STRATEGY FOR {TARGET_PERCENTAGE}% MINIMUM")
     print("=" * 60)
     
-    # Target minimum attendance
-    TARGET_PERCENTAGE = 70.5
+    subject_attendance = CURRENT_ATTENDANCE["subject_attendance"]
+    plan = optimize_student_plan(subject_attendance)
     
     # Calculate total semester projection
-    total_current_classes = sum(subject["total"] for subject in CURRENT_ATTENDANCE["subject_attendance"].values())
-    total_remaining_classes = sum(subject["remaining_in_semester"] for subject in CURRENT_ATTENDANCE["subject_attendance"].values())
+    total_current_classes = sum(subject["total"] for subject in subject_attendance.values())
+    total_attended_classes = sum(subject["attended"] for subject in subject_attendance.values())
+    total_remaining_classes = sum(subject["remaining_in_semester"] for subject in subject_attendance.values())
     total_semester_classes = total_current_classes + total_remaining_classes
     
     print(f"📊 SEMESTER OVERVIEW:")
-    print(f"   Current: {CURRENT_ATTENDANCE['attended_classes']}/{total_current_classes} classes = {CURRENT_ATTENDANCE['current_percentage']}%")
+    print(f"   Current: {total_attended_classes}/{total_current_classes} classes = {total_attended_classes / total_current_classes * 100:.1f}%")
     print(f"   Remaining: {total_remaining_classes} classes")
     print(f"   Total Semester: {total_semester_classes} classes")
     print(f"   Target: {TARGET_PERCENTAGE}% minimum")
     
-    # Calculate minimum classes needed overall
-    classes_needed_total = (TARGET_PERCENTAGE * total_semester_classes / 100) - CURRENT_ATTENDANCE["attended_classes"]
-    classes_needed_total = max(0, int(classes_needed_total))
-    
-    print(f"   📈 Need to attend: {classes_needed_total} more classes")
-    
     # Categorize subjects
-    liked_subjects = {}
-    disliked_subjects = {}
-    neutral_subjects = {}
-    
-    for subject_name, data in CURRENT_ATTENDANCE["subject_attendance"].items():
-        if data["type"] == "liked":
-            liked_subjects[subject_name] = data
-        elif data["type"] == "disliked":
-            disliked_subjects[subject_name] = data
-        else:
-            neutral_subjects[subject_name] = data
+    categories = {"liked": {}, "disliked": {}, "neutral": {}}
+    for subject_name, data in subject_attendance.items():
+        categories.get(data["type"], categories["neutral"])[subject_name] = data
     
     print(f"\n🎓 SUBJECT CATEGORIZATION:")
-    print(f"   ❤️  Liked subjects: {len(liked_subjects)}")
-    print(f"   😞 Disliked subjects: {len(disliked_subjects)}")
-    print(f"   ⚖️  Neutral subjects: {len(neutral_subjects)}")
+    print(f"   ❤️  Liked subjects: {len(categories['liked'])}")
+    print(f"   😞 Disliked subjects: {len(categories['disliked'])}")
+    print(f"   ⚖️  Neutral subjects: {len(categories['neutral'])}")
     
-    # Strategy 1: Attend ALL liked subjects, minimum for disliked
-    print(f"\n💡 STRATEGY 1: MAXIMIZE LIKED, MINIMIZE DISLIKED")
+    print(f"\n💡 STRATEGY: MAXIMIZE LIKED, MINIMIZE DISLIKED (max-skip optimal)")
     print("-" * 50)
     
-    liked_remaining = sum(data["remaining_in_semester"] for data in liked_subjects.values())
-    liked_attendance_plan = liked_remaining  # Attend all liked classes
-    
-    print(f"✅ LIKED SUBJECTS (Attend ALL {liked_attendance_plan} classes):")
-    for subject, data in liked_subjects.items():
-        current_percent = data["percentage"]
-        remaining = data["remaining_in_semester"]
-        if remaining > 0:
-            final_total = data["total"] + remaining
-            final_attended = data["attended"] + remaining
-            final_percent = (final_attended / final_total) * 100
-            print(f"   {subject}: {current_percent:.1f}% → {final_percent:.1f}% (attend all {remaining} classes)")
-        else:
-            print(f"   {subject}: {current_percent:.1f}% (no remaining classes)")
-    
-    # Calculate remaining classes needed after attending all liked subjects
-    remaining_classes_needed = classes_needed_total - liked_attendance_plan
-    remaining_classes_needed = max(0, remaining_classes_needed)
-    
-    print(f"\n😞 DISLIKED SUBJECTS (Attend minimum {remaining_classes_needed} total):")
-    
-    # Prioritize disliked subjects by current attendance (lowest first)
-    disliked_sorted = sorted(disliked_subjects.items(), key=lambda x: x[1]["percentage"])
-    
-    classes_allocated = 0
-    disliked_plan = {}
-    
-    for subject, data in disliked_sorted:
-        remaining = data["remaining_in_semester"]
-        current_percent = data["percentage"]
-        
-        # Calculate minimum needed for 70.5% in this subject
-        total_semester = data["total"] + remaining
-        min_needed_for_subject = (70.5 * total_semester / 100) - data["attended"]
-        min_needed_for_subject = max(0, int(min_needed_for_subject))
-        min_needed_for_subject = min(min_needed_for_subject, remaining)
-        
-        # Allocate classes based on remaining budget
-        if classes_allocated < remaining_classes_needed:
-            classes_to_attend = min(min_needed_for_subject, remaining_classes_needed - classes_allocated)
-            classes_to_attend = max(classes_to_attend, min_needed_for_subject)  # Ensure subject minimum
-        else:
-            classes_to_attend = min_needed_for_subject  # Only subject minimum
-        
-        classes_to_attend = min(classes_to_attend, remaining)
-        classes_allocated += classes_to_attend
-        disliked_plan[subject] = classes_to_attend
-        
-        # Calculate final percentage
-        final_total = data["total"] + remaining
-        final_attended = data["attended"] + classes_to_attend
-        final_percent = (final_attended / final_total) * 100
-        
-        skip_classes = remaining - classes_to_attend
-        print(f"   {subject}: {current_percent:.1f}% → {final_percent:.1f}% (attend {classes_to_attend}/{remaining}, skip {skip_classes})")
-    
-    # Handle neutral subjects
-    print(f"\n⚖️ NEUTRAL SUBJECTS (Strategic attendance):")
-    for subject, data in neutral_subjects.items():
-        remaining = data["remaining_in_semester"]
-        current_percent = data["percentage"]
-        
-        # Attend enough to maintain 75% (between liked and disliked)
-        total_semester = data["total"] + remaining
-        target_75 = (75 * total_semester / 100) - data["attended"]
-        attend_classes = max(0, min(int(target_75), remaining))
-        
-        final_total = data["total"] + remaining
-        final_attended = data["attended"] + attend_classes
-        final_percent = (final_attended / final_total) * 100
-        
-        skip_classes = remaining - attend_classes
-        print(f"   {subject}: {current_percent:.1f}% → {final_percent:.1f}% (attend {attend_classes}/{remaining}, skip {skip_classes})")
-    
-    # Calculate final statistics
-    total_attend_plan = (
-        liked_attendance_plan + 
-        sum(disliked_plan.values()) + 
-        sum(max(0, min(int((75 * (data["total"] + data["remaining_in_semester"]) / 100) - data["attended"]), data["remaining_in_semester"])) for data in neutral_subjects.values())
-    )
-    
-    total_skip_plan = total_remaining_classes - total_attend_plan
-    final_attendance = CURRENT_ATTENDANCE["attended_classes"] + total_attend_plan
-    final_percentage = (final_attendance / total_semester_classes) * 100
+    headings = {
+        "liked": "✅ LIKED SUBJECTS",
+        "neutral": "⚖️ NEUTRAL SUBJECTS",
+        "disliked": "😞 DISLIKED SUBJECTS"
+    }
+    for subject_type, heading in headings.items():
+        print(f"\n{heading}:")
+        for subject, data in categories[subject_type].items():
+            subject_plan = plan["subjects"][subject]
+            remaining = data["remaining_in_semester"]
+            print(f"   {subject}: {data['percentage']:.1f}% → {subject_plan['final_percentage']:.1f}% "
+                  f"(attend {subject_plan['attend']}/{remaining}, skip {subject_plan['skip']})")
+    
+    liked_attendance_plan = sum(plan["subjects"][subject]["attend"] for subject in categories["liked"])
+    disliked_plan = {subject: plan["subjects"][subject]["attend"] for subject in categories["disliked"]}
+    total_attend_plan = plan["total_attend"]
+    total_skip_plan = plan["total_skip"]
+    final_percentage = plan["final_percentage"]
     
     print(f"\n🎯 STRATEGY SUMMARY:")
     print(f"   Total remaining classes: {total_remaining_classes}")
     print(f"   Plan to attend: {total_attend_plan} classes")
     print(f"   Can safely skip: {total_skip_plan} classes")
-    print(f"   Final attendance: {final_attendance}/{total_semester_classes} = {final_percentage:.1f}%")
+    print(f"   Final attendance: {total_attended_classes + total_attend_plan}/{total_semester_classes} = {final_percentage:.1f}%")
     
-    if final_percentage >= TARGET_PERCENTAGE:
+    if plan["target_met"]:
         print(f"   ✅ SUCCESS: Exceeds {TARGET_PERCENTAGE}% target by {final_percentage - TARGET_PERCENTAGE:.1f}%")
     else:
         print(f"   ❌ WARNING: Falls short by {TARGET_PERCENTAGE - final_percentage:.1f}%")
     
+    below_floor = [subject for subject, subject_plan in plan["subjects"].items()
+                   if not subject_plan["meets_floor"] and subject_attendance[subject]["type"] != "liked"]
+    if below_floor:
+        print(f"   ⚠️ Cannot reach subject floor even attending everything: {', '.join(below_floor)}")
+    
     # Weekly schedule optimization
     print(f"\n📅 WEEKLY SCHEDULE OPTIMIZATION:")
     print("-" * 40)
@@ -246,14 +358,13 @@ def calculate_optimal_attendance_strategy():
     disliked_times = ["16:00-17:30", "17:30-19:00", "19:00-20:30"]  # Late afternoon/evening
     
     print(f"✅ PRIORITIZE for preferred times ({', '.join(preferred_times)}):")
-    for subject in liked_subjects.keys():
+    for subject in categories["liked"]:
         print(f"   • {subject} (attend ALL classes)")
     
     print(f"\n⏰ STRATEGIC ATTENDANCE for disliked times:")
     for subject, attend_count in disliked_plan.items():
-        total_remaining = disliked_subjects[subject]["remaining_in_semester"]
-        if attend_count < total_remaining:
-            skip_count = total_remaining - attend_count
+        skip_count = plan["subjects"][subject]["skip"]
+        if skip_count > 0:
             print(f"   • {subject}: Attend {attend_count}, Skip {skip_count} (skip during late hours)")
     
     # Calculate savings
@@ -275,6 +386,18 @@ def calculate_optimal_attendance_strategy():
     }
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Max-skip attendance planning")
+    parser.add_argument("--input", help="CSV or JSON-lines file of per-student, per-subject records ('-' for stdin)")
+    parser.add_argument("--format", choices=["csv", "jsonl"], help="Input format (default: from file suffix)")
+    parser.add_argument("--target", type=float, default=TARGET_PERCENTAGE, help="Overall attendance floor in percent")
+    args = parser.parse_args()
+    
+    if args.input:
+        source = sys.stdin if args.input == "-" else args.input
+        for student_id, plan in stream_student_plans(source, args.format, overall_floor=args.target):
+            print(json.dumps({"student_id": student_id, **plan}))
+        sys.exit(0)
+    
     print("🚀 PERSONALIZED ATTENDANCE OPTIMIZATION")
     print("Based on your preferences and current attendance data\n")
     
@@ -78,6 +78,39 @@ async function callAIService(endpoint, data, isFormData = false) {
     }
 }
 
+// Proxy a streaming (Server-Sent Events) AI service endpoint to the client, forwarding
+// each event as soon as it arrives instead of waiting for the complete response
+async function streamAIService(endpoint, data, res, preamble = []) {
+    const response = await axios({
+        method: 'POST',
+        url: `${AI_SERVICE_URL}${endpoint}`,
+        data: { ...data, stream: true },
+        headers: { 'Content-Type': 'application/json', Accept: 'text/event-stream' },
+        responseType: 'stream',
+        timeout: 30000 // applies until the response headers arrive
+    });
+
+    res.writeHead(200, {
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+        Connection: 'keep-alive',
+        'X-Accel-Buffering': 'no'
+    });
+    preamble.forEach(([event, payload]) => writeSSE(res, event, payload));
+
+    // Stop generating upstream if the client goes away
+    res.on('close', () => response.data.destroy());
+    response.data.on('error', (error) => {
+        console.error(`AI Service stream error (${endpoint}):`, error.message);
+        res.end();
+    });
+    response.data.pipe(res);
+}
+
+function writeSSE(res, event, payload) {
+    res.write(`event: ${event}\ndata: ${JSON.stringify(payload)}\n\n`);
+}
+
 // Routes
 app.get('/', (req, res) => {
     res.json({ 
@@ -451,7 +484,7 @@ function generateBasicRecommendations(attendanceData) {
 // New endpoint: AI Chat Assistant
 app.post('/api/chat', async (req, res) => {
     try {
-        const { message, context } = req.body;
+        const { message, context, stream } = req.body;
         
         if (!message || message.trim() === '') {
             return res.status(400).json({ error: 'Message is required' });
@@ -524,6 +557,13 @@ app.post('/api/chat', async (req, res) => {
             timestamp: new Date().toISOString()
         };
         
+        if (stream) {
+            // "token" events carry text as the model generates it, "done" the full response
+            return await streamAIService('/chat', chatData, res, [
+                ['context', { student_data: gtuStudentData, processing_method: 'gemini-ai-gtu' }]
+            ]);
+        }
+        
         const aiResponse = await callAIService('/chat', chatData);
         
         res.json({
@@ -560,6 +600,14 @@ app.post('/api/chat', async (req, res) => {
             note: 'AI service temporarily unavailable - using GTU data fallback'
         };
         
+        if (res.headersSent) {
+            return res.end();
+        }
+        if (req.body.stream) {
+            res.writeHead(200, { 'Content-Type': 'text/event-stream', 'Cache-Control': 'no-cache' });
+            writeSSE(res, 'done', fallbackResponse);
+            return res.end();
+        }
         res.json(fallbackResponse);
     }
 });
@@ -0,0 +1,128 @@
+import time
+import tracemalloc
+
+import numpy as np
+
+from attendance_optimizer import solve_skip_plans
+from gtu_attendance_system import GTUAttendanceSystem, StrategyEngine
+
+
+def benchmark_cohort_evaluation(num_students: int = 100_000, scalar_sample: int = 10_000):
+    """Compare the vectorized cohort sweep against the per-student scalar methods"""
+
+    print(f"📊 COHORT EVALUATION ({num_students:,} students)")
+    print("-" * 50)
+
+    gtu_system = GTUAttendanceSystem()
+    rng = np.random.default_rng(42)
+
+    total = rng.integers(80, 200, num_students)
+    attended = (total * rng.uniform(0.5, 1.0, num_students)).astype(np.int64)
+    attendance = attended * 100.0 / total
+    remaining = np.full(num_students, 190)
+
+    start = time.perf_counter()
+    result = gtu_system.evaluate_cohort(attendance, total, attended, remaining, 70.1, True, True)
+    vectorized_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for i in range(scalar_sample):
+        gtu_system.calculate_current_status(attendance[i], int(total[i]), int(attended[i]))
+        gtu_system.calculate_bonus_marks(attendance[i], True, True)
+        gtu_system.calculate_required_attendance(attendance[i], int(remaining[i]), 70.1)
+    scalar_seconds = (time.perf_counter() - start) * num_students / scalar_sample
+
+    print(f"   Vectorized: {vectorized_seconds * 1000:.1f} ms")
+    print(f"   Scalar loop (extrapolated from {scalar_sample:,}): {scalar_seconds * 1000:.1f} ms")
+    print(f"   Speedup: {scalar_seconds / vectorized_seconds:.0f}x")
+    print(f"   Exam eligible: {int(result['exam_eligible'].sum()):,} / {num_students:,}")
+
+
+def benchmark_strategy_engine(num_requests: int = 20_000):
+    """Measure per-request cost of cached strategy lookups versus recomputation"""
+
+    print(f"\n🧠 STRATEGY ENGINE ({num_requests:,} requests)")
+    print("-" * 50)
+
+    engine = StrategyEngine()
+    rng = np.random.default_rng(7)
+    roll_numbers = rng.integers(1, 70, num_requests)
+    attendances = rng.uniform(65.0, 85.0, num_requests)
+
+    start = time.perf_counter()
+    for roll_number, attendance in zip(roll_numbers, attendances):
+        engine.analyze(int(roll_number), float(attendance))
+    cached_seconds = time.perf_counter() - start
+
+    gtu_system = GTUAttendanceSystem()
+    sample = 2_000
+    start = time.perf_counter()
+    for attendance in attendances[:sample]:
+        gtu_system.generate_attendance_strategy({"current_attendance": float(attendance), "remaining_weeks": 10})
+    uncached_seconds = (time.perf_counter() - start) * num_requests / sample
+
+    print(f"   Cached engine: {cached_seconds / num_requests * 1e6:.1f} µs/request")
+    print(f"   Recompute every call: {uncached_seconds / num_requests * 1e6:.1f} µs/request")
+    print(f"   Cache: {engine.cache_info()}")
+
+
+def benchmark_skip_plan_solver(num_students: int = 1_000, num_subjects: int = 60):
+    """Time the vectorized max-skip solver on a multi-student, many-subject batch"""
+
+    print(f"\n🎯 SKIP-PLAN SOLVER ({num_students:,} students x {num_subjects} subjects)")
+    print("-" * 50)
+
+    rng = np.random.default_rng(11)
+    shape = (num_students, num_subjects)
+    totals = rng.integers(5, 30, shape)
+    attended = (totals * rng.uniform(0.3, 1.0, shape)).astype(np.int64)
+    remaining = rng.integers(0, 40, shape)
+    floors = rng.choice([70.5, 75.0, 100.0], shape)
+    weights = rng.random(shape)
+
+    start = time.perf_counter()
+    plans = solve_skip_plans(totals, attended, remaining, floors, weights)
+    elapsed = time.perf_counter() - start
+
+    print(f"   Solved in {elapsed * 1000:.1f} ms ({elapsed / num_students * 1e6:.1f} µs/student)")
+    print(f"   Target met: {int(plans['target_met'].sum()):,} / {num_students:,}")
+
+
+def _traced_bytes(build):
+    tracemalloc.start()
+    records = build()
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del records
+    return size
+
+
+def benchmark_record_memory(num_students: int = 50_000):
+    """Per-student memory of status + bonus results as dicts versus __slots__ records"""
+
+    print(f"\n💾 RESULT MEMORY ({num_students:,} students)")
+    print("-" * 50)
+
+    gtu_system = GTUAttendanceSystem()
+    attendances = [55.0 + (i % 400) / 10 for i in range(num_students)]
+
+    dict_bytes = _traced_bytes(lambda: [
+        (gtu_system.calculate_current_status(a, 190, int(a * 1.9)), gtu_system.calculate_bonus_marks(a, True, True))
+        for a in attendances
+    ])
+    record_bytes = _traced_bytes(lambda: [
+        (gtu_system.evaluate_status(a, 190, int(a * 1.9)), gtu_system.evaluate_bonus(a, True, True))
+        for a in attendances
+    ])
+
+    print(f"   Dicts: {dict_bytes / num_students:.0f} bytes/student")
+    print(f"   Slotted records: {record_bytes / num_students:.0f} bytes/student")
+    print(f"   Saving: {(1 - record_bytes / dict_bytes) * 100:.0f}%")
+
+
+if __name__ == "__main__":
+    print("🚀 GTU ATTENDANCE BENCHMARKS\n")
+    benchmark_cohort_evaluation()
+    benchmark_strategy_engine()
+    benchmark_skip_plan_solver()
+    benchmark_record_memory()
@@ -1,8 +1,81 @@
 import json
 import math
+import pickle
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from fractions import Fraction
 from typing import Dict, List, Tuple, Any
 
+import numpy as np
+
+@dataclass
+class Subject:
+    """A subject in the SEM-3 CSE(DS) curriculum"""
+    __slots__ = ("code", "name", "type", "weekly_classes")
+    code: str
+    name: str
+    type: str
+    weekly_classes: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"name": self.name, "type": self.type, "weekly_classes": self.weekly_classes}
+
+@dataclass
+class Division:
+    """A division and the roll numbers it covers (inclusive)"""
+    __slots__ = ("code", "name", "roll_range")
+    code: str
+    name: str
+    roll_range: Tuple[int, int]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"roll_range": self.roll_range, "name": self.name}
+
+@dataclass
+class AttendanceStatus:
+    """Current attendance status and eligibility of one student"""
+    __slots__ = ("current_attendance", "total_classes", "attended_classes", "exam_eligible",
+                 "bonus_eligible", "medical_needed", "critical_threshold", "attendance_bonus")
+    current_attendance: float
+    total_classes: int
+    attended_classes: int
+    exam_eligible: bool
+    bonus_eligible: bool
+    medical_needed: bool
+    critical_threshold: bool
+    attendance_bonus: int
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "current_attendance": self.current_attendance,
+            "total_classes": self.total_classes,
+            "attended_classes": self.attended_classes,
+            "exam_eligible": self.exam_eligible,
+            "bonus_eligible": self.bonus_eligible,
+            "medical_needed": self.medical_needed,
+            "critical_threshold": self.critical_threshold,
+            "attendance_bonus": self.attendance_bonus
+        }
+
+@dataclass
+class BonusBreakdown:
+    """GTU bonus marks of one student"""
+    __slots__ = ("attendance_bonus", "first_four_days_bonus", "all_clear_bonus", "total_bonus")
+    attendance_bonus: int
+    first_four_days_bonus: int
+    all_clear_bonus: int
+    total_bonus: int
+
+    def to_dict(self) -> Dict[str, int]:
+        return {
+            "attendance_bonus": self.attendance_bonus,
+            "first_four_days_bonus": self.first_four_days_bonus,
+            "all_clear_bonus": self.all_clear_bonus,
+            "total_bonus": self.total_bonus
+        }
+
 class GTUAttendanceSystem:
     """
     GTU-specific attendance management system for SEM-3 CSE(DS) students
@@ -20,98 +93,209 @@ class GTUAttendanceSystem:
         
         # SEM-3 CSE(DS) Subjects
         self.subjects = {
-            "DS": {"name": "Data Structures", "type": "core", "weekly_classes": 4},
-            "DBMS": {"name": "Database Management System", "type": "core", "weekly_classes": 4},
-            "PS": {"name": "Probability and Statistics", "type": "core", "weekly_classes": 3},
-            "DF": {"name": "Digital Fundamentals", "type": "core", "weekly_classes": 4},
-            "IC": {"name": "Indian Constitution", "type": "elective", "weekly_classes": 2},
-            "PCE": {"name": "Professional Communication and Ethics", "type": "elective", "weekly_classes": 2}
+            "DS": Subject("DS", "Data Structures", "core", 4),
+            "DBMS": Subject("DBMS", "Database Management System", "core", 4),
+            "PS": Subject("PS", "Probability and Statistics", "core", 3),
+            "DF": Subject("DF", "Digital Fundamentals", "core", 4),
+            "IC": Subject("IC", "Indian Constitution", "elective", 2),
+            "PCE": Subject("PCE", "Professional Communication and Ethics", "elective", 2)
         }
         
         # Division System
         self.divisions = {
-            "DIV-9": {"roll_range": (1, 35), "name": "Division 9"},
-            "DIV-10": {"roll_range": (36, 69), "name": "Division 10"}
+            "DIV-9": Division("DIV-9", "Division 9", (1, 35)),
+            "DIV-10": Division("DIV-10", "Division 10", (36, 69))
         }
 
     def calculate_current_status(self, current_attendance: float, total_classes: int, attended_classes: int) -> Dict[str, Any]:
         """Calculate current attendance status and eligibility"""
         
-        status = {
-            "current_attendance": current_attendance,
-            "total_classes": total_classes,
-            "attended_classes": attended_classes,
-            "exam_eligible": current_attendance >= self.MIN_ATTENDANCE_EXAM,
-            "bonus_eligible": current_attendance >= self.MIN_ATTENDANCE_EXAM,
-            "medical_needed": current_attendance < self.MIN_ATTENDANCE_EXAM,
-            "critical_threshold": current_attendance < self.MIN_ATTENDANCE_MEDICAL,
-        }
+        return self.evaluate_status(current_attendance, total_classes, attended_classes).to_dict()
+
+    def evaluate_status(self, current_attendance: float, total_classes: int, attended_classes: int) -> AttendanceStatus:
+        """Current attendance status and eligibility as a compact record"""
+        
+        exam_eligible = current_attendance >= self.MIN_ATTENDANCE_EXAM
         
         # Calculate attendance bonus marks
-        if status["bonus_eligible"]:
-            status["attendance_bonus"] = min(
+        if exam_eligible:
+            attendance_bonus = min(
                 self.MAX_ATTENDANCE_BONUS,
                 int(current_attendance * self.MAX_ATTENDANCE_BONUS / 100)
             )
         else:
-            status["attendance_bonus"] = 0
+            attendance_bonus = 0
             
-        return status
+        return AttendanceStatus(
+            current_attendance,
+            total_classes,
+            attended_classes,
+            exam_eligible,
+            exam_eligible,
+            not exam_eligible,
+            current_attendance < self.MIN_ATTENDANCE_MEDICAL,
+            attendance_bonus
+        )
 
-    def calculate_required_attendance(self, current_attendance: float, remaining_classes: int, target_attendance: float = None) -> Dict[str, Any]:
+    def calculate_required_attendance(self, current_attendance: float, remaining_classes: int, target_attendance: float = None,
+                                      total_classes: int = None, attended_classes: int = None) -> Dict[str, Any]:
         """Calculate how many classes need to be attended to maintain target percentage"""
         
         if target_attendance is None:
             target_attendance = self.MIN_ATTENDANCE_EXAM
             
-        current_total = 100  # Assuming current data is based on 100 total classes for percentage calculation
-        current_attended = current_attendance
+        return self.calculate_required_attendance_batch(
+            current_attendance, remaining_classes, [target_attendance], total_classes, attended_classes
+        )[0]
+
+    def calculate_required_attendance_batch(self, current_attendance: float, remaining_classes: int, targets: List[float],
+                                            total_classes: int = None, attended_classes: int = None) -> List[Dict[str, Any]]:
+        """Calculate required attendance for several target percentages in one pass
         
-        total_after_remaining = current_total + remaining_classes
-        target_total_attended = (target_attendance / 100) * total_after_remaining
-        required_additional = max(0, target_total_attended - current_attended)
+        Real class counts should be passed whenever they are known; without them the
+        percentage is read against a 100-class basis.
+        """
         
-        return {
-            "target_attendance": target_attendance,
-            "remaining_classes": remaining_classes,
-            "required_to_attend": int(math.ceil(required_additional)),
-            "can_skip": max(0, remaining_classes - int(math.ceil(required_additional))),
-            "final_attendance": ((current_attended + required_additional) / total_after_remaining) * 100,
-            "buffer_classes": max(0, remaining_classes - int(math.ceil(required_additional)))
-        }
+        if total_classes is None:
+            total_classes = 100
+        if attended_classes is None:
+            attended_classes = Fraction(str(current_attendance)) * total_classes / 100
+            
+        return self.solve_required_classes(attended_classes, total_classes, remaining_classes, targets)
+
+    def solve_required_classes(self, attended_classes, total_classes: int, remaining_classes: int, targets: List[float]) -> List[Dict[str, Any]]:
+        """Exact minimum-attend / max-skip solver over real class counts
+        
+        For each target finds the smallest integer x with
+        100 * (attended + x) >= target * (total + remaining), using rational arithmetic so
+        boundary targets such as 70.1% are never off by one class.
+        """
+        
+        attended = Fraction(str(attended_classes))
+        semester_total = total_classes + remaining_classes
+        results = []
+        
+        for target_attendance in targets:
+            shortfall = Fraction(str(target_attendance)) * semester_total / 100 - attended
+            required = max(0, math.ceil(shortfall))
+            can_skip = max(0, remaining_classes - required)
+            final_attended = attended + min(required, remaining_classes)
+            
+            results.append({
+                "target_attendance": target_attendance,
+                "total_classes": total_classes,
+                "attended_classes": int(attended) if attended.denominator == 1 else float(attended),
+                "remaining_classes": remaining_classes,
+                "required_to_attend": required,
+                "can_skip": can_skip,
+                "final_attendance": float(final_attended * 100 / semester_total) if semester_total else 0.0,
+                "buffer_classes": can_skip,
+                "achievable": required <= remaining_classes
+            })
+            
+        return results
 
     def calculate_bonus_marks(self, attendance: float, attended_first_four_days: bool = False, all_subjects_clear: bool = False) -> Dict[str, int]:
         """Calculate total bonus marks based on GTU rules"""
         
-        bonus_breakdown = {
-            "attendance_bonus": 0,
-            "first_four_days_bonus": 0,
-            "all_clear_bonus": 0,
-            "total_bonus": 0
-        }
+        return self.evaluate_bonus(attendance, attended_first_four_days, all_subjects_clear).to_dict()
+
+    def evaluate_bonus(self, attendance: float, attended_first_four_days: bool = False, all_subjects_clear: bool = False) -> BonusBreakdown:
+        """Bonus marks breakdown as a compact record"""
+        
+        attendance_bonus = 0
+        first_four_days_bonus = 0
+        all_clear_bonus = 0
         
         # Attendance bonus (only if >= 70%)
         if attendance >= self.MIN_ATTENDANCE_EXAM:
-            bonus_breakdown["attendance_bonus"] = min(
+            attendance_bonus = min(
                 self.MAX_ATTENDANCE_BONUS,
                 int((attendance / 100) * self.MAX_ATTENDANCE_BONUS)
             )
             
             # First four days bonus
             if attended_first_four_days:
-                bonus_breakdown["first_four_days_bonus"] = self.FIRST_FOUR_DAYS_BONUS
+                first_four_days_bonus = self.FIRST_FOUR_DAYS_BONUS
                 
             # All clear bonus (only if other bonuses already applied and all subjects pass)
-            if all_subjects_clear and bonus_breakdown["attendance_bonus"] > 0:
-                bonus_breakdown["all_clear_bonus"] = self.ALL_CLEAR_BONUS
-        
-        bonus_breakdown["total_bonus"] = sum([
-            bonus_breakdown["attendance_bonus"],
-            bonus_breakdown["first_four_days_bonus"],
-            bonus_breakdown["all_clear_bonus"]
-        ])
+            if all_subjects_clear and attendance_bonus > 0:
+                all_clear_bonus = self.ALL_CLEAR_BONUS
         
-        return bonus_breakdown
+        return BonusBreakdown(
+            attendance_bonus,
+            first_four_days_bonus,
+            all_clear_bonus,
+            attendance_bonus + first_four_days_bonus + all_clear_bonus
+        )
+
+    def evaluate_cohort(self, current_attendance, total_classes, attended_classes, remaining_classes=0,
+                        target_attendance: float = None, attended_first_four_days=False,
+                        all_subjects_clear=False) -> Dict[str, np.ndarray]:
+        """Vectorized eligibility, bonus and required-classes evaluation for many students at once
+
+        Every argument may be a scalar or an array-like (NumPy array, list, pandas column) and is
+        broadcast against the others. Returns a columnar dict with one array entry per student,
+        so ``pandas.DataFrame(result)`` yields a table directly.
+        """
+
+        if target_attendance is None:
+            target_attendance = self.MIN_ATTENDANCE_EXAM
+
+        attendance, total, attended, remaining, target, first_four, all_clear = np.broadcast_arrays(
+            np.asarray(current_attendance, dtype=np.float64),
+            np.asarray(total_classes, dtype=np.int64),
+            np.asarray(attended_classes, dtype=np.int64),
+            np.asarray(remaining_classes, dtype=np.int64),
+            np.asarray(target_attendance, dtype=np.float64),
+            np.asarray(attended_first_four_days, dtype=bool),
+            np.asarray(all_subjects_clear, dtype=bool),
+        )
+
+        # Eligibility flags (same thresholds as calculate_current_status)
+        exam_eligible = attendance >= self.MIN_ATTENDANCE_EXAM
+        critical_threshold = attendance < self.MIN_ATTENDANCE_MEDICAL
+
+        # Bonus marks (same rules as calculate_bonus_marks)
+        attendance_bonus = np.where(
+            exam_eligible,
+            np.minimum(self.MAX_ATTENDANCE_BONUS, np.floor((attendance / 100) * self.MAX_ATTENDANCE_BONUS)),
+            0
+        ).astype(np.int64)
+        first_four_days_bonus = np.where(exam_eligible & first_four, self.FIRST_FOUR_DAYS_BONUS, 0)
+        all_clear_bonus = np.where(all_clear & (attendance_bonus > 0), self.ALL_CLEAR_BONUS, 0)
+
+        # Required classes in exact integer arithmetic: targets are resolved to 0.01% (basis points),
+        # so 100 * 100 * (attended + x) >= target_bp * (total + remaining) decides the minimum x.
+        target_bp = np.rint(target * 100).astype(np.int64)
+        semester_total = total + remaining
+        required_to_attend = np.maximum(0, -((10000 * attended - target_bp * semester_total) // 10000))
+        can_skip = np.maximum(0, remaining - required_to_attend)
+        final_attended = attended + np.minimum(required_to_attend, remaining)
+        final_attendance = np.divide(
+            final_attended * 100.0, semester_total,
+            out=attendance.copy(), where=semester_total > 0
+        )
+
+        return {
+            "current_attendance": attendance,
+            "total_classes": total,
+            "attended_classes": attended,
+            "exam_eligible": exam_eligible,
+            "bonus_eligible": exam_eligible,
+            "medical_needed": ~exam_eligible,
+            "critical_threshold": critical_threshold,
+            "attendance_bonus": attendance_bonus,
+            "first_four_days_bonus": first_four_days_bonus,
+            "all_clear_bonus": all_clear_bonus,
+            "total_bonus": attendance_bonus + first_four_days_bonus + all_clear_bonus,
+            "target_attendance": target,
+            "remaining_classes": remaining,
+            "required_to_attend": required_to_attend,
+            "can_skip": can_skip,
+            "achievable": required_to_attend <= remaining,
+            "final_attendance": final_attendance
+        }
 
     def generate_attendance_strategy(self, current_data: Dict[str, Any]) -> Dict[str, Any]:
         """Generate optimal attendance strategy based on current status and GTU rules"""
@@ -120,22 +304,32 @@ class GTUAttendanceSystem:
         remaining_weeks = current_data.get("remaining_weeks", 10)
         preferences = current_data.get("preferences", {})
         
+        total_classes = current_data.get("total_classes")
+        attended_classes = current_data.get("attended_classes")
+        
         # Calculate total remaining classes (assuming 19 classes per week based on timetable)
         total_remaining_classes = remaining_weeks * 19
         
-        # Different scenarios
-        scenarios = {
-            "maintain_current": self.calculate_required_attendance(current_attendance, total_remaining_classes, current_attendance),
-            "safe_buffer": self.calculate_required_attendance(current_attendance, total_remaining_classes, 75.0),
-            "bonus_optimization": self.calculate_required_attendance(current_attendance, total_remaining_classes, 80.0),
-            "minimum_safe": self.calculate_required_attendance(current_attendance, total_remaining_classes, 70.1)
+        # Different scenarios, solved together against the same class counts
+        scenario_targets = {
+            "maintain_current": current_attendance,
+            "safe_buffer": 75.0,
+            "bonus_optimization": 80.0,
+            "minimum_safe": 70.1
         }
+        scenarios = dict(zip(scenario_targets, self.calculate_required_attendance_batch(
+            current_attendance, total_remaining_classes, list(scenario_targets.values()), total_classes, attended_classes
+        )))
         
         # Generate recommendations
         recommendations = self._generate_subject_specific_strategy(current_data, scenarios)
         
         return {
-            "current_status": self.calculate_current_status(current_attendance, 100, int(current_attendance)),
+            "current_status": self.calculate_current_status(
+                current_attendance,
+                total_classes if total_classes is not None else 100,
+                attended_classes if attended_classes is not None else int(current_attendance)
+            ),
             "scenarios": scenarios,
             "recommendations": recommendations,
             "bonus_potential": self.calculate_bonus_marks(current_attendance, True, True),
@@ -160,7 +354,7 @@ class GTUAttendanceSystem:
         for subject in liked_subjects:
             if subject in self.subjects:
                 strategy["priority_subjects"][subject] = {
-                    "name": self.subjects[subject]["name"],
+                    "name": self.subjects[subject].name,
                     "recommendation": "Attend all classes",
                     "target_attendance": "90%+",
                     "reason": "Favorite subject + Better understanding + Higher bonus potential"
@@ -170,7 +364,7 @@ class GTUAttendanceSystem:
         for subject in disliked_subjects:
             if subject in self.subjects:
                 strategy["flexible_subjects"][subject] = {
-                    "name": self.subjects[subject]["name"],
+                    "name": self.subjects[subject].name,
                     "recommendation": "Maintain minimum 70%",
                     "target_attendance": "70-75%",
                     "reason": "Meet requirements while minimizing time in disliked subjects"
@@ -210,26 +404,118 @@ class GTUAttendanceSystem:
             "final_deadline": "Must maintain 70% until end of teaching"
         }
 
-def analyze_student_situation(roll_number: int, current_attendance: float = 72.0) -> Dict[str, Any]:
-    """Analyze specific student situation with GTU rules"""
-    
-    gtu_system = GTUAttendanceSystem()
-    
-    # Determine division
-    division = "DIV-9" if roll_number <= 35 else "DIV-10"
+class StrategyEngine:
+    """
+    Shared GTUAttendanceSystem with a bounded LRU cache of generated strategies.
+    Inputs are normalized (attendance rounded to 0.1%) so repeated requests from the
+    chat and dashboard endpoints are served from the cache instead of recomputed. An
+    attendance that rounding would move across a policy threshold (69.96% to 70.0%) is
+    analysed as given and not cached, so it stays on its own side of the threshold.
+    """
     
-    current_data = {
-        "roll_number": roll_number,
-        "division": division,
-        "current_attendance": current_attendance,
-        "remaining_weeks": 10,  # Estimated remaining weeks in semester
-        "preferences": {
-            "liked": ["DS", "DBMS", "PS"],  # Based on your preferences
-            "disliked": ["IC", "PCE"]  # Based on your preferences
+    def __init__(self, max_entries: int = 4096):
+        self.gtu_system = GTUAttendanceSystem()
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        
+        # Attendance values where the strategy changes by a step: eligibility, warning and
+        # scenario targets, and each whole mark of the attendance bonus
+        system = self.gtu_system
+        self.thresholds = sorted({
+            system.MIN_ATTENDANCE_MEDICAL, system.MIN_ATTENDANCE_EXAM, 70.1, 75.0, 80.0,
+            *(marks * 100 / system.MAX_ATTENDANCE_BONUS for marks in range(1, system.MAX_ATTENDANCE_BONUS + 1))
+        })
+
+    def _crosses_threshold(self, attendance: float, rounded: float) -> bool:
+        return any((attendance >= threshold) != (rounded >= threshold) for threshold in self.thresholds)
+
+    def analyze(self, roll_number: int, current_attendance: float = 72.0, remaining_weeks: int = 10) -> Dict[str, Any]:
+        """Return the attendance strategy for a student, computing it only on a cache miss"""
+        
+        current_attendance = float(current_attendance)
+        rounded = round(current_attendance, 1)
+        if self._crosses_threshold(current_attendance, rounded):
+            with self._lock:
+                self.misses += 1
+            return self._generate(roll_number, current_attendance, remaining_weeks)
+        
+        current_attendance = rounded
+        key = (current_attendance, remaining_weeks)
+        
+        with self._lock:
+            snapshot = self._cache.get(key)
+            if snapshot is not None:
+                self._cache.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+        
+        if snapshot is None:
+            # Results are stored pickled so every caller gets its own copy to mutate
+            snapshot = pickle.dumps(self._generate(roll_number, current_attendance, remaining_weeks), pickle.HIGHEST_PROTOCOL)
+            
+            with self._lock:
+                self._cache[key] = snapshot
+                self._cache.move_to_end(key)
+                while len(self._cache) > self.max_entries:
+                    self._cache.popitem(last=False)
+        
+        return pickle.loads(snapshot)
+
+    def _generate(self, roll_number: int, current_attendance: float, remaining_weeks: int) -> Dict[str, Any]:
+        current_data = {
+            "roll_number": roll_number,
+            "division": "DIV-9" if roll_number <= 35 else "DIV-10",
+            "current_attendance": current_attendance,
+            "remaining_weeks": remaining_weeks,
+            "preferences": {
+                "liked": ["DS", "DBMS", "PS"],  # Based on your preferences
+                "disliked": ["IC", "PCE"]  # Based on your preferences
+            }
         }
-    }
+        return self.gtu_system.generate_attendance_strategy(current_data)
+
+    def cache_info(self) -> Dict[str, Any]:
+        """Return cache hit/miss counters"""
+        
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "entries": len(self._cache),
+                "max_entries": self.max_entries
+            }
+
+    def cache_clear(self):
+        """Drop all cached strategies and reset the counters"""
+        
+        with self._lock:
+            self._cache.clear()
+            self.hits = 0
+            self.misses = 0
+
+_strategy_engine = None
+_strategy_engine_lock = threading.Lock()
+
+def get_strategy_engine() -> StrategyEngine:
+    """Return the process-wide StrategyEngine, creating it on first use"""
+    
+    global _strategy_engine
+    if _strategy_engine is None:
+        with _strategy_engine_lock:
+            if _strategy_engine is None:
+                _strategy_engine = StrategyEngine()
+    return _strategy_engine
+
+def analyze_student_situation(roll_number: int, current_attendance: float = 72.0, remaining_weeks: int = 10) -> Dict[str, Any]:
+    """Analyze specific student situation with GTU rules"""
     
-    return gtu_system.generate_attendance_strategy(current_data)
+    return get_strategy_engine().analyze(roll_number, current_attendance, remaining_weeks)
 
 # Example usage for your current situation
 if __name__ == "__main__":
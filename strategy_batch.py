@@ -0,0 +1,150 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List
+
+from gtu_attendance_system import GTUAttendanceSystem
+
+# Per-process engine, built once by the pool initializer instead of once per student
+_worker_system = None
+
+def _init_worker():
+    global _worker_system
+    _worker_system = GTUAttendanceSystem()
+
+def _generate_chunk(students: List[Dict[str, Any]]) -> List[str]:
+    """Generate strategies for a chunk of students, returned as JSON lines"""
+
+    lines = []
+    for current_data in students:
+        strategy = _worker_system.generate_attendance_strategy(current_data)
+        lines.append(json.dumps({
+            "roll_number": current_data.get("roll_number"),
+            "division": current_data.get("division"),
+            "strategy": strategy
+        }, ensure_ascii=False))
+    return lines
+
+def iter_division_students(current_attendance: float = 72.0, remaining_weeks: int = 10) -> Iterator[Dict[str, Any]]:
+    """Yield a current_data dict for every roll number in GTUAttendanceSystem.divisions"""
+
+    for division, info in GTUAttendanceSystem().divisions.items():
+        first_roll, last_roll = info.roll_range
+        for roll_number in range(first_roll, last_roll + 1):
+            yield {
+                "roll_number": roll_number,
+                "division": division,
+                "current_attendance": current_attendance,
+                "remaining_weeks": remaining_weeks
+            }
+
+def read_students(path: str) -> Iterator[Dict[str, Any]]:
+    """Stream per-student current_data dicts from a JSON-lines file"""
+
+    with open(path, encoding="utf-8") as stream:
+        for line in stream:
+            if line.strip():
+                yield json.loads(line)
+
+def _chunks(students: Iterable[Dict[str, Any]], chunk_size: int) -> Iterator[List[Dict[str, Any]]]:
+    iterator = iter(students)
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+class _JsonLinesWriter:
+    def __init__(self, path: str):
+        self.stream = open(path, "w", encoding="utf-8")
+
+    def write(self, lines: List[str]):
+        self.stream.write("\n".join(lines) + "\n")
+
+    def close(self):
+        self.stream.close()
+
+class _ParquetWriter:
+    """Writes one row group per chunk; nested strategies are stored as JSON strings"""
+
+    def __init__(self, path: str):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError:
+            raise RuntimeError("Parquet output requires pyarrow (pip install pyarrow)")
+        self.pa = pa
+        self.schema = pa.schema([("roll_number", pa.int64()), ("division", pa.string()), ("strategy", pa.string())])
+        self.writer = pq.ParquetWriter(path, self.schema)
+
+    def write(self, lines: List[str]):
+        records = [json.loads(line) for line in lines]
+        self.writer.write_table(self.pa.table({
+            "roll_number": [record["roll_number"] for record in records],
+            "division": [record["division"] for record in records],
+            "strategy": [json.dumps(record["strategy"], ensure_ascii=False) for record in records]
+        }, schema=self.schema))
+
+    def close(self):
+        self.writer.close()
+
+def run_strategy_batch(students: Iterable[Dict[str, Any]], output_path: str, workers: int = None, chunk_size: int = 500) -> Dict[str, Any]:
+    """Generate attendance strategies for many students across a process pool
+
+    Students are sent to the workers in chunks, with at most two chunks per worker in
+    flight, and results are written in input order as each chunk completes. Output is
+    JSON lines, or Parquet when ``output_path`` ends with ``.parquet``.
+    """
+
+    workers = workers or os.cpu_count() or 1
+    writer = _ParquetWriter(output_path) if output_path.endswith(".parquet") else _JsonLinesWriter(output_path)
+    processed = 0
+    start = time.perf_counter()
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker) as executor:
+            pending = deque()
+            for chunk in _chunks(students, chunk_size):
+                pending.append(executor.submit(_generate_chunk, chunk))
+                if len(pending) >= workers * 2:
+                    lines = pending.popleft().result()
+                    writer.write(lines)
+                    processed += len(lines)
+            while pending:
+                lines = pending.popleft().result()
+                writer.write(lines)
+                processed += len(lines)
+    finally:
+        writer.close()
+
+    elapsed = time.perf_counter() - start
+    return {
+        "students": processed,
+        "seconds": elapsed,
+        "students_per_second": processed / elapsed if elapsed else 0.0,
+        "workers": workers,
+        "chunk_size": chunk_size,
+        "output": output_path
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Batch-generate GTU attendance strategies for every student")
+    parser.add_argument("--output", required=True, help="Output file (.jsonl, or .parquet with pyarrow installed)")
+    parser.add_argument("--input", help="JSON-lines file of per-student current_data (default: every roll number in the divisions)")
+    parser.add_argument("--workers", type=int, help="Worker processes (default: CPU count)")
+    parser.add_argument("--chunk-size", type=int, default=500, help="Students per worker task")
+    parser.add_argument("--attendance", type=float, default=72.0, help="Attendance used when generating division roll numbers")
+    parser.add_argument("--remaining-weeks", type=int, default=10, help="Remaining weeks used when generating division roll numbers")
+    args = parser.parse_args()
+
+    students = read_students(args.input) if args.input else iter_division_students(args.attendance, args.remaining_weeks)
+
+    print("🚀 Generating attendance strategies...", file=sys.stderr)
+    stats = run_strategy_batch(students, args.output, args.workers, args.chunk_size)
+    print(f"✅ {stats['students']} students in {stats['seconds']:.2f}s "
+          f"({stats['students_per_second']:.0f} students/sec, {stats['workers']} workers) → {stats['output']}", file=sys.stderr)